@@ -0,0 +1,125 @@
+"""Partition odds_snapshots by day so retention can drop whole partitions.
+
+The table becomes RANGE-partitioned on captured_at with one partition per
+UTC day (odds_snapshots_pYYYYMMDD) plus odds_snapshots_default for rows
+outside every daily range.  The primary key must include the partition key,
+so it becomes (id, captured_at).  Only rows inside the retention window
+(the pre-created days) are copied across; older history is dropped with the
+old table rather than deleted row by row.
+
+Future partitions are created and expired ones dropped by
+src.tasks.cleanup (run from scripts/run_scheduler.py).
+
+Revision ID: 004_snapshots_partitioned
+Revises: 003_user_profile
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "004_snapshots_partitioned"
+down_revision = "003_user_profile"
+branch_labels = None
+depends_on = None
+
+# Matches ODDS_RETENTION_DAYS / ODDS_PARTITION_DAYS_AHEAD in src.tasks.cleanup
+DAYS_BEHIND = 7
+DAYS_AHEAD = 3
+
+COLUMNS = (
+    "id, market_id, platform_id, platform_slug, outcome_index, outcome_name, "
+    "price, implied_prob, bid, ask, volume_24h, captured_at"
+)
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE odds_snapshots RENAME TO odds_snapshots_old")
+    op.execute("ALTER INDEX odds_snapshots_pkey RENAME TO odds_snapshots_old_pkey")
+    op.execute("ALTER INDEX ix_odds_snapshots_market_id RENAME TO ix_odds_snapshots_old_market_id")
+    op.execute(
+        "ALTER INDEX ix_odds_snapshots_captured_at RENAME TO ix_odds_snapshots_old_captured_at"
+    )
+
+    op.execute("""
+        CREATE TABLE odds_snapshots (
+            id INTEGER NOT NULL DEFAULT nextval('odds_snapshots_id_seq'),
+            market_id VARCHAR(300) NOT NULL,
+            platform_id INTEGER NOT NULL,
+            platform_slug VARCHAR(50),
+            outcome_index SMALLINT NOT NULL,
+            outcome_name VARCHAR(200) NOT NULL,
+            price NUMERIC(8, 6) NOT NULL,
+            implied_prob NUMERIC(8, 6) NOT NULL,
+            bid NUMERIC(8, 6),
+            ask NUMERIC(8, 6),
+            volume_24h NUMERIC(16, 2),
+            captured_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT odds_snapshots_pkey PRIMARY KEY (id, captured_at)
+        ) PARTITION BY RANGE (captured_at)
+    """)
+    # Keep the id sequence alive when the old table is dropped
+    op.execute("ALTER SEQUENCE odds_snapshots_id_seq OWNED BY odds_snapshots.id")
+    op.execute("CREATE INDEX ix_odds_snapshots_market_id ON odds_snapshots (market_id)")
+    op.execute("CREATE INDEX ix_odds_snapshots_captured_at ON odds_snapshots (captured_at)")
+
+    op.execute("CREATE TABLE odds_snapshots_default PARTITION OF odds_snapshots DEFAULT")
+    op.execute(f"""
+        DO $$
+        DECLARE
+            day date;
+        BEGIN
+            FOR day IN
+                SELECT generate_series(
+                    (now() AT TIME ZONE 'UTC')::date - {DAYS_BEHIND},
+                    (now() AT TIME ZONE 'UTC')::date + {DAYS_AHEAD},
+                    interval '1 day'
+                )::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF odds_snapshots '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    'odds_snapshots_p' || to_char(day, 'YYYYMMDD'),
+                    day::text || ' 00:00:00+00',
+                    (day + 1)::text || ' 00:00:00+00'
+                );
+            END LOOP;
+        END
+        $$
+    """)
+
+    # Exactly the range of the daily partitions created above
+    op.execute(f"""
+        INSERT INTO odds_snapshots ({COLUMNS})
+        SELECT {COLUMNS} FROM odds_snapshots_old
+        WHERE captured_at >= (
+            ((now() AT TIME ZONE 'UTC')::date - {DAYS_BEHIND})::timestamp AT TIME ZONE 'UTC'
+        )
+    """)
+    op.execute("DROP TABLE odds_snapshots_old")
+
+
+def downgrade() -> None:
+    op.execute("""
+        CREATE TABLE odds_snapshots_flat (
+            id INTEGER NOT NULL DEFAULT nextval('odds_snapshots_id_seq'),
+            market_id VARCHAR(300) NOT NULL,
+            platform_id INTEGER NOT NULL,
+            platform_slug VARCHAR(50),
+            outcome_index SMALLINT NOT NULL,
+            outcome_name VARCHAR(200) NOT NULL,
+            price NUMERIC(8, 6) NOT NULL,
+            implied_prob NUMERIC(8, 6) NOT NULL,
+            bid NUMERIC(8, 6),
+            ask NUMERIC(8, 6),
+            volume_24h NUMERIC(16, 2),
+            captured_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute(
+        f"INSERT INTO odds_snapshots_flat ({COLUMNS}) SELECT {COLUMNS} FROM odds_snapshots"
+    )
+    op.execute("ALTER SEQUENCE odds_snapshots_id_seq OWNED BY odds_snapshots_flat.id")
+    op.execute("DROP TABLE odds_snapshots")  # drops every partition with it
+    op.execute("ALTER TABLE odds_snapshots_flat RENAME TO odds_snapshots")
+    op.execute("ALTER TABLE odds_snapshots ADD CONSTRAINT odds_snapshots_pkey PRIMARY KEY (id)")
+    op.execute("CREATE INDEX ix_odds_snapshots_market_id ON odds_snapshots (market_id)")
+    op.execute("CREATE INDEX ix_odds_snapshots_captured_at ON odds_snapshots (captured_at)")
@@ -1,13 +1,20 @@
 """Scheduler process — runs periodic background tasks.
 
 Tasks:
-- Cleanup old odds snapshots (every 6 hours)
+- Create upcoming odds snapshot partitions and drop expired ones (every 6 hours)
 - Mark stale markets inactive (every 24 hours)
+- Purge legacy per-user notification lists (once at startup)
 """
 import asyncio
 import structlog
 
-from src.tasks.cleanup import prune_old_odds, mark_stale_markets
+from src.core.redis import close_redis, init_redis
+from src.tasks.cleanup import (
+    ensure_odds_partitions,
+    mark_stale_markets,
+    prune_old_odds,
+    purge_legacy_notifications,
+)
 
 logger = structlog.get_logger()
 
@@ -16,9 +23,10 @@ STALE_CHECK_INTERVAL = 24 * 3600  # 24 hours
 
 
 async def cleanup_loop():
-    """Run odds pruning every 6 hours."""
+    """Maintain odds snapshot partitions every 6 hours."""
     while True:
         try:
+            await ensure_odds_partitions()
             await prune_old_odds()
         except Exception as e:
             logger.error("Cleanup task failed", error=str(e))
@@ -38,6 +46,14 @@ async def stale_market_loop():
 async def main():
     logger.info("Scheduler starting", cleanup_interval_h=CLEANUP_INTERVAL // 3600,
                 stale_check_interval_h=STALE_CHECK_INTERVAL // 3600)
+    try:
+        redis = await init_redis()
+        await purge_legacy_notifications(redis)
+    except Exception as e:
+        logger.error("Legacy notification purge failed", error=str(e))
+    finally:
+        await close_redis()
+
     await asyncio.gather(
         cleanup_loop(),
         stale_market_loop(),
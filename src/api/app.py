@@ -113,12 +113,11 @@ async def lifespan(app: FastAPI):
 
     async def _snapshot_odds():
         from src.core.database import async_session_factory
+        from src.services.live_store import decode_live_market, live_keys, parse_live_key
         await asyncio.sleep(120)  # Wait for workers to publish initial data
         while True:
             try:
-                keys: list[str] = []
-                async for key in redis.scan_iter(match="odds:live:*", count=500):
-                    keys.append(key if isinstance(key, str) else key.decode())
+                keys = await live_keys(redis)
 
                 if not keys:
                     await asyncio.sleep(300)
@@ -132,38 +131,25 @@ async def lifespan(app: FastAPI):
 
                 rows = []
                 for key, data in zip(keys, all_data):
-                    if not data:
+                    market = decode_live_market(data)
+                    if market is None:
                         continue
-                    parts = key.split(":", 3)
-                    market_id = parts[3] if len(parts) > 3 else ""
-                    platform_slug = data.get("platform", "")
+                    _, market_id = parse_live_key(key)
+                    platform_slug = market["platform"]
                     platform_id = PLATFORM_SLUG_TO_ID.get(platform_slug, 0)
 
-                    # Collect outcomes
-                    i = 0
-                    while f"outcome_{i}_name" in data:
-                        name = data.get(f"outcome_{i}_name", "")
-                        price_str = data.get(f"outcome_{i}_price", "0")
-                        implied_str = data.get(f"outcome_{i}_implied", "0")
-                        try:
-                            price = float(price_str)
-                            implied = float(implied_str)
-                        except (ValueError, TypeError):
-                            i += 1
-                            continue
-                        if implied <= 0:
-                            i += 1
+                    for outcome in market["outcomes"]:
+                        if outcome["implied_prob"] <= 0:
                             continue
                         rows.append({
                             "market_id": market_id,
                             "platform_id": platform_id,
                             "platform_slug": platform_slug,
-                            "outcome_index": i,
-                            "outcome_name": name,
-                            "price": price,
-                            "implied_prob": implied,
+                            "outcome_index": outcome["outcome_index"],
+                            "outcome_name": outcome["outcome_name"],
+                            "price": outcome["price"],
+                            "implied_prob": outcome["implied_prob"],
                         })
-                        i += 1
 
                 if rows:
                     # Batch insert via raw SQL for performance
@@ -188,94 +174,60 @@ async def lifespan(app: FastAPI):
 
     snapshot_task = asyncio.create_task(_snapshot_odds(), name="snapshot-writer")
 
-    # Background notification producer: subscribes to arb alerts and pushes
-    # notifications to all pro users' Redis lists.
+    # Notification producer: one elected instance across all replicas turns
+    # arb alerts into entries in the shared notification log.
     async def _notification_producer():
-        import orjson
-        from src.core.database import async_session_factory
-        from sqlalchemy import text
+        from src.services.notification_service import NotificationService
         await asyncio.sleep(30)  # Wait for arb engine to start
-        pubsub = redis.pubsub()
-        await pubsub.subscribe("arb:alerts")
-        logger.info("Notification producer subscribed to arb:alerts")
-        try:
-            async for message in pubsub.listen():
-                if message["type"] != "message":
-                    continue
-                try:
-                    alert = orjson.loads(message["data"])
-                    arb_data = alert.get("data", {})
-                    profit = arb_data.get("expected_profit", 0)
-                    if profit < 0.005:  # Only notify for >0.5% arbs
-                        continue
-
-                    title = arb_data.get("market_title", "Unknown market")
-                    legs = arb_data.get("legs", [])
-                    leg_summary = " vs ".join(
-                        f"{leg['platform']} ({leg['outcome_name']})"
-                        for leg in legs[:2]
-                    )
-                    notification = orjson.dumps({
-                        "type": "arb_alert",
-                        "title": f"Arb: {profit:.2%} profit",
-                        "body": f"{title[:80]} — {leg_summary}",
-                        "data": arb_data,
-                        "created_at": arb_data.get("detected_at"),
-                    }).decode()
-
-                    # Get all pro user IDs
-                    async with async_session_factory() as session:
-                        result = await session.execute(
-                            text("SELECT id FROM users WHERE tier = 'pro' AND is_active = true")
-                        )
-                        user_ids = [str(row[0]) for row in result.fetchall()]
-
-                    if user_ids:
-                        pipe = redis.pipeline()
-                        for uid in user_ids:
-                            pipe.lpush(f"notifications:{uid}", notification)
-                            pipe.ltrim(f"notifications:{uid}", 0, 49)  # Keep last 50
-                            pipe.incr(f"notifications:{uid}:unread")
-                        await pipe.execute()
-                        logger.info("Arb notification sent", users=len(user_ids), profit=f"{profit:.2%}")
-                except Exception as e:
-                    logger.warning("Notification producer error", error=str(e))
-        except asyncio.CancelledError:
-            pass
-        finally:
-            await pubsub.unsubscribe("arb:alerts")
+        await NotificationService(redis).run()
 
     notif_task = asyncio.create_task(_notification_producer(), name="notification-producer")
 
-    # Background cache warmer: pre-builds the expensive odds response every 90s
-    # so user requests always hit the fast cache path.
+    # Background cache warmer: materialises every odds view (all + per-category)
+    # in one pass whenever the cached views go stale, so user requests always
+    # hit the fast cache path.
     async def _warm_odds_cache():
-        from src.services.odds_service import get_all_live_odds
+        from src.services.odds_service import warm_live_odds
         await asyncio.sleep(15)  # short delay for workers to publish first batch
-        categories = [None, "politics", "economics", "crypto", "science", "culture", "sports"]
         while True:
             try:
-                for cat in categories:
-                    # Warm with full default page size (50) so user requests hit cache
-                    await get_all_live_odds(redis, page=1, per_page=50, category=cat)
+                await warm_live_odds(redis)
                 logger.debug("Odds response cache warmed")
             except Exception as e:
                 logger.warning("Cache warm failed", error=str(e))
-            await asyncio.sleep(90)
+            await asyncio.sleep(30)
 
     cache_task = asyncio.create_task(_warm_odds_cache(), name="cache-warmer")
 
+    # Every process drops cached principals that any replica invalidates
+    from src.services.user_service import listen_principal_invalidations
+    principal_task = asyncio.create_task(
+        listen_principal_invalidations(redis), name="principal-invalidations"
+    )
+
+    # One Redis subscription per process fans out to every WebSocket client
+    from src.api.v1.ws import hub as ws_hub
+    from src.services.odds_service import title_clusters
+    ws_hub.start(redis, title_clusters)
+
     yield
 
+    await ws_hub.stop()
+
     # Shutdown — cancel all background tasks then close redis
-    for t in [cache_task, snapshot_task, notif_task]:
+    for t in [cache_task, snapshot_task, notif_task, principal_task]:
         t.cancel()
     if arb_task:
         arb_task.cancel()
     for task in worker_tasks:
         task.cancel()
-    all_tasks = [t for t in [*worker_tasks, arb_task, cache_task, snapshot_task, notif_task] if t]
+    all_tasks = [
+        t for t in [*worker_tasks, arb_task, cache_task, snapshot_task, notif_task, principal_task]
+        if t
+    ]
     await asyncio.gather(*all_tasks, return_exceptions=True)
+    from src.services.compute import offloader
+    offloader.shutdown()
     await close_redis()
     logger.info("OddsAxiom API shutdown complete")
 
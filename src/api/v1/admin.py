@@ -1,10 +1,12 @@
 """Admin-only endpoints."""
+import orjson
 import redis.asyncio as aioredis
 from fastapi import APIRouter, Depends, Header, Query
 from pydantic import BaseModel
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.arbengine.engine import METRICS_KEY
 from src.core.database import get_db
 from src.core.dependencies import get_admin_user
 from src.core.exceptions import ForbiddenError, UnauthorizedError
@@ -14,6 +16,9 @@ from src.models.market import Market
 from src.models.subscription import Subscription
 from src.models.user import User
 from src.schemas.user import UserResponse
+from src.services.live_store import live_count, live_counts_by_platform
+from src.services.notification_service import invalidate_recipients
+from src.services.user_service import invalidate_principal
 
 router = APIRouter()
 
@@ -78,9 +83,7 @@ async def platform_metrics(
     ).scalar() or 0
 
     # Count live markets from Redis (the actual data source)
-    live_markets = 0
-    async for _ in redis.scan_iter(match="odds:live:*", count=500):
-        live_markets += 1
+    live_markets = await live_count(redis)
 
     # Count active arb opportunities
     active_arbs = await redis.zcard("arb:active") or 0
@@ -117,6 +120,9 @@ async def update_user(
 
     await db.commit()
     await db.refresh(user)
+    await invalidate_principal(user.firebase_uid)
+    if body.tier is not None or body.is_active is not None:
+        await invalidate_recipients()
     return UserResponse.model_validate(user)
 
 
@@ -135,6 +141,8 @@ async def delete_user(
 
     user.is_active = False
     await db.commit()
+    await invalidate_principal(user.firebase_uid)
+    await invalidate_recipients()
     return {"detail": "User deactivated", "user_id": user_id}
 
 
@@ -173,6 +181,8 @@ async def bootstrap_admin(
     user.tier = "pro"
     await db.commit()
     await db.refresh(user)
+    await invalidate_principal(user.firebase_uid)
+    await invalidate_recipients()
 
     return {
         "detail": "User promoted to admin + pro tier",
@@ -188,20 +198,12 @@ async def ingestion_status(
     admin: User = Depends(get_admin_user),
     redis: aioredis.Redis = Depends(get_redis),
 ):
-    """Get live ingestion status — counts per platform from Redis."""
-    platforms: dict[str, int] = {}
-    total_keys = 0
-
-    async for key in redis.scan_iter(match="odds:live:*", count=500):
-        key_str = key if isinstance(key, str) else key.decode()
-        total_keys += 1
-        # Key format: odds:live:{platform}:{market_id}
-        parts = key_str.split(":", 3)
-        if len(parts) >= 3:
-            platform = parts[2]
-            platforms[platform] = platforms.get(platform, 0) + 1
+    """Get live ingestion status — counts per platform and arb stream consumer stats."""
+    platforms = await live_counts_by_platform(redis)
+    consumers = await redis.hgetall(METRICS_KEY)
 
     return {
-        "total_keys": total_keys,
+        "total_keys": sum(platforms.values()),
         "platforms": dict(sorted(platforms.items(), key=lambda x: -x[1])),
+        "arb_consumers": {name: orjson.loads(stats) for name, stats in consumers.items()},
     }
@@ -4,8 +4,8 @@ from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 
 from src.core.config import settings
-from src.core.dependencies import get_current_user
-from src.models.user import User
+from src.core.dependencies import get_current_principal
+from src.services.user_service import UserPrincipal
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -33,7 +33,7 @@ class AnalysisResponse(BaseModel):
 @router.post("/market", response_model=AnalysisResponse)
 async def analyze_market(
     body: AnalysisRequest,
-    user: User = Depends(get_current_user),
+    user: UserPrincipal = Depends(get_current_principal),
 ):
     """Run AI analysis on a market using Gemini with web grounding."""
     api_key = settings.google_ai_api_key
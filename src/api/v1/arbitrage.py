@@ -3,9 +3,9 @@ import orjson
 import redis.asyncio as aioredis
 from fastapi import APIRouter, Depends, Query
 
-from src.core.dependencies import TierGate, get_current_user
+from src.core.dependencies import TierGate, get_current_principal
 from src.core.redis import get_redis
-from src.models.user import User
+from src.services.user_service import UserPrincipal
 
 router = APIRouter()
 
@@ -16,7 +16,7 @@ async def list_arb_opportunities(
     min_profit: float = Query(0.0, ge=0.0),
     page: int = Query(1, ge=1),
     per_page: int = Query(50, ge=1, le=200),
-    user: User = Depends(get_current_user),
+    user: UserPrincipal = Depends(get_current_principal),
     redis: aioredis.Redis = Depends(get_redis),
 ):
     """Get active arbitrage opportunities from Redis. Requires login."""
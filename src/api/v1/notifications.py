@@ -1,10 +1,11 @@
 """Notification endpoints — arb alerts and system notifications."""
-import orjson
 import redis.asyncio as aioredis
 from fastapi import APIRouter, Depends, Query
-from src.core.dependencies import get_current_user
+from src.core.dependencies import get_current_principal
 from src.core.redis import get_redis
-from src.models.user import User
+from src.schemas.notification import NotificationPreferences, NotificationPreferencesUpdate
+from src.services import notification_service
+from src.services.user_service import UserPrincipal
 
 router = APIRouter()
 
@@ -12,45 +13,43 @@ router = APIRouter()
 async def get_notifications(
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
-    user: User = Depends(get_current_user),
+    user: UserPrincipal = Depends(get_current_principal),
     redis: aioredis.Redis = Depends(get_redis),
 ):
-    """Get user's notifications from Redis. Stores last 50 per user."""
-    key = f"notifications:{user.id}"
-    # Get notifications from Redis list (newest first)
-    start = (page - 1) * per_page
-    end = start + per_page - 1
-    raw_items = await redis.lrange(key, start, end)
-    total = await redis.llen(key)
-
-    notifications = []
-    for raw in raw_items:
-        try:
-            notifications.append(orjson.loads(raw))
-        except Exception:
-            continue
-
-    return {
-        "data": notifications,
-        "meta": {"page": page, "per_page": per_page, "total": total},
-        "unread_count": await redis.get(f"notifications:{user.id}:unread") or 0,
-    }
+    """Get user's notifications, newest first, from the shared alert log."""
+    return await notification_service.get_user_notifications(redis, user, page, per_page)
 
 @router.post("/read")
 async def mark_all_read(
-    user: User = Depends(get_current_user),
+    user: UserPrincipal = Depends(get_current_principal),
     redis: aioredis.Redis = Depends(get_redis),
 ):
     """Mark all notifications as read."""
-    await redis.set(f"notifications:{user.id}:unread", 0)
+    await notification_service.mark_notifications_read(redis, user)
     return {"success": True}
 
 @router.delete("")
 async def clear_notifications(
-    user: User = Depends(get_current_user),
+    user: UserPrincipal = Depends(get_current_principal),
     redis: aioredis.Redis = Depends(get_redis),
 ):
     """Clear all notifications for the user."""
-    await redis.delete(f"notifications:{user.id}")
-    await redis.delete(f"notifications:{user.id}:unread")
+    await notification_service.clear_notifications(redis, user)
     return {"success": True}
+
+@router.get("/preferences", response_model=NotificationPreferences)
+async def get_preferences(
+    user: UserPrincipal = Depends(get_current_principal),
+    redis: aioredis.Redis = Depends(get_redis),
+):
+    """Get the user's arb alert filters."""
+    return await notification_service.get_preferences(redis, user)
+
+@router.put("/preferences", response_model=NotificationPreferences)
+async def update_preferences(
+    body: NotificationPreferencesUpdate,
+    user: UserPrincipal = Depends(get_current_principal),
+    redis: aioredis.Redis = Depends(get_redis),
+):
+    """Update the user's arb alert filters (minimum profit, categories, platforms)."""
+    return await notification_service.update_preferences(redis, user, body)
@@ -1,13 +1,19 @@
 """Live odds and historical odds endpoints."""
 import redis.asyncio as aioredis
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.database import get_db
 from src.core.dependencies import TierGate, get_optional_user
 from src.core.redis import get_redis
-from src.models.user import User
-from src.services.odds_service import get_all_live_odds, get_live_odds_for_market, get_odds_history
+from src.services.odds_service import (
+    PAGE_SIZE,
+    get_all_live_odds,
+    get_live_odds_for_market,
+    get_live_odds_page,
+    get_odds_history,
+)
+from src.services.user_service import UserPrincipal
 
 router = APIRouter()
 
@@ -20,6 +26,10 @@ async def live_odds(
     redis: aioredis.Redis = Depends(get_redis),
 ):
     """Get all live odds from Redis cache, grouped by market."""
+    if per_page == PAGE_SIZE:
+        # Pre-serialised page straight from the cache
+        body = await get_live_odds_page(redis, page=page, category=category)
+        return Response(content=body, media_type="application/json")
     return await get_all_live_odds(redis, page=page, per_page=per_page, category=category)
 
 
@@ -37,7 +47,7 @@ async def odds_history(
     market_id: str,
     outcome: str | None = None,
     limit: int = Query(500, ge=1, le=5000),
-    user: User = Depends(TierGate("pro")),
+    user: UserPrincipal = Depends(TierGate("pro")),
     db: AsyncSession = Depends(get_db),
 ):
     """Get historical odds snapshots. Requires Pro tier or above."""
@@ -1,48 +1,381 @@
-"""WebSocket endpoint for real-time odds updates and arbitrage alerts."""
+"""WebSocket endpoint for real-time odds updates and arbitrage alerts.
+
+Each API process runs one ``PubSubHub``: a single Redis subscription to
+every WebSocket channel whose messages are fanned out by the
+``ConnectionManager``.  Every socket has its own bounded send queue drained
+by its own sender task, so one slow client never holds up the others; a
+client whose queue fills up is disconnected.
+"""
 import asyncio
 
 import orjson
 import structlog
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
-from src.core.redis import get_redis
+from src.arbengine.cluster_store import ClusterStore
 
 logger = structlog.get_logger()
 
 router = APIRouter()
 
+ODDS_CHANNEL = "odds:updates"
+ARB_CHANNEL = "arb:alerts"
+CHANNELS = (ODDS_CHANNEL, ARB_CHANNEL)
+CLIENT_QUEUE_SIZE = 256  # messages buffered per socket before it counts as too slow
+HEARTBEAT_INTERVAL = 30.0
+RESUBSCRIBE_DELAY = 1.0  # seconds before the hub retries a lost Redis subscription
+CLUSTER_SYNC_INTERVAL = 5.0  # seconds between syncs of the canonical title clusters
+WS_CLOSE_TOO_SLOW = 1013  # "try again later"
+
+# Topic filters a client can subscribe to: message field -> subscribe key
+TOPIC_KINDS = {"category": "categories", "market": "markets", "platform": "platforms"}
+MAX_TOPICS_PER_CLIENT = 500
+
+# Close handshakes for dropped clients, held until done so they aren't collected
+_closing: set[asyncio.Task] = set()
+
+
+def _topic_value(kind: str, value: str) -> str:
+    # Canonical market titles match exactly; categories and platforms by slug
+    return value if kind == "market" else value.lower()
+
+
+class _Client:
+    """One socket's subscriptions and outbound queue."""
+
+    __slots__ = ("ws", "channels", "topics", "min_profit", "queue", "sender")
+
+    def __init__(self, ws: WebSocket):
+        self.ws = ws
+        self.channels: set[str] = set(CHANNELS)  # Default channels
+        self.topics: dict[str, set[str]] = {}  # kind -> accepted values
+        self.min_profit = 0.0
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self.sender: asyncio.Task | None = None
+
+    def matches(self, category: str, market: str, platforms: tuple[str, ...]) -> bool:
+        """True if a message about this market passes every topic kind set."""
+        for kind, values in self.topics.items():
+            if kind == "category":
+                ok = category.lower() in values
+            elif kind == "market":
+                ok = market in values
+            else:
+                ok = any(p.lower() in values for p in platforms)
+            if not ok:
+                return False
+        return True
+
 
 class ConnectionManager:
-    """Manages WebSocket connections and their channel subscriptions."""
+    """Manages WebSocket connections and their subscriptions.
+
+    Subscriptions are indexed so a message is matched against only the
+    clients that could want it: clients without topic filters per channel,
+    and topic -> clients for the filtered ones.
+    """
 
     def __init__(self):
-        self.connections: dict[WebSocket, set[str]] = {}
+        self.connections: dict[WebSocket, _Client] = {}
+        # Clients with no topic filters, per channel (they get every message)
+        self._unfiltered: dict[str, set[_Client]] = {channel: set() for channel in CHANNELS}
+        # Unfiltered clients that only want arbs above their min_profit
+        self._profit_floor: set[_Client] = set()
+        # (kind, value) -> clients filtering on that topic
+        self._topics: dict[tuple[str, str], set[_Client]] = {}
+        self._filtered = 0  # clients with topic filters
 
-    async def connect(self, ws: WebSocket):
+    async def connect(self, ws: WebSocket) -> _Client:
         await ws.accept()
-        self.connections[ws] = {"odds:updates", "arb:alerts"}  # Default channels
+        client = _Client(ws)
+        client.sender = asyncio.create_task(self._send_loop(client))
+        self.connections[ws] = client
+        self._index(client)
+        return client
 
     def disconnect(self, ws: WebSocket):
-        self.connections.pop(ws, None)
+        client = self.connections.pop(ws, None)
+        if client:
+            self._unindex(client)
+            if client.sender:
+                client.sender.cancel()
 
-    async def broadcast(self, channel: str, message: str):
-        """Send message to all connections subscribed to this channel."""
-        dead = []
-        for ws, channels in self.connections.items():
-            if channel in channels:
-                try:
-                    await ws.send_text(message)
-                except Exception:
-                    dead.append(ws)
-        for ws in dead:
-            self.disconnect(ws)
+    def update(self, client: _Client, msg: dict) -> None:
+        """Apply a subscribe/unsubscribe request to a client and reindex it."""
+        action = msg.get("action")
+        if action not in ("subscribe", "unsubscribe"):
+            return
+        self._unindex(client)
+        try:
+            channels = set(msg.get("channels") or ()) & set(CHANNELS)
+            if action == "subscribe":
+                client.channels |= channels
+            else:
+                client.channels -= channels
+
+            for kind, key in TOPIC_KINDS.items():
+                values = {_topic_value(kind, str(v)) for v in msg.get(key) or ()}
+                if not values:
+                    continue
+                if action == "subscribe":
+                    current = client.topics.setdefault(kind, set())
+                    room = MAX_TOPICS_PER_CLIENT - sum(len(v) for v in client.topics.values())
+                    current |= set(sorted(values - current)[:max(room, 0)])
+                elif kind in client.topics:
+                    client.topics[kind] -= values
+                if not client.topics.get(kind):
+                    client.topics.pop(kind, None)
+
+            if "min_profit" in msg and action == "subscribe":
+                client.min_profit = max(0.0, float(msg["min_profit"] or 0))
+            elif msg.get("min_profit") is not None:
+                client.min_profit = 0.0
+        finally:
+            self._index(client)
+
+    def _index(self, client: _Client) -> None:
+        if client.topics:
+            self._filtered += 1
+            for kind, values in client.topics.items():
+                for value in values:
+                    self._topics.setdefault((kind, value), set()).add(client)
+            return
+        for channel in client.channels:
+            self._unfiltered[channel].add(client)
+        if client.min_profit > 0:
+            self._profit_floor.add(client)
+
+    def _unindex(self, client: _Client) -> None:
+        if client.topics:
+            self._filtered -= 1
+            for kind, values in client.topics.items():
+                for value in values:
+                    subscribers = self._topics.get((kind, value))
+                    if subscribers is not None:
+                        subscribers.discard(client)
+                        if not subscribers:
+                            del self._topics[(kind, value)]
+            return
+        for subscribers in self._unfiltered.values():
+            subscribers.discard(client)
+        self._profit_floor.discard(client)
+
+    def _candidates(self, category: str, market: str, platforms: tuple[str, ...]) -> set[_Client]:
+        """Filtered clients subscribed to any topic of a message."""
+        found: set[_Client] = set()
+        keys = [("category", category.lower()), ("market", market)]
+        keys += [("platform", p.lower()) for p in platforms]
+        for key in keys:
+            subscribers = self._topics.get(key)
+            if subscribers:
+                found |= subscribers
+        return found
+
+    def broadcast(self, channel: str, message: str, payload: dict | None = None):
+        """Queue message for every connection that wants it.
+
+        ``payload`` is the already decoded message, if the caller has it.
+        """
+        if channel == ODDS_CHANNEL:
+            recipients = self._unfiltered[channel]
+        else:
+            recipients = self._unfiltered.get(channel, set()) - self._profit_floor
+        for client in list(recipients):
+            self._enqueue(client, message)
+
+        if not self._filtered and not (channel == ARB_CHANNEL and self._profit_floor):
+            return
+        if payload is None:
+            try:
+                payload = orjson.loads(message)
+            except orjson.JSONDecodeError:
+                return
+        if channel == ODDS_CHANNEL and payload.get("type") == "odds_delta":
+            self._broadcast_deltas(payload)
+        elif channel == ARB_CHANNEL:
+            self._broadcast_arb(payload, message)
+
+    def _broadcast_deltas(self, payload: dict) -> None:
+        """Send each filtered client only the delta rows for its topics."""
+        rows_by_client: dict[_Client, list] = {}
+        if self._filtered:
+            for row in payload.get("deltas", ()):
+                platform, category, market = row[0], row[5], row[6]
+                for client in self._candidates(category, market, (platform,)):
+                    if ODDS_CHANNEL in client.channels and client.matches(
+                        category, market, (platform,)
+                    ):
+                        rows_by_client.setdefault(client, []).append(row)
+        for client, rows in rows_by_client.items():
+            self._enqueue(client, orjson.dumps({**payload, "deltas": rows}).decode())
+
+    def _broadcast_arb(self, payload: dict, message: str) -> None:
+        """Send an arb alert/close to filtered and min-profit clients that want it."""
+        data = payload.get("data") or {}
+        category = data.get("category", "")
+        market = data.get("market_title", "")
+        platforms = tuple(leg.get("platform", "") for leg in data.get("legs", ()))
+        platforms = platforms or tuple(data.get("platforms", ()))
+        # arb_closed has no profit: a close always reaches its market's watchers
+        profit = data.get("expected_profit")
+
+        recipients = [
+            client for client in self._profit_floor
+            if ARB_CHANNEL in client.channels
+            and (profit is None or profit >= client.min_profit)
+        ]
+        if self._filtered:
+            recipients += [
+                client for client in self._candidates(category, market, platforms)
+                if ARB_CHANNEL in client.channels
+                and (profit is None or profit >= client.min_profit)
+                and client.matches(category, market, platforms)
+            ]
+        for client in recipients:
+            self._enqueue(client, message)
+
+    def broadcast_all(self, message: str):
+        """Queue message for every connection."""
+        for client in list(self.connections.values()):
+            self._enqueue(client, message)
+
+    def _enqueue(self, client: _Client, message: str) -> None:
+        if client.ws not in self.connections:
+            return  # dropped earlier in this broadcast
+        try:
+            client.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            logger.warning("Dropping slow WebSocket client", queued=client.queue.qsize())
+            self.disconnect(client.ws)
+            task = asyncio.create_task(_close(client.ws, WS_CLOSE_TOO_SLOW))
+            _closing.add(task)
+            task.add_done_callback(_closing.discard)
+
+    async def _send_loop(self, client: _Client) -> None:
+        """Drain one client's queue onto its socket."""
+        try:
+            while True:
+                message = await client.queue.get()
+                await client.ws.send_text(message)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            self.disconnect(client.ws)
 
     @property
     def count(self) -> int:
         return len(self.connections)
 
 
+async def _close(ws: WebSocket, code: int) -> None:
+    try:
+        await ws.close(code=code)
+    except Exception:
+        pass
+
+
+class PubSubHub:
+    """One Redis subscription per process, fanned out to every socket.
+
+    Workers publish odds deltas with each platform's own market title; with
+    ``clusters`` the hub swaps in the canonical title before fanning out.
+    """
+
+    def __init__(self, manager: ConnectionManager):
+        self.manager = manager
+        self._clusters: ClusterStore | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self, redis, clusters: ClusterStore | None = None) -> None:
+        if self._tasks:
+            return
+        self._clusters = clusters
+        self._tasks = [
+            asyncio.create_task(self._listen(redis), name="ws-pubsub-hub"),
+            asyncio.create_task(self._heartbeat(), name="ws-heartbeat"),
+        ]
+        if clusters is not None:
+            self._tasks.append(
+                asyncio.create_task(self._sync_clusters(redis), name="ws-cluster-sync")
+            )
+        logger.info("WebSocket pub/sub hub started", channels=list(CHANNELS))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for ws in list(self.manager.connections):
+            self.manager.disconnect(ws)
+
+    async def _listen(self, redis) -> None:
+        """Forward Redis pub/sub messages to subscribed clients, resubscribing on errors."""
+        lost = False
+        while True:
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.subscribe(*CHANNELS)
+                if lost:
+                    # Messages published while we were away are gone
+                    self.manager.broadcast_all(orjson.dumps({"type": "resync"}).decode())
+                    lost = False
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    data = message.get("data", "")
+                    if isinstance(data, bytes):
+                        data = data.decode()
+                    channel = message.get("channel", "")
+                    if channel == ODDS_CHANNEL and self._clusters is not None:
+                        self._broadcast_canonical(data)
+                    else:
+                        self.manager.broadcast(channel, data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                lost = True
+                logger.warning("WebSocket pub/sub hub error", error=str(e))
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(RESUBSCRIBE_DELAY)
+
+    def _broadcast_canonical(self, data: str) -> None:
+        """Broadcast an odds message with canonical titles in its delta rows."""
+        try:
+            payload = orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return
+        if payload.get("type") == "odds_delta":
+            for row in payload.get("deltas", ()):
+                row[6] = self._clusters.canonical(row[6])
+            data = orjson.dumps(payload).decode()
+        self.manager.broadcast(ODDS_CHANNEL, data, payload)
+
+    async def _sync_clusters(self, redis) -> None:
+        """Keep the canonical titles current with the shared cluster log."""
+        while True:
+            try:
+                await self._clusters.refresh(redis)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("WebSocket cluster sync failed", error=str(e))
+            await asyncio.sleep(CLUSTER_SYNC_INTERVAL)
+
+    async def _heartbeat(self) -> None:
+        """Send a heartbeat to every client every 30 seconds."""
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            self.manager.broadcast_all(
+                orjson.dumps({"type": "heartbeat", "connections": self.manager.count}).decode()
+            )
+
+
 manager = ConnectionManager()
+hub = PubSubHub(manager)
 
 
 @router.websocket("/ws/odds")
@@ -53,85 +386,51 @@ async def websocket_odds(ws: WebSocket):
     Client can send:
         {"action": "subscribe", "channels": ["odds:updates", "arb:alerts"]}
         {"action": "unsubscribe", "channels": ["odds:updates"]}
+        {"action": "subscribe", "categories": ["politics"], "markets": ["<market_title>"],
+         "platforms": ["kalshi"], "min_profit": 0.01}
+        {"action": "unsubscribe", "markets": ["<market_title>"], "min_profit": true}
 
     Server pushes:
-        {"type": "odds_batch", "platform": "polymarket", "count": 50}
-        {"type": "arb_alert", "data": {...}}
+        {"type": "odds_delta", "seq": 1042, "ts": "2026-03-01T12:00:00+00:00",
+         "deltas": [["polymarket", "<market_id>", 0, 0.42, 0.42, "politics", "<market_title>"],
+                    ...]}
+        {"type": "arb_alert", "data": {...}}     (new arb, or profit/legs changed)
+        {"type": "arb_closed", "data": {"market_title": ..., "category": ..., "platforms": [...],
+                                        "closed_at": ...}}
+        {"type": "resync"}                       (updates may have been missed)
         {"type": "heartbeat", "connections": 42}
-    """
-    await manager.connect(ws)
-    logger.info("WebSocket connected", total=manager.count)
 
-    try:
-        redis = await get_redis()
-        pubsub = redis.pubsub()
-        await pubsub.subscribe("odds:updates", "arb:alerts")
+    odds_delta carries only the outcomes whose odds moved, each as
+    [platform_slug, market_id, outcome_index, price, implied_prob, category,
+    market_title]; clients patch the matching outcome of the market list
+    from GET /odds/live.  Load that list after connecting and apply deltas
+    as they arrive (values are absolute, so replaying one is harmless).
+    ``seq`` increases by one per message across all platforms: on a gap or
+    a resync, reload /odds/live.
 
-        # Run listener and heartbeat concurrently
-        listener_task = asyncio.create_task(_redis_listener(pubsub, ws))
-        heartbeat_task = asyncio.create_task(_heartbeat(ws))
-
-        try:
-            while True:
-                # Listen for client messages (subscribe/unsubscribe)
-                data = await ws.receive_text()
-                try:
-                    msg = orjson.loads(data)
-                    action = msg.get("action")
-                    channels = msg.get("channels", [])
-
-                    if action == "subscribe":
-                        manager.connections[ws].update(channels)
-                    elif action == "unsubscribe":
-                        manager.connections[ws] -= set(channels)
-                except (orjson.JSONDecodeError, ValueError):
-                    pass
+    Topic filters narrow what a client receives.  ``markets`` are canonical
+    market titles as returned by /odds/live.  Kinds combine with AND and
+    values within a kind with OR; ``min_profit`` applies to arb alerts.  A
+    filtered client is sent only the delta rows that match, so its ``seq``
+    skips messages with none: such clients resync only on "resync".
 
-        except WebSocketDisconnect:
-            pass
-        finally:
-            listener_task.cancel()
-            heartbeat_task.cancel()
-            await pubsub.unsubscribe()
+    A client that falls too far behind is closed with code 1013.
+    """
+    client = await manager.connect(ws)
+    logger.info("WebSocket connected", total=manager.count)
 
+    try:
+        while True:
+            # Listen for client messages (subscribe/unsubscribe)
+            data = await ws.receive_text()
+            try:
+                manager.update(client, orjson.loads(data))
+            except (orjson.JSONDecodeError, ValueError, TypeError, AttributeError):
+                pass
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
         logger.error("WebSocket error", error=str(e))
     finally:
         manager.disconnect(ws)
         logger.info("WebSocket disconnected", total=manager.count)
-
-
-async def _redis_listener(pubsub, ws: WebSocket):
-    """Forward Redis pub/sub messages to the WebSocket client."""
-    try:
-        while True:
-            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-            if message and message.get("type") == "message":
-                channel = message.get("channel", "")
-                data = message.get("data", "")
-                if isinstance(data, bytes):
-                    data = data.decode()
-
-                # Only send if client is subscribed to this channel
-                if channel in manager.connections.get(ws, set()):
-                    await ws.send_text(data)
-            else:
-                await asyncio.sleep(0.1)
-    except asyncio.CancelledError:
-        pass
-    except Exception:
-        pass
-
-
-async def _heartbeat(ws: WebSocket):
-    """Send heartbeat every 30 seconds."""
-    try:
-        while True:
-            await asyncio.sleep(30)
-            await ws.send_text(
-                orjson.dumps({"type": "heartbeat", "connections": manager.count}).decode()
-            )
-    except asyncio.CancelledError:
-        pass
-    except Exception:
-        pass
@@ -0,0 +1,185 @@
+"""Title clusters shared between processes through Redis.
+
+The API and the arb engine must agree on which titles describe the same
+event.  Each process keeps a local ``TitleClusterer`` and syncs it with two
+Redis structures:
+
+  clusters:map   hash  title -> canonical title (HSETNX, first writer wins)
+  clusters:log   stream of assignments, replayed incrementally by every process
+
+When the shared map outgrows ``MAX_SHARED_TITLES`` it is reset and the
+generation counter bumped, which makes every process start a fresh clusterer.
+"""
+import asyncio
+
+import structlog
+
+from src.arbengine.matcher import VECTORIZE_MIN_BATCH, TitleClusterer
+
+logger = structlog.get_logger()
+
+CLUSTER_MAP_KEY = "clusters:map"
+CLUSTER_LOG_KEY = "clusters:log"
+CLUSTER_GEN_KEY = "clusters:gen"
+
+MAX_SHARED_TITLES = 200_000
+# Never trim log entries that are still needed to rebuild the map
+LOG_MAXLEN = MAX_SHARED_TITLES * 2
+_SYNC_BATCH = 5000
+
+
+def _assign_copy(
+    clusterer: TitleClusterer,
+    titles: list[str],
+    categories: dict[str, str],
+    platforms: dict[str, str],
+) -> tuple[TitleClusterer, dict[str, str]]:
+    working = clusterer.copy()
+    return working, working.assign_many(titles, categories, platforms)
+
+
+class ClusterStore:
+    """Local title clusterer kept in step with the shared Redis assignments."""
+
+    def __init__(self):
+        self.clusterer = TitleClusterer()
+        self._generation: str | None = None
+        self._last_id = "0-0"
+        self._lock = asyncio.Lock()
+
+    def __contains__(self, title: str) -> bool:
+        return title in self.clusterer
+
+    def canonical(self, title: str) -> str:
+        """Canonical title for a known title (the title itself if unknown)."""
+        return self.clusterer.get(title) or title
+
+    async def refresh(self, redis) -> None:
+        """Sync with the shared assignments, for processes that only read titles."""
+        async with self._lock:
+            await self.sync(redis)
+
+    async def sync(self, redis) -> None:
+        """Replay assignments other processes have made since the last sync."""
+        generation = await redis.get(CLUSTER_GEN_KEY)
+        if generation != self._generation:
+            self.clusterer = TitleClusterer()
+            self._generation = generation
+            self._last_id = "0-0"
+
+        while True:
+            entries = await redis.xrange(
+                CLUSTER_LOG_KEY, min=f"({self._last_id}", count=_SYNC_BATCH
+            )
+            for entry_id, fields in entries:
+                self.clusterer.adopt(
+                    fields.get("title", ""),
+                    fields.get("canonical", ""),
+                    fields.get("category", ""),
+                    fields.get("platform", ""),
+                )
+                self._last_id = entry_id
+            if len(entries) < _SYNC_BATCH:
+                break
+
+    async def resolve(
+        self,
+        redis,
+        titles: list[str],
+        categories: dict[str, str] | None = None,
+        platforms: dict[str, str] | None = None,
+    ) -> dict[str, str]:
+        """Return {title: canonical_title}, clustering and sharing unseen titles."""
+        categories = categories or {}
+        platforms = platforms or {}
+
+        async with self._lock:
+            await self.sync(redis)
+
+            new_titles = list(dict.fromkeys(t for t in titles if t not in self.clusterer))
+            if new_titles:
+                if len(new_titles) >= VECTORIZE_MIN_BATCH:
+                    # Large batches run cdist, which releases the GIL — keep
+                    # the event loop free while it works.  The thread assigns
+                    # into a copy (canonical() keeps reading this one on the
+                    # loop) which replaces it once done.
+                    self.clusterer, assigned = await asyncio.to_thread(
+                        _assign_copy, self.clusterer, new_titles, categories, platforms
+                    )
+                else:
+                    assigned = self.clusterer.assign_many(new_titles, categories, platforms)
+                await self._share(redis, new_titles, assigned, categories, platforms)
+                logger.info(
+                    "Clustered new titles",
+                    new=len(new_titles),
+                    titles=len(self.clusterer),
+                    clusters=self.clusterer.cluster_count,
+                )
+
+            return {t: self.canonical(t) for t in titles}
+
+    async def _share(
+        self,
+        redis,
+        titles: list[str],
+        assigned: dict[str, str],
+        categories: dict[str, str],
+        platforms: dict[str, str],
+    ) -> None:
+        """Publish local assignments; adopt the winner where another process got there first.
+
+        A title that lost the race after starting a local cluster moves the
+        whole cluster to the winner, titles from this batch included, so
+        nothing stays grouped under a canonical other processes don't use.
+        """
+        pipe = redis.pipeline()
+        for title in titles:
+            pipe.hsetnx(CLUSTER_MAP_KEY, title, assigned[title])
+        won = await pipe.execute()
+
+        lost = [t for t, ok in zip(titles, won) if not ok]
+        if lost:
+            moves: dict[str, str] = {}
+            for title, canonical in zip(lost, await redis.hmget(CLUSTER_MAP_KEY, lost)):
+                if not canonical:
+                    continue
+                if assigned[title] == title:
+                    moves[title] = canonical  # the local cluster it founded follows it
+                else:
+                    self.clusterer.adopt(
+                        title, canonical, categories.get(title, ""), platforms.get(title, "")
+                    )
+            self.clusterer.merge(moves)
+
+        pipe = redis.pipeline()
+        for title, ok in zip(titles, won):
+            if not ok:
+                continue
+            canonical = self.canonical(title)
+            if canonical != assigned[title]:
+                # Its cluster was merged into another process's above
+                pipe.hset(CLUSTER_MAP_KEY, title, canonical)
+            pipe.xadd(
+                CLUSTER_LOG_KEY,
+                {
+                    "title": title,
+                    "canonical": canonical,
+                    "category": categories.get(title, ""),
+                    "platform": platforms.get(title, ""),
+                },
+                maxlen=LOG_MAXLEN,
+                approximate=True,
+            )
+        pipe.hlen(CLUSTER_MAP_KEY)
+        map_size = (await pipe.execute())[-1]
+
+        if map_size > MAX_SHARED_TITLES:
+            await self._reset(redis)
+
+    async def _reset(self, redis) -> None:
+        """Drop the shared clusters; every process rebuilds from its live titles."""
+        pipe = redis.pipeline()
+        pipe.delete(CLUSTER_MAP_KEY, CLUSTER_LOG_KEY)
+        pipe.incr(CLUSTER_GEN_KEY)
+        await pipe.execute()
+        logger.info("Shared title clusters reset", max_titles=MAX_SHARED_TITLES)
@@ -2,6 +2,7 @@
 An arbitrage exists when the sum of the best implied probabilities
 across all outcomes of a matched market is less than 1.0.
 """
+from collections.abc import Iterator, Mapping
 from dataclasses import dataclass, field
 
 import structlog
@@ -9,7 +10,7 @@ import structlog
 logger = structlog.get_logger()
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ArbLegData:
     platform: str
     market_id: str
@@ -18,7 +19,54 @@ class ArbLegData:
     implied_prob: float
 
 
-@dataclass
+class OutcomeBook:
+    """Latest leg per platform for one outcome of a market, cheapest leg cached.
+
+    Updating a leg is O(1); the cached best is only dropped (and recomputed on
+    the next ``best()``) when the best platform's own price gets worse.  Ties
+    resolve to the leg updated least recently, as ``min`` over the legs in
+    update order would.
+    """
+
+    __slots__ = ("_legs", "_best")
+
+    def __init__(self):
+        self._legs: dict[str, ArbLegData] = {}
+        self._best: ArbLegData | None = None
+
+    def __len__(self) -> int:
+        return len(self._legs)
+
+    def __contains__(self, platform: str) -> bool:
+        return platform in self._legs
+
+    def __iter__(self) -> Iterator[ArbLegData]:
+        return iter(self._legs.values())
+
+    def update(self, leg: ArbLegData) -> None:
+        """Replace the platform's leg with a newer one."""
+        # Re-insert so iteration order stays the update order
+        self._legs.pop(leg.platform, None)
+        self._legs[leg.platform] = leg
+
+        best = self._best
+        if len(self._legs) == 1:
+            self._best = leg
+        elif best is None:
+            return
+        elif leg.implied_prob < best.implied_prob:
+            self._best = leg
+        elif leg.platform == best.platform:
+            self._best = None  # the best got worse — recompute lazily
+
+    def best(self) -> ArbLegData | None:
+        """Leg with the lowest implied probability (best price to buy)."""
+        if self._best is None and self._legs:
+            self._best = min(self._legs.values(), key=lambda x: x.implied_prob)
+        return self._best
+
+
+@dataclass(slots=True)
 class ArbResult:
     market_title: str
     category: str
@@ -30,7 +78,7 @@ class ArbResult:
 def detect_arbitrage(
     market_title: str,
     category: str,
-    odds_by_outcome: dict[str, list[ArbLegData]],
+    odds_by_outcome: Mapping[str, OutcomeBook | list[ArbLegData]],
     min_profit: float = 0.001,  # Minimum 0.1% profit to report
 ) -> ArbResult | None:
     """
@@ -41,6 +89,8 @@ def detect_arbitrage(
         "No": [ArbLegData(platform="polymarket", ...), ArbLegData(platform="kalshi", ...)],
     }
 
+    Each outcome may also be an ``OutcomeBook``, whose cached best leg is used.
+
     Returns ArbResult if profitable, None otherwise.
     """
     if len(odds_by_outcome) < 2:
@@ -50,12 +100,17 @@ def detect_arbitrage(
     total_implied = 0.0
 
     for outcome_name, platform_odds in odds_by_outcome.items():
-        if not platform_odds:
-            return None  # Missing data for an outcome
-
         # Find the LOWEST implied probability for this outcome across all platforms
         # (lowest probability = best price to buy that outcome)
-        best = min(platform_odds, key=lambda x: x.implied_prob)
+        if isinstance(platform_odds, OutcomeBook):
+            best = platform_odds.best()
+        elif platform_odds:
+            best = min(platform_odds, key=lambda x: x.implied_prob)
+        else:
+            best = None
+
+        if best is None:
+            return None  # Missing data for an outcome
 
         if best.implied_prob <= 0 or best.implied_prob >= 1.0:
             return None  # Invalid data
@@ -1,23 +1,77 @@
 """Main arbitrage engine — consumes odds from Redis Stream, detects arbs, writes to DB."""
 import asyncio
+import hashlib
+import time
 from collections import defaultdict
 from datetime import datetime, timezone
 
 import orjson
 import structlog
 
-from src.arbengine.detector import ArbLegData, ArbResult, detect_arbitrage
-from src.arbengine.matcher import cluster_titles
+from src.arbengine.cluster_store import ClusterStore
+from src.arbengine.detector import ArbLegData, ArbResult, OutcomeBook, detect_arbitrage
+from src.arbengine.sharding import (
+    consumer_name,
+    eligible_shards,
+    lease_key,
+    shard_of,
+    shard_stream,
+)
+from src.services.live_store import decode_live_market, live_keys, parse_live_key
 
 logger = structlog.get_logger()
 
-STREAM_KEY = "odds:normalized"
 CONSUMER_GROUP = "arbengine"
-CONSUMER_NAME = "arb-worker-1"
 ARB_ALERT_CHANNEL = "arb:alerts"
 
-# Buffer odds for grouping by market before detection
-DETECTION_INTERVAL = 5.0  # Run detection every 5 seconds
+# Markets touched by incoming odds are re-evaluated in micro-batches
+DETECTION_BATCH_DELAY = 0.25  # seconds to let a burst of updates coalesce
+# An arb already published is republished only if its profit moves this much
+# (absolute, 0.001 = 0.1 percentage points) or its legs change
+ARB_CHANGE_THRESHOLD = 0.001
+ARB_TTL = 300  # arb:opp:* and arb:active lifetime without a refresh
+ARB_REFRESH_INTERVAL = 60.0  # keep published arbs alive while they last
+
+# XREADGROUP count adapts to load: doubled while reads come back full,
+# halved once they drain well below it
+READ_COUNT_MIN = 100
+READ_COUNT_MAX = 5000
+
+# Consumer throughput and lag, one JSON field per consumer
+METRICS_KEY = "arbengine:metrics"
+METRICS_INTERVAL = 10.0
+METRICS_TTL = 60
+
+# Entries pending this long belong to a replica that stopped — take them over
+RECLAIM_INTERVAL = 30.0
+RECLAIM_MIN_IDLE_MS = 60_000
+RECLAIM_BATCH = 1000
+# Consumers idle this long with nothing pending are removed from the group
+DEAD_CONSUMER_IDLE_MS = 15 * 60_000
+
+# Shard leases (see src/arbengine/sharding.py): renewed every LEASE_INTERVAL,
+# lost to another replica LEASE_TTL_MS after the owner stops renewing
+LEASE_TTL_MS = 15_000
+LEASE_INTERVAL = 5.0
+
+# The publisher streams only outcomes that changed (see PublishCache), so a
+# shard's new owner first buffers its markets' current odds from the live
+# cache, reading this many market hashes per round-trip
+SEED_BATCH = 500
+
+# Extend / release a lease only while this consumer still holds it
+_RENEW_LEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_LEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
 
 
 class ArbEngine:
@@ -25,53 +79,176 @@ class ArbEngine:
         self.redis = redis_pool
         self.config = config
         self._running = False
-        # Buffer: {market_title: {outcome_name: [ArbLegData, ...]}}
-        self._odds_buffer: dict[str, dict[str, list[ArbLegData]]] = defaultdict(
-            lambda: defaultdict(list)
+        # Buffer: {market_title: {outcome_name: OutcomeBook}}
+        self._odds_buffer: dict[str, dict[str, OutcomeBook]] = defaultdict(
+            lambda: defaultdict(OutcomeBook)
         )
         self._market_categories: dict[str, str] = {}
-        # Fuzzy title clustering: raw_title -> canonical_title
-        self._title_map: dict[str, str] = {}
-        self._recluster_counter = 0
-        self._RECLUSTER_INTERVAL = 60  # recluster titles every N detection cycles
+        # Canonical markets with new odds since their last evaluation
+        self._dirty: set[str] = set()
+        self._dirty_event = asyncio.Event()
+        # Arbs currently published by this engine, by canonical market
+        self._published: dict[str, ArbResult] = {}
+        # Fuzzy title clustering shared with the API: raw_title -> canonical_title
+        self._clusters = ClusterStore()
+        # Shards this replica may consume, and those whose lease it holds
+        self._shard_count = max(config.arb_shard_count, 1)
+        self._eligible = eligible_shards(config)
+        self._owned: dict[int, str] = {}  # shard -> stream
+        self._consumer = consumer_name()
+        self._renew_lease = redis_pool.register_script(_RENEW_LEASE)
+        self._release_lease = redis_pool.register_script(_RELEASE_LEASE)
+        # Stream consumption stats
+        self._read_count = READ_COUNT_MIN
+        self._consumed = 0
+        self._last_batch = 0
+
+    @property
+    def _streams(self) -> list[str]:
+        return list(self._owned.values())
 
     async def run(self) -> None:
         """Main loop: consume stream + periodic detection."""
-        logger.info("Arbitrage engine starting")
-
-        # Create consumer group if it doesn't exist
-        try:
-            await self.redis.xgroup_create(STREAM_KEY, CONSUMER_GROUP, id="0", mkstream=True)
-        except Exception:
-            pass  # Group already exists
+        logger.info("Arbitrage engine starting", consumer=self._consumer, shards=self._eligible)
 
         self._running = True
+        await self._renew_leases()
 
-        # Run consumer and detector concurrently
-        await asyncio.gather(
-            self._consume_stream(),
-            self._detection_loop(),
-        )
+        # Run leases, consumer, reclaimer, detector and metrics reporter concurrently
+        try:
+            await asyncio.gather(
+                self._lease_loop(),
+                self._consume_stream(),
+                self._reclaim_loop(),
+                self._detection_loop(),
+                self._metrics_loop(),
+            )
+        finally:
+            await self._release_leases()
+
+    async def _lease_loop(self) -> None:
+        """Keep this replica's shard leases and pick up shards left without an owner."""
+        while self._running:
+            try:
+                await asyncio.sleep(LEASE_INTERVAL)
+                await self._renew_leases()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.warning("Shard lease error", error=str(e))
+
+    async def _renew_leases(self) -> None:
+        taken: list[int] = []
+        for shard in self._eligible:
+            key = lease_key(shard)
+            if shard in self._owned:
+                if not await self._renew_lease(keys=[key], args=[self._consumer, LEASE_TTL_MS]):
+                    self._drop_shard(shard)
+            elif await self.redis.set(key, self._consumer, nx=True, px=LEASE_TTL_MS):
+                taken.append(shard)
+        if taken:
+            await self._take_shards(taken)
+
+    async def _take_shards(self, shards: list[int]) -> None:
+        """Start consuming shards whose leases this replica just acquired."""
+        for shard in shards:
+            stream = shard_stream(shard, self._shard_count)
+            try:
+                await self.redis.xgroup_create(stream, CONSUMER_GROUP, id="0", mkstream=True)
+            except Exception:
+                pass  # Group already exists
+            self._owned[shard] = stream
+        seeded = await self._seed_from_live(set(shards))
+        for shard in shards:
+            # The previous owner's lease has lapsed: its pending entries are
+            # ours now.  They are older than the live cache, so only fill gaps.
+            await self._reclaim(self._owned[shard], min_idle_ms=0)
+        logger.info("Took arb shards", shards=shards, seeded=seeded, consumer=self._consumer)
+
+    async def _seed_from_live(self, shards: set[int]) -> int:
+        """Buffer the cached odds of live markets routed to ``shards``.
+
+        Quiet markets are otherwise absent until the publisher next rewrites
+        them in full.  Returns the number of outcomes buffered.
+        """
+        keys = await live_keys(self.redis)
+        seeded = 0
+        for start in range(0, len(keys), SEED_BATCH):
+            chunk = keys[start:start + SEED_BATCH]
+            pipe = self.redis.pipeline()
+            for key in chunk:
+                pipe.hgetall(key)
+            columns: dict[str, list] = {name: [] for name in _ROW_FIELDS}
+            for key, data in zip(chunk, await pipe.execute()):
+                market = decode_live_market(data)
+                if not market:
+                    continue
+                _, market_id = parse_live_key(key)
+                for outcome in market["outcomes"]:
+                    columns["market_title"].append(market["market_title"])
+                    columns["outcome_name"].append(outcome["outcome_name"])
+                    columns["platform"].append(market["platform"])
+                    columns["market_id"].append(market_id)
+                    columns["category"].append(market["category"])
+                    columns["price"].append(outcome["price"])
+                    columns["implied_prob"].append(outcome["implied_prob"])
+            await self._resolve_titles([columns])
+            owned = [
+                i for i, title in enumerate(columns["market_title"])
+                if shard_of(self._clusters.canonical(title), self._shard_count) in shards
+            ]
+            self._process_columns(
+                {name: [values[i] for i in owned] for name, values in columns.items()},
+                replace=False,
+            )
+            seeded += len(owned)
+        return seeded
+
+    def _drop_shard(self, shard: int) -> None:
+        """Stop consuming a shard whose lease went to another replica."""
+        del self._owned[shard]
+        # Its markets are evaluated (and their arbs published) by the new owner
+        for market_title in [
+            t for t in self._odds_buffer if shard_of(t, self._shard_count) == shard
+        ]:
+            del self._odds_buffer[market_title]
+            self._market_categories.pop(market_title, None)
+            self._published.pop(market_title, None)
+            self._dirty.discard(market_title)
+        logger.warning("Lost arb shard lease", shard=shard, consumer=self._consumer)
+
+    async def _release_leases(self) -> None:
+        """Hand owned shards over at once on shutdown instead of at lease expiry."""
+        for shard in list(self._owned):
+            try:
+                await self._release_lease(keys=[lease_key(shard)], args=[self._consumer])
+            except Exception as e:
+                logger.warning("Shard lease release failed", shard=shard, error=str(e))
+        self._owned.clear()
 
     async def _consume_stream(self) -> None:
         """Read odds updates from Redis Stream and buffer them."""
         while self._running:
             try:
+                if not self._owned:
+                    # Standby: every eligible shard is leased to another replica
+                    await asyncio.sleep(LEASE_INTERVAL)
+                    continue
                 messages = await self.redis.xreadgroup(
                     CONSUMER_GROUP,
-                    CONSUMER_NAME,
-                    {STREAM_KEY: ">"},
-                    count=100,
+                    self._consumer,
+                    {stream: ">" for stream in self._streams},
+                    count=self._read_count,
                     block=2000,
                 )
 
                 if not messages:
                     continue
 
-                for stream_name, entries in messages:
-                    for msg_id, data in entries:
-                        self._process_message(data)
-                        await self.redis.xack(STREAM_KEY, CONSUMER_GROUP, msg_id)
+                received = await self._handle_batch(messages)
+                self._consumed += received
+                self._last_batch = received
+                self._adapt_read_count(received)
 
             except asyncio.CancelledError:
                 break
@@ -79,104 +256,257 @@ class ArbEngine:
                 logger.error("Stream consume error", error=str(e))
                 await asyncio.sleep(1)
 
-    def _process_message(self, data: dict) -> None:
-        """Buffer an odds update for the next detection cycle."""
-        raw_title = data.get("market_title", "")
-        outcome_name = data.get("outcome_name", "")
-        platform = data.get("platform", "")
-        market_id = data.get("market_id", "")
-        category = data.get("category", "")
+    async def _handle_batch(self, messages: list, replace: bool = True) -> int:
+        """Buffer a batch of [(stream, [(id, data), ...]), ...] and ack it.
+
+        Returns the number of entries handled.
+        """
+        decoded = [
+            (stream, [(msg_id, _entry_columns(data)) for msg_id, data in entries])
+            for stream, entries in messages
+        ]
+        await self._resolve_titles(
+            [columns for _, entries in decoded for _, columns in entries if columns]
+        )
+        pipe = self.redis.pipeline()
+        received = 0
+        for stream, entries in decoded:
+            if not entries:
+                continue
+            for _, columns in entries:
+                if columns:
+                    self._process_columns(columns, replace=replace)
+            # One multi-ID XACK per stream for the whole batch
+            pipe.xack(stream, CONSUMER_GROUP, *(msg_id for msg_id, _ in entries))
+            received += len(entries)
+        if received:
+            await pipe.execute()
+        return received
+
+    async def _reclaim_loop(self) -> None:
+        """Take over entries left pending by stopped replicas."""
+        while self._running:
+            try:
+                for stream in self._streams:
+                    await self._reclaim(stream)
+                await asyncio.sleep(RECLAIM_INTERVAL)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.warning("Stream reclaim error", error=str(e))
+                await asyncio.sleep(RECLAIM_INTERVAL)
+
+    async def _reclaim(self, stream: str, min_idle_ms: int = RECLAIM_MIN_IDLE_MS) -> None:
+        start_id = "0-0"
+        reclaimed = 0
+        while True:
+            result = await self.redis.xautoclaim(
+                stream,
+                CONSUMER_GROUP,
+                self._consumer,
+                min_idle_time=min_idle_ms,
+                start_id=start_id,
+                count=RECLAIM_BATCH,
+            )
+            start_id, entries = result[0], result[1]
+            # Reclaimed prices are at least a minute old: only fill gaps,
+            # never overwrite newer legs already buffered
+            reclaimed += await self._handle_batch([(stream, entries)], replace=False)
+            if start_id == "0-0":
+                break
 
-        if not all([raw_title, outcome_name, platform]):
-            return
+        # Forget consumers that have been gone a long time and own nothing
+        for consumer in await self.redis.xinfo_consumers(stream, CONSUMER_GROUP):
+            if (
+                consumer["name"] != self._consumer
+                and consumer["pending"] == 0
+                and consumer["idle"] > DEAD_CONSUMER_IDLE_MS
+            ):
+                await self.redis.xgroup_delconsumer(stream, CONSUMER_GROUP, consumer["name"])
+
+        if reclaimed:
+            logger.info("Reclaimed pending stream entries", stream=stream, count=reclaimed)
+
+    def _adapt_read_count(self, received: int) -> None:
+        """Grow the read size while the stream has a backlog, shrink it when idle."""
+        if received >= self._read_count:
+            self._read_count = min(self._read_count * 2, READ_COUNT_MAX)
+        elif received < self._read_count // 4:
+            self._read_count = max(self._read_count // 2, READ_COUNT_MIN)
+
+    async def _metrics_loop(self) -> None:
+        """Periodically record throughput and consumer-group lag in Redis."""
+        last_consumed = self._consumed
+        last_time = time.monotonic()
+        while self._running:
+            try:
+                await asyncio.sleep(METRICS_INTERVAL)
+                now = time.monotonic()
+                rate = (self._consumed - last_consumed) / (now - last_time)
+                last_consumed, last_time = self._consumed, now
+                await self._report_metrics(rate)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.warning("Metrics report error", error=str(e))
 
-        try:
-            implied_prob = float(data.get("implied_prob", 0))
-            price = float(data.get("price", 0))
-        except (ValueError, TypeError):
-            return
+    async def _report_metrics(self, rate: float) -> None:
+        pipe = self.redis.pipeline()
+        for stream in self._streams:
+            pipe.xinfo_groups(stream)
+        groups = [
+            g for stream_groups in await pipe.execute()
+            for g in stream_groups if g["name"] == CONSUMER_GROUP
+        ]
+        lags = [g.get("lag") for g in groups]
+        metrics = {
+            "streams": self._streams,
+            "messages_per_sec": round(rate, 1),
+            "consumed": self._consumed,
+            "last_batch": self._last_batch,
+            "read_count": self._read_count,
+            # entries not yet delivered (Redis 7+)
+            "lag": None if None in lags else sum(lags),
+            # delivered but not acked
+            "pending": sum(g.get("pending") or 0 for g in groups),
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+        pipe = self.redis.pipeline()
+        pipe.hset(METRICS_KEY, self._consumer, orjson.dumps(metrics).decode())
+        pipe.expire(METRICS_KEY, METRICS_TTL)
+        await pipe.execute()
+        if metrics["lag"]:
+            logger.info("Arb stream consumer", **metrics)
+
+    async def _resolve_titles(self, batch: list[dict[str, list]]) -> None:
+        """Cluster any titles in the batch that have not been seen before."""
+        categories: dict[str, str] = {}
+        platforms: dict[str, str] = {}
+        for columns in batch:
+            for title, category, platform in zip(
+                columns["market_title"], columns["category"], columns["platform"]
+            ):
+                if title and title not in self._clusters and title not in categories:
+                    categories[title] = category
+                    platforms[title] = platform
+        if categories:
+            await self._clusters.resolve(self.redis, list(categories), categories, platforms)
+
+    def _process_columns(self, columns: dict[str, list], replace: bool = True) -> None:
+        """Buffer a stream entry's odds updates for the next detection cycle.
+
+        With ``replace=False`` an update is dropped if the platform already
+        has a leg buffered for that outcome.
+        """
+        for raw_title, outcome_name, platform, market_id, category, price, implied_prob in zip(
+            columns["market_title"],
+            columns["outcome_name"],
+            columns["platform"],
+            columns["market_id"],
+            columns["category"],
+            columns["price"],
+            columns["implied_prob"],
+        ):
+            if not all([raw_title, outcome_name, platform]):
+                continue
 
-        if implied_prob <= 0 or implied_prob >= 1.0:
-            return
+            try:
+                implied_prob = float(implied_prob)
+                price = float(price)
+            except (ValueError, TypeError):
+                continue
 
-        # Resolve to canonical title via fuzzy matching
-        canonical = self._title_map.get(raw_title, raw_title)
-        self._market_categories[canonical] = category
+            if implied_prob <= 0 or implied_prob >= 1.0:
+                continue
 
-        leg = ArbLegData(
-            platform=platform,
-            market_id=market_id,
-            outcome_name=outcome_name,
-            price=price,
-            implied_prob=implied_prob,
-        )
+            # Resolve to canonical title via fuzzy matching
+            canonical = self._clusters.canonical(raw_title)
+            self._market_categories[canonical] = category
+            self._dirty.add(canonical)
 
-        # Keep only the latest odds per platform per outcome
-        outcome_odds = self._odds_buffer[canonical][outcome_name]
-        self._odds_buffer[canonical][outcome_name] = [
-            o for o in outcome_odds if o.platform != platform
-        ] + [leg]
+            # Keep only the latest odds per platform per outcome
+            book = self._odds_buffer[canonical][outcome_name]
+            if not replace and platform in book:
+                continue
+            book.update(
+                ArbLegData(
+                    platform=platform,
+                    market_id=market_id,
+                    outcome_name=outcome_name,
+                    price=price,
+                    implied_prob=implied_prob,
+                )
+            )
+        if self._dirty:
+            self._dirty_event.set()
 
     async def _detection_loop(self) -> None:
-        """Periodically scan the buffer for arbitrage opportunities."""
+        """Re-evaluate markets as their odds change and keep live arbs fresh."""
+        last_refresh = time.monotonic()
         while self._running:
             try:
-                await asyncio.sleep(DETECTION_INTERVAL)
+                try:
+                    await asyncio.wait_for(self._dirty_event.wait(), ARB_REFRESH_INTERVAL)
+                    # Let the rest of an ingest burst land before evaluating
+                    await asyncio.sleep(DETECTION_BATCH_DELAY)
+                except asyncio.TimeoutError:
+                    pass
                 await self._run_detection()
+                if time.monotonic() - last_refresh >= ARB_REFRESH_INTERVAL:
+                    await self._refresh_published()
+                    last_refresh = time.monotonic()
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error("Detection loop error", error=str(e))
 
     async def _run_detection(self) -> None:
-        """Scan all buffered markets for arbitrage opportunities."""
-        # Periodically recluster titles for fuzzy cross-platform matching
-        self._recluster_counter += 1
-        if self._recluster_counter >= self._RECLUSTER_INTERVAL:
-            self._recluster_counter = 0
-            all_titles = list(self._odds_buffer.keys())
-            new_map = cluster_titles(all_titles, self._market_categories)
-            if new_map != self._title_map:
-                # Merge buffers for newly-matched titles
-                merged_count = 0
-                for raw, canonical in new_map.items():
-                    if raw != canonical and raw in self._odds_buffer:
-                        for outcome, legs in self._odds_buffer[raw].items():
-                            existing = self._odds_buffer[canonical][outcome]
-                            seen_platforms = {o.platform for o in existing}
-                            for leg in legs:
-                                if leg.platform not in seen_platforms:
-                                    existing.append(leg)
-                                    seen_platforms.add(leg.platform)
-                            self._odds_buffer[canonical][outcome] = existing
-                        del self._odds_buffer[raw]
-                        merged_count += 1
-                self._title_map = new_map
-                if merged_count:
-                    logger.info("Fuzzy title recluster", merged=merged_count, total=len(all_titles))
-
-        arb_count = 0
-
-        for market_title, odds_by_outcome in self._odds_buffer.items():
-            # Need odds from at least 2 platforms for any outcome to have an arb
-            has_multi_platform = any(
-                len(legs) >= 2 for legs in odds_by_outcome.values()
-            )
-            if not has_multi_platform:
-                continue
-
-            category = self._market_categories.get(market_title, "")
-            result = detect_arbitrage(market_title, category, dict(odds_by_outcome))
+        """Evaluate the markets marked dirty since the last run.
 
-            if result:
-                arb_count += 1
-                await self._publish_arb(result)
+        Publishes arbs that appeared or changed beyond ``ARB_CHANGE_THRESHOLD``
+        and retracts those that disappeared; unchanged arbs cause no writes.
+        """
+        self._dirty_event.clear()
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
 
-        if arb_count > 0:
-            logger.info("Arbitrage opportunities detected", count=arb_count)
+        pipe = self.redis.pipeline()
+        opened = changed = closed = 0
+        for market_title in dirty:
+            odds_by_outcome = self._odds_buffer.get(market_title, {})
+            result = None
+            # Need odds from at least 2 platforms for any outcome to have an arb
+            if any(len(legs) >= 2 for legs in odds_by_outcome.values()):
+                category = self._market_categories.get(market_title, "")
+                result = detect_arbitrage(market_title, category, odds_by_outcome)
+
+            previous = self._published.get(market_title)
+            if result is None:
+                if previous is not None:
+                    del self._published[market_title]
+                    self._queue_retract(pipe, previous)
+                    closed += 1
+            elif previous is None or _arb_changed(previous, result):
+                self._published[market_title] = result
+                self._queue_publish(pipe, result)
+                if previous is None:
+                    opened += 1
+                else:
+                    changed += 1
+
+        if opened or changed or closed:
+            await pipe.execute()
+            logger.info(
+                "Arbitrage opportunities updated",
+                opened=opened,
+                changed=changed,
+                closed=closed,
+                active=len(self._published),
+            )
 
-    async def _publish_arb(self, arb: ArbResult) -> None:
-        """Publish arb alert to Redis pub/sub + persist to Redis sorted set."""
+    def _queue_publish(self, pipe, arb: ArbResult) -> None:
+        """Queue the pub/sub alert and Redis records for a new or changed arb."""
         now = datetime.now(timezone.utc)
         arb_data = {
             "market_title": arb.market_title,
@@ -196,32 +526,79 @@ class ArbEngine:
             "detected_at": now.isoformat(),
         }
 
-        pipe = self.redis.pipeline()
-
         # 1) Pub/sub alert for WebSocket clients
         alert = {"type": "arb_alert", "data": arb_data}
         pipe.publish(ARB_ALERT_CHANNEL, orjson.dumps(alert).decode())
 
         # 2) Persist to Redis hash for REST API queries (key by market title hash)
-        import hashlib
-        arb_key = hashlib.md5(arb.market_title.encode()).hexdigest()[:12]
+        arb_key = _arb_key(arb.market_title)
         pipe.hset(f"arb:opp:{arb_key}", mapping={
             "data": orjson.dumps(arb_data).decode(),
             "profit": str(arb.expected_profit),
         })
-        pipe.expire(f"arb:opp:{arb_key}", 300)  # Expire after 5 minutes
+        pipe.expire(f"arb:opp:{arb_key}", ARB_TTL)
 
         # 3) Add to sorted set (score = profit %) for ranked queries
         pipe.zadd("arb:active", {arb_key: arb.expected_profit})
-        pipe.expire("arb:active", 300)
+        pipe.expire("arb:active", ARB_TTL)
+
+    def _queue_retract(self, pipe, arb: ArbResult) -> None:
+        """Queue removal of an arb that no longer exists."""
+        arb_key = _arb_key(arb.market_title)
+        pipe.delete(f"arb:opp:{arb_key}")
+        pipe.zrem("arb:active", arb_key)
+        closed = {
+            "type": "arb_closed",
+            "data": {
+                "market_title": arb.market_title,
+                "category": arb.category,
+                "platforms": sorted({leg.platform for leg in arb.legs}),
+                "closed_at": datetime.now(timezone.utc).isoformat(),
+            },
+        }
+        pipe.publish(ARB_ALERT_CHANNEL, orjson.dumps(closed).decode())
 
+    async def _refresh_published(self) -> None:
+        """Extend the TTL of every arb this engine still considers live."""
+        if not self._published:
+            return
+        pipe = self.redis.pipeline()
+        for market_title in self._published:
+            pipe.expire(f"arb:opp:{_arb_key(market_title)}", ARB_TTL)
+        pipe.expire("arb:active", ARB_TTL)
         await pipe.execute()
 
-        logger.info(
-            "Arb alert published",
-            market=arb.market_title,
-            profit=f"{arb.expected_profit:.2%}",
-        )
-
     def stop(self) -> None:
         self._running = False
+
+
+_ROW_FIELDS = (
+    "market_title", "outcome_name", "platform", "market_id", "category", "price", "implied_prob",
+)
+
+
+def _entry_columns(data: dict) -> dict[str, list] | None:
+    """Columns of a stream entry: a publisher chunk, or one legacy per-outcome entry."""
+    if not data:
+        return None
+    if "columns" in data:
+        try:
+            return orjson.loads(data["columns"])
+        except orjson.JSONDecodeError:
+            logger.warning("Dropping malformed odds stream entry")
+            return None
+    # Entries written one outcome at a time before the columnar format
+    return {name: [data.get(name, "")] for name in _ROW_FIELDS}
+
+
+def _arb_key(market_title: str) -> str:
+    return hashlib.md5(market_title.encode()).hexdigest()[:12]
+
+
+def _arb_changed(previous: ArbResult, current: ArbResult) -> bool:
+    """Whether an arb moved enough to be worth republishing."""
+    if abs(current.expected_profit - previous.expected_profit) >= ARB_CHANGE_THRESHOLD:
+        return True
+    return [(leg.platform, leg.market_id, leg.outcome_name) for leg in previous.legs] != [
+        (leg.platform, leg.market_id, leg.outcome_name) for leg in current.legs
+    ]
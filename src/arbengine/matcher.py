@@ -16,11 +16,26 @@ So we use platform-aware matching:
 Semantic gates prevent matching fundamentally different questions:
   - "Will X run for president?" ≠ "Will X win the presidency?"
   - "Which party will win?" ≠ "Will [person] win?"
+
+Clustering is incremental: ``TitleClusterer`` assigns titles as they arrive and
+only scores a new title against clusters that share one of its rarest tokens
+in the same category (an inverted index used for blocking), instead of every
+cluster seen so far.  Blocking is an approximation of the exhaustive loop: a
+title that would only match a cluster through its more common tokens starts
+a cluster of its own.  Large batches (a cold start, or the first sync of a
+new process) take a vectorised path instead: titles are normalised once and
+scored per category with ``rapidfuzz.process.cdist``, with the year, verb and
+aggregate gates applied as precomputed boolean masks.  Both paths consider
+the same candidate clusters and apply the same gates, so they assign alike.
 """
 import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
 
+import numpy as np
 import structlog
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
 
 logger = structlog.get_logger()
 
@@ -35,6 +50,21 @@ _STRIP_PATTERNS = [
 ]
 
 _YEAR_RE = re.compile(r"\b(20\d{2})\b")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Too common to narrow down candidates — never used as blocking keys
+_STOPWORDS = frozenset({
+    "a", "an", "and", "at", "be", "before", "by", "for", "in", "is", "of",
+    "on", "or", "the", "to", "who", "will", "win",
+})
+
+# Number of rarest tokens of a new title used to look up candidate clusters
+_BLOCKING_TOKENS = 4
+
+# Batches at least this large are scored with cdist instead of one by one
+VECTORIZE_MIN_BATCH = 256
+# Rows per cdist call — bounds the score matrix to _ROW_CHUNK x columns bytes
+_ROW_CHUNK = 512
 
 # --- Semantic conflict detection ---
 # If title A contains a term from one group and title B contains a term
@@ -72,6 +102,12 @@ def _years_in(text: str) -> set[str]:
     return set(_YEAR_RE.findall(text))
 
 
+def _tokens(norm: str) -> set[str]:
+    """Blocking tokens for a normalised title (falls back to all words)."""
+    words = set(_TOKEN_RE.findall(norm))
+    return (words - _STOPWORDS) or words
+
+
 def _has_semantic_conflict(norm_a: str, norm_b: str) -> bool:
     """Return True if the two normalised titles ask fundamentally
     different questions (e.g. 'run for' vs 'win')."""
@@ -95,74 +131,374 @@ def _has_semantic_conflict(norm_a: str, norm_b: str) -> bool:
     return False
 
 
-def cluster_titles(
-    titles: list[str],
-    categories: dict[str, str] | None = None,
-    platforms: dict[str, str] | None = None,
-) -> dict[str, str]:
-    """Given a list of market titles, return {original_title: canonical_title}.
-
-    Args:
-        titles: List of market titles to cluster.
-        categories: Optional {title: category} dict.  Titles in different
-                    categories are never matched.
-        platforms: Optional {title: platform_slug} dict.  Titles from the
-                   SAME platform require exact normalised match.  Titles from
-                   different platforms use fuzzy matching (threshold 82).
+@lru_cache(maxsize=1 << 17)
+def _sorted_tokens(norm: str) -> str:
+    """Token-sorted form, so cdist can use plain ``ratio`` (== token_sort_ratio)."""
+    return " ".join(sorted(norm.split()))
+
+
+@lru_cache(maxsize=1 << 17)
+def _gate_features(norm: str) -> tuple[frozenset[str], tuple[tuple[bool, bool], ...], bool]:
+    """(years, verb-group flags, aggregate flag) for a normalised title."""
+    verbs = tuple(
+        (any(p in norm for p in group_a), any(p in norm for p in group_b))
+        for group_a, group_b in _VERB_CONFLICTS
+    )
+    aggregate = any(p in norm for p in _AGGREGATE_PHRASES)
+    return frozenset(_years_in(norm)), verbs, aggregate
+
+
+class _GateMasks:
+    """Per-title gate features, broadcast into row x column boolean masks."""
+
+    def __init__(self, norms: list[str]):
+        features = [_gate_features(n) for n in norms]
+        distinct = sorted(set().union(*(years for years, _, _ in features)))
+        if len(distinct) > 64:
+            raise ValueError("too many distinct years for a uint64 mask")
+        bits = {year: 1 << i for i, year in enumerate(distinct)}
+        self.years = np.array(
+            [sum(bits[y] for y in years) for years, _, _ in features], dtype=np.uint64
+        )
+        self.verbs = [
+            (
+                np.array([verbs[k][0] for _, verbs, _ in features], dtype=bool),
+                np.array([verbs[k][1] for _, verbs, _ in features], dtype=bool),
+            )
+            for k in range(len(_VERB_CONFLICTS))
+        ]
+        self.aggregate = np.array([agg for _, _, agg in features], dtype=bool)
+
+    def years_compatible(self, rows: slice) -> np.ndarray:
+        """True where a row title and a column title share a year (or either has none)."""
+        row_years = self.years[rows, None]
+        col_years = self.years[None, :]
+        return (row_years == 0) | (col_years == 0) | ((row_years & col_years) != 0)
+
+    def semantic_compatible(self, rows: slice) -> np.ndarray:
+        """True where neither the verb nor the aggregate gate separates the titles."""
+        ok = self.aggregate[rows, None] == self.aggregate[None, :]
+        for group_a, group_b in self.verbs:
+            ok &= ~(
+                (group_a[rows, None] & group_b[None, :])
+                | (group_b[rows, None] & group_a[None, :])
+            )
+        return ok
+
+
+@dataclass(slots=True)
+class _Cluster:
+    canonical: str
+    norm: str
+    category: str
+    years: set[str]
+    platforms: set[str] = field(default_factory=set)
+    retired: bool = False  # merged into another process's cluster
+
+
+class TitleClusterer:
+    """Persistent, incremental version of ``cluster_titles``.
+
+    Titles are assigned once, in arrival order, with the same gates as a full
+    rebuild (category, year, semantic conflict, platform-aware threshold).
+    Candidate clusters come from an inverted index of ``(category, token)``
+    so each assignment costs O(candidates) instead of O(clusters); a cluster
+    sharing none of the title's rarest tokens is never considered.
     """
-    if not titles:
-        return {}
-
-    canonical_map: dict[str, str] = {}
 
-    # Cluster: [(canonical_title, norm_title, category, years, platform_set)]
-    clusters: list[tuple[str, str, str, set[str], set[str]]] = []
+    def __init__(self, threshold: int = CROSS_PLATFORM_THRESHOLD):
+        self.threshold = threshold
+        self._clusters: list[_Cluster] = []
+        self._by_canonical: dict[str, int] = {}
+        self._assigned: dict[str, str] = {}
+        self._postings: dict[tuple[str, str], list[int]] = defaultdict(list)
+        self._token_freq: Counter[str] = Counter()
+        self._categories: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._assigned)
+
+    def __contains__(self, title: str) -> bool:
+        return title in self._assigned
+
+    @property
+    def cluster_count(self) -> int:
+        return len(self._clusters)
+
+    def copy(self) -> "TitleClusterer":
+        """An independent copy that can be assigned into while this one is read."""
+        other = TitleClusterer(self.threshold)
+        other._clusters = [
+            _Cluster(c.canonical, c.norm, c.category, c.years, set(c.platforms), c.retired)
+            for c in self._clusters
+        ]
+        other._by_canonical = self._by_canonical.copy()
+        other._assigned = self._assigned.copy()
+        other._postings = defaultdict(list, {k: v.copy() for k, v in self._postings.items()})
+        other._token_freq = self._token_freq.copy()
+        other._categories = self._categories.copy()
+        return other
+
+    def get(self, title: str) -> str | None:
+        """Canonical title for an already-assigned title, else None."""
+        return self._assigned.get(title)
+
+    def assign(self, title: str, category: str = "", platform: str = "") -> str:
+        """Assign a title to an existing cluster or start a new one."""
+        canonical = self._assigned.get(title)
+        if canonical is not None:
+            return canonical
 
-    for title in titles:
         norm = _normalize_title(title)
-        cat = (categories or {}).get(title, "")
-        plat = (platforms or {}).get(title, "")
+        if not norm:
+            self._assigned[title] = title
+            return title
+
         years = _years_in(norm)
+        cid = self._find_cluster(norm, category, years, platform)
+        if cid is None:
+            cid = self._new_cluster(title, norm, category, years)
+        cluster = self._clusters[cid]
+        if platform:
+            cluster.platforms.add(platform)
+        self._assigned[title] = cluster.canonical
+        return cluster.canonical
+
+    def assign_many(
+        self,
+        titles: list[str],
+        categories: dict[str, str] | None = None,
+        platforms: dict[str, str] | None = None,
+    ) -> dict[str, str]:
+        """Assign titles in order and return {title: canonical_title}.
+
+        Batches of ``VECTORIZE_MIN_BATCH`` or more unseen titles are scored
+        with cdist when every one has a category; smaller batches, and any
+        batch with an uncategorised title (which may join a cluster of any
+        category, so arrival order across categories matters), go through the
+        blocked per-title path.
+        """
+        categories = categories or {}
+        platforms = platforms or {}
+        unseen = [t for t in dict.fromkeys(titles) if t not in self._assigned]
+        if len(unseen) >= VECTORIZE_MIN_BATCH and all(categories.get(t) for t in unseen):
+            self._assign_vectorized(unseen, categories, platforms)
+        return {
+            title: self.assign(title, categories.get(title, ""), platforms.get(title, ""))
+            for title in titles
+        }
+
+    def _assign_vectorized(
+        self,
+        titles: list[str],
+        categories: dict[str, str],
+        platforms: dict[str, str],
+    ) -> None:
+        """Assign categorised titles one category at a time.
+
+        Titles only ever join clusters of their own category (or uncategorised
+        ones that already exist), so grouping by category keeps each title's
+        candidates, and their order, the same as in arrival order.
+        """
+        by_category: dict[str, list[tuple[str, str]]] = defaultdict(list)
+        for title in titles:
+            norm = _normalize_title(title)
+            if not norm:
+                self._assigned[title] = title
+            else:
+                by_category[categories[title]].append((title, norm))
+
+        for category, rows in by_category.items():
+            self._assign_category(category, rows, platforms)
+
+    def _assign_category(
+        self,
+        category: str,
+        rows: list[tuple[str, str]],
+        platforms: dict[str, str],
+    ) -> None:
+        """Assign one category's new titles using batched score matrices.
+
+        Each chunk of titles is scored against the clusters this category may
+        join (in cluster order) plus the chunk itself, so a title can also
+        join a cluster started earlier in the same chunk.  A title then takes
+        the first of its blocking candidates (``_candidates``, as ``assign``
+        would look them up at that point) that passes the gates.
+        """
+        rep_cids = [
+            cid for cid, c in enumerate(self._clusters)
+            if c.category in (category, "") and not c.retired
+        ]
+
+        for start in range(0, len(rows), _ROW_CHUNK):
+            chunk = rows[start:start + _ROW_CHUNK]
+            chunk_norms = [norm for _, norm in chunk]
+            n_reps = len(rep_cids)
+            columns = [self._clusters[cid].norm for cid in rep_cids] + chunk_norms
+            try:
+                masks = _GateMasks(columns)
+            except ValueError:
+                for title, _ in chunk:
+                    self.assign(title, category, platforms.get(title, ""))
+                continue
 
-        if not norm:
-            canonical_map[title] = title
-            continue
+            sorted_columns = [_sorted_tokens(n) for n in columns]
+            scores = process.cdist(
+                sorted_columns[n_reps:],
+                sorted_columns,
+                scorer=fuzz.ratio,
+                score_cutoff=self.threshold,
+                dtype=np.uint8,
+                workers=-1,
+            )
+            rows_slice = slice(n_reps, None)
+            valid = (scores >= self.threshold) & masks.years_compatible(rows_slice)
+            semantic_ok = masks.semantic_compatible(rows_slice)
+
+            chunk_cids: list[int | None] = [None] * len(chunk)
+            for i, (title, norm) in enumerate(chunk):
+                platform = platforms.get(title, "")
+                cid = None
+                allowed = None
+                # Only columns before this title; ascending column = cluster order
+                for col in np.flatnonzero(valid[i, : n_reps + i]):
+                    candidate = rep_cids[col] if col < n_reps else chunk_cids[col - n_reps]
+                    if candidate is None:
+                        continue  # that title joined a cluster rather than starting one
+                    if allowed is None:
+                        allowed = set(self._candidates(norm, category))
+                    if candidate not in allowed:
+                        continue
+                    cluster = self._clusters[candidate]
+                    if platform and platform in cluster.platforms:
+                        # Same platform → require exact normalised title match
+                        if norm == cluster.norm:
+                            cid = candidate
+                            break
+                    elif semantic_ok[i, col]:
+                        cid = candidate
+                        break
+
+                if cid is None:
+                    cid = self._new_cluster(title, norm, category, _years_in(norm))
+                    chunk_cids[i] = cid
+                cluster = self._clusters[cid]
+                if platform:
+                    cluster.platforms.add(platform)
+                self._assigned[title] = cluster.canonical
+
+            rep_cids.extend(cid for cid in chunk_cids if cid is not None)
+
+    def adopt(self, title: str, canonical: str, category: str = "", platform: str = "") -> None:
+        """Record an assignment made elsewhere (e.g. by another process).
+
+        The external decision wins over any local one so every process agrees
+        on the canonical title.
+        """
+        cid = self._by_canonical.get(canonical)
+        if cid is None:
+            norm = _normalize_title(canonical)
+            if not norm:
+                self._assigned[title] = canonical
+                return
+            cid = self._new_cluster(canonical, norm, category, _years_in(norm))
+        if platform:
+            self._clusters[cid].platforms.add(platform)
+        self._assigned[title] = canonical
+
+    def merge(self, moves: dict[str, str]) -> None:
+        """Fold local clusters into the ones other processes chose.
+
+        ``moves`` maps a local canonical title to the canonical that won it
+        in the shared map.  The local cluster leaves the candidate index and
+        every title assigned to it moves to the winner.
+        """
+        moves = {c: w for c, w in moves.items() if c != w and c in self._by_canonical}
+        if not moves:
+            return
+        for canonical, winner in moves.items():
+            cid = self._by_canonical.pop(canonical)
+            cluster = self._clusters[cid]
+            cluster.retired = True
+            for token in _tokens(cluster.norm):
+                self._postings[(cluster.category, token)].remove(cid)
+                self._token_freq[token] -= 1
+            target = self._by_canonical.get(winner)
+            if target is None:
+                norm = _normalize_title(winner)
+                if not norm:
+                    continue
+                target = self._new_cluster(winner, norm, cluster.category, _years_in(norm))
+            self._clusters[target].platforms |= cluster.platforms
+        for title, canonical in self._assigned.items():
+            if canonical in moves:
+                self._assigned[title] = moves[canonical]
+
+    def _candidates(self, norm: str, category: str) -> list[int]:
+        # Only tokens already indexed can produce candidates; the rarest of
+        # those are the most selective blocking keys.
+        indexed = [t for t in _tokens(norm) if self._token_freq[t]]
+        indexed.sort(key=lambda t: (self._token_freq[t], t))
+        buckets = (category, "") if category else tuple(self._categories)
+
+        found: set[int] = set()
+        for token in indexed[:_BLOCKING_TOKENS]:
+            for bucket in buckets:
+                found.update(self._postings.get((bucket, token), ()))
+        # Among the candidates, the first cluster wins as in a full rebuild
+        return sorted(found)
+
+    def _find_cluster(self, norm: str, category: str, years: set[str], platform: str) -> int | None:
+        for cid in self._candidates(norm, category):
+            cluster = self._clusters[cid]
 
-        matched = False
-        for canon_title, canon_norm, canon_cat, canon_years, canon_plats in clusters:
             # Category gate
-            if categories and cat and canon_cat and cat != canon_cat:
+            if category and cluster.category and category != cluster.category:
                 continue
 
             # Year gate
-            if years and canon_years and not years & canon_years:
+            if years and cluster.years and not years & cluster.years:
                 continue
 
-            same_platform = plat and plat in canon_plats
-
-            if same_platform:
+            if platform and platform in cluster.platforms:
                 # Same platform → require exact normalised title match
-                if norm == canon_norm:
-                    canonical_map[title] = canon_title
-                    canon_plats.add(plat)
-                    matched = True
-                    break
+                if norm == cluster.norm:
+                    return cid
             else:
                 # Cross-platform → use fuzzy matching + semantic gates
-                if _has_semantic_conflict(norm, canon_norm):
+                if _has_semantic_conflict(norm, cluster.norm):
                     continue
+                score = fuzz.token_sort_ratio(norm, cluster.norm, score_cutoff=self.threshold)
+                if score >= self.threshold:
+                    return cid
+        return None
+
+    def _new_cluster(self, title: str, norm: str, category: str, years: set[str]) -> int:
+        cid = len(self._clusters)
+        self._clusters.append(_Cluster(title, norm, category, years))
+        self._by_canonical[title] = cid
+        self._categories.add(category)
+        for token in _tokens(norm):
+            self._postings[(category, token)].append(cid)
+            self._token_freq[token] += 1
+        return cid
 
-                score = fuzz.token_sort_ratio(norm, canon_norm)
-                if score >= CROSS_PLATFORM_THRESHOLD:
-                    canonical_map[title] = canon_title
-                    if plat:
-                        canon_plats.add(plat)
-                    matched = True
-                    break
 
-        if not matched:
-            plat_set = {plat} if plat else set()
-            clusters.append((title, norm, cat, years, plat_set))
-            canonical_map[title] = title
+def cluster_titles(
+    titles: list[str],
+    categories: dict[str, str] | None = None,
+    platforms: dict[str, str] | None = None,
+) -> dict[str, str]:
+    """Given a list of market titles, return {original_title: canonical_title}.
 
-    return canonical_map
+    Args:
+        titles: List of market titles to cluster.
+        categories: Optional {title: category} dict.  Titles in different
+                    categories are never matched.
+        platforms: Optional {title: platform_slug} dict.  Titles from the
+                   SAME platform require exact normalised match.  Titles from
+                   different platforms use fuzzy matching (threshold 82).
+    """
+    if not titles:
+        return {}
+    return TitleClusterer().assign_many(titles, categories, platforms)
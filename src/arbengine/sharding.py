@@ -0,0 +1,59 @@
+"""Shard routing for running several arb engine replicas.
+
+Detection needs every platform's price for an event in one process, so the
+normalized odds stream is split by canonical market title: the publisher
+writes each update to ``odds:normalized:{shard}`` where
+``shard = crc32(canonical) % ARB_SHARD_COUNT``.
+
+Every shard is consumed by exactly one replica at a time: the holder of its
+lease ``arbengine:lease:{shard}``, a key set with NX and a TTL that the owner
+keeps renewing.  A replica competes for the shards listed in ``ARB_SHARDS``
+(all of them when empty), so overlapping lists give failover: when an owner
+dies its lease expires, another eligible replica takes the shard and
+reclaims the entries left pending with XAUTOCLAIM.  A replica that fails to
+renew a lease stops consuming that shard.
+
+With a single shard the stream stays ``odds:normalized``.
+"""
+import os
+import socket
+import zlib
+
+BASE_STREAM_KEY = "odds:normalized"
+LEASE_KEY_PREFIX = "arbengine:lease:"
+
+
+def shard_of(canonical_title: str, shard_count: int) -> int:
+    """Shard that owns a canonical market title."""
+    if shard_count <= 1:
+        return 0
+    return zlib.crc32(canonical_title.encode()) % shard_count
+
+
+def shard_stream(shard: int, shard_count: int) -> str:
+    """Stream key for one shard."""
+    if shard_count <= 1:
+        return BASE_STREAM_KEY
+    return f"{BASE_STREAM_KEY}:{shard}"
+
+
+def lease_key(shard: int) -> str:
+    """Key whose holder consumes the shard."""
+    return f"{LEASE_KEY_PREFIX}{shard}"
+
+
+def eligible_shards(config) -> list[int]:
+    """Shards this replica may own, from ``ARB_SHARDS`` (e.g. "0,2")."""
+    shard_count = max(config.arb_shard_count, 1)
+    if not config.arb_shards.strip():
+        return list(range(shard_count))
+    shards = sorted({int(s) for s in config.arb_shards.split(",") if s.strip()})
+    invalid = [s for s in shards if not 0 <= s < shard_count]
+    if invalid:
+        raise ValueError(f"ARB_SHARDS {invalid} outside 0..{shard_count - 1}")
+    return shards
+
+
+def consumer_name() -> str:
+    """Consumer-group member name unique to this process."""
+    return f"arb-{socket.gethostname()}-{os.getpid()}"
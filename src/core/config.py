@@ -39,6 +39,18 @@ class Settings(BaseSettings):
     coinbase_api_secret: str = ""
     apify_api_token: str = ""
 
+    # CPU offload pool for building market responses (0 = run inline)
+    offload_workers: int = 2
+    offload_max_pending: int = 8
+
+    # Live odds hash layout written by the publisher: "hash" or "compact"
+    live_odds_encoding: str = "hash"
+
+    # Arb engine sharding: streams the odds are split into, and the shards
+    # this replica may lease (comma-separated, empty = all; see arbengine.sharding)
+    arb_shard_count: int = 1
+    arb_shards: str = ""
+
     # App
     cors_origins: str = "https://oddsaxiom.com,http://localhost:3000"
     secret_key: str = "change-me-in-production"
@@ -8,6 +8,7 @@ from src.core.exceptions import ForbiddenError, TierRequiredError, UnauthorizedE
 from src.core.redis import get_redis
 from src.core.security import verify_firebase_token
 from src.models.user import User
+from src.services.user_service import UserPrincipal, get_principal
 
 TIER_ORDER = {"free": 0, "explorer": 1, "pro": 2}
 
@@ -38,6 +39,32 @@ async def get_current_user(
     return user
 
 
+async def get_current_principal(
+    authorization: str | None = Header(None, alias="Authorization"),
+) -> UserPrincipal:
+    """Like get_current_user but returns the cached principal, usually without a DB query.
+
+    Use this for endpoints that only need the user's id, tier, flags or
+    preferences.
+    """
+    if not authorization or not authorization.startswith("Bearer "):
+        raise UnauthorizedError("Missing or malformed Authorization header")
+
+    token = authorization.removeprefix("Bearer ").strip()
+    claims = await verify_firebase_token(token)
+    if claims is None:
+        raise UnauthorizedError("Invalid or expired Firebase token")
+
+    principal = await get_principal(claims["uid"])
+    if principal is None:
+        raise UnauthorizedError("User not found. Call POST /api/v1/auth/sync first.")
+
+    if not principal.is_active:
+        raise ForbiddenError("Account is deactivated")
+
+    return principal
+
+
 async def get_optional_user(
     authorization: str | None = Header(None, alias="Authorization"),
     db: AsyncSession = Depends(get_db),
@@ -69,7 +96,9 @@ class TierGate:
     def __init__(self, minimum_tier: str):
         self.minimum_tier = minimum_tier
 
-    async def __call__(self, user: User = Depends(get_current_user)) -> User:
+    async def __call__(
+        self, user: UserPrincipal = Depends(get_current_principal)
+    ) -> UserPrincipal:
         user_level = TIER_ORDER.get(user.tier, 0)
         required_level = TIER_ORDER.get(self.minimum_tier, 0)
         if user_level < required_level:
@@ -2,12 +2,24 @@
 
 Verifies Firebase ID tokens using Google's public certificates.
 No service account required — only FIREBASE_PROJECT_ID.
+
+Both halves of verification are cached in-process so repeat requests stay on
+the event loop:
+
+- Google's certificates are parsed into public keys once per rotation, keyed
+  by ``kid``, and refreshed in the background shortly before they expire.
+- Verified tokens are kept in a bounded LRU keyed by the token's SHA-256 until
+  their ``exp``, so repeat requests from one session skip the RSA check.
+  Entries signed by a ``kid`` Google no longer publishes are dropped when the
+  keys are refreshed.
+
+On a token cache miss the RS256 check runs in a worker thread, so a burst of
+new sessions does not stall every other request on the loop.
 """
 import asyncio
-import json
-import os
+import hashlib
 import time
-from functools import lru_cache
+from collections import OrderedDict
 
 from cryptography.x509 import load_pem_x509_certificate
 import httpx
@@ -22,37 +34,107 @@ logger = structlog.get_logger()
 GOOGLE_CERTS_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
 FIREBASE_ISSUER_PREFIX = "https://securetoken.google.com/"
 
-# Cache for Google's public certificates
-_cached_certs: dict | None = None
-_certs_expiry: float = 0
+DEFAULT_CERTS_MAX_AGE = 3600  # used when Google sends no Cache-Control max-age
+CERTS_REFRESH_MARGIN = 300  # refresh in the background this long before expiry
+UNKNOWN_KID_REFRESH_INTERVAL = 60  # at most one forced refresh per minute
+TOKEN_CACHE_SIZE = 10_000
 
+# kid -> public key, parsed from Google's certificates
+_public_keys: dict = {}
+_keys_expiry: float = 0
+_keys_fetched_at: float = 0
+_refresh_task: asyncio.Task | None = None
 
-def _fetch_google_certs() -> dict:
-    """Fetch Google's public certificates for verifying Firebase tokens."""
-    global _cached_certs, _certs_expiry
+# sha256(token) -> (claims, exp, kid)
+_verified_tokens: OrderedDict[bytes, tuple[dict, float, str]] = OrderedDict()
 
-    now = time.time()
-    if _cached_certs and now < _certs_expiry:
-        return _cached_certs
 
-    resp = httpx.get(GOOGLE_CERTS_URL, timeout=10)
-    resp.raise_for_status()
-    _cached_certs = resp.json()
-
-    # Respect Cache-Control max-age
-    cc = resp.headers.get("cache-control", "")
-    max_age = 3600  # default 1 hour
-    for part in cc.split(","):
+def _max_age(cache_control: str) -> int:
+    for part in cache_control.split(","):
         part = part.strip()
         if part.startswith("max-age="):
             try:
-                max_age = int(part.split("=")[1])
+                return int(part.split("=")[1])
             except (ValueError, IndexError):
                 pass
-    _certs_expiry = now + max_age
+    return DEFAULT_CERTS_MAX_AGE
+
+
+async def _fetch_public_keys() -> None:
+    """Fetch Google's certificates and replace the parsed key set.
+
+    On failure the previous keys stay in place: Google publishes keys well
+    before signing with them, so the last set keeps verifying current tokens.
+    """
+    global _public_keys, _keys_expiry, _keys_fetched_at
+
+    try:
+        async with httpx.AsyncClient(timeout=10) as client:
+            resp = await client.get(GOOGLE_CERTS_URL)
+        resp.raise_for_status()
+        _public_keys = {
+            kid: load_pem_x509_certificate(pem.encode("utf-8")).public_key()
+            for kid, pem in resp.json().items()
+        }
+        _keys_fetched_at = time.time()
+        _keys_expiry = _keys_fetched_at + _max_age(resp.headers.get("cache-control", ""))
+        _forget_retired_kids()
+        logger.debug("Fetched Google public certificates", num_keys=len(_public_keys))
+    except Exception as e:
+        logger.error("Could not fetch Google public certificates", error=str(e))
+
 
-    logger.debug("Fetched Google public certificates", num_keys=len(_cached_certs))
-    return _cached_certs
+def _forget_retired_kids() -> None:
+    """Drop verified tokens whose signing key is no longer published."""
+    retired = [h for h, (_, _, kid) in _verified_tokens.items() if kid not in _public_keys]
+    for token_hash in retired:
+        del _verified_tokens[token_hash]
+
+
+def _refresh_public_keys() -> asyncio.Task:
+    """Start a key refresh, or join the one already in flight."""
+    global _refresh_task
+
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.create_task(_fetch_public_keys(), name="firebase-certs")
+    return _refresh_task
+
+
+async def _get_public_key(kid: str):
+    """The public key for ``kid``, or None if Google does not publish it."""
+    now = time.time()
+    if not _public_keys:
+        await asyncio.shield(_refresh_public_keys())
+    elif now >= _keys_expiry - CERTS_REFRESH_MARGIN:
+        _refresh_public_keys()  # serve the current keys meanwhile
+
+    key = _public_keys.get(kid)
+    if key is None and now - _keys_fetched_at >= UNKNOWN_KID_REFRESH_INTERVAL:
+        # Possibly a rotation we have not seen yet
+        await asyncio.shield(_refresh_public_keys())
+        key = _public_keys.get(kid)
+    return key
+
+
+def _cached_claims(token_hash: bytes) -> dict | None:
+    entry = _verified_tokens.get(token_hash)
+    if entry is None:
+        return None
+    claims, exp, _ = entry
+    if time.time() >= exp:
+        del _verified_tokens[token_hash]
+        return None
+    _verified_tokens.move_to_end(token_hash)
+    return dict(claims)
+
+
+def _cache_claims(token_hash: bytes, claims: dict, kid: str) -> None:
+    if kid not in _public_keys:
+        return  # retired while the token was being checked
+    _verified_tokens[token_hash] = (dict(claims), float(claims["exp"]), kid)
+    _verified_tokens.move_to_end(token_hash)
+    while len(_verified_tokens) > TOKEN_CACHE_SIZE:
+        _verified_tokens.popitem(last=False)
 
 
 def _firebase_initialized() -> bool:
@@ -82,36 +164,32 @@ async def verify_firebase_token(id_token: str) -> dict | None:
     if not _firebase_initialized():
         return None
 
+    token_hash = hashlib.sha256(id_token.encode("utf-8")).digest()
+    cached = _cached_claims(token_hash)
+    if cached is not None:
+        return cached
+
     project_id = settings.firebase_project_id
     expected_issuer = FIREBASE_ISSUER_PREFIX + project_id
 
-    loop = asyncio.get_event_loop()
     try:
-        # Fetch certs in executor (HTTP call)
-        certs = await loop.run_in_executor(None, _fetch_google_certs)
-
         # Decode header to get the key ID
         unverified_header = jwt.get_unverified_header(id_token)
         kid = unverified_header.get("kid")
-        if not kid or kid not in certs:
+        public_key = await _get_public_key(kid) if kid else None
+        if public_key is None:
             logger.warning("Firebase token kid not found in Google certs", kid=kid)
             return None
 
-        # Get the public key from the X.509 certificate
-        cert_pem = certs[kid]
-        cert = load_pem_x509_certificate(cert_pem.encode("utf-8"))
-        public_key = cert.public_key()
-
-        # Verify and decode the token
-        decoded = await loop.run_in_executor(
-            None,
-            lambda: jwt.decode(
-                id_token,
-                public_key,
-                algorithms=["RS256"],
-                audience=project_id,
-                issuer=expected_issuer,
-            ),
+        # Verify and decode the token off the event loop
+        decoded = await asyncio.to_thread(
+            jwt.decode,
+            id_token,
+            public_key,
+            algorithms=["RS256"],
+            audience=project_id,
+            issuer=expected_issuer,
+            options={"require": ["exp"]},
         )
 
         # Additional Firebase-specific checks
@@ -122,6 +200,7 @@ async def verify_firebase_token(id_token: str) -> dict | None:
         # Map to the same format as firebase_admin
         decoded["uid"] = decoded["sub"]
 
+        _cache_claims(token_hash, decoded, kid)
         return decoded
 
     except jwt.ExpiredSignatureError:
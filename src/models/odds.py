@@ -6,6 +6,8 @@ from src.models.base import Base
 
 class OddsSnapshot(Base):
     __tablename__ = "odds_snapshots"
+    # Daily partitions on captured_at; see alembic 004 and src.tasks.cleanup
+    __table_args__ = {"postgresql_partition_by": "RANGE (captured_at)"}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     market_id: Mapped[str] = mapped_column(String(300), nullable=False, index=True)
@@ -18,4 +20,6 @@ class OddsSnapshot(Base):
     bid: Mapped[float | None] = mapped_column(Numeric(8, 6))
     ask: Mapped[float | None] = mapped_column(Numeric(8, 6))
     volume_24h: Mapped[float | None] = mapped_column(Numeric(16, 2))
-    captured_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default="now()", nullable=False, index=True)
+    captured_at: Mapped[str] = mapped_column(
+        DateTime(timezone=True), server_default="now()", primary_key=True, index=True
+    )
@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+
+
+class NotificationPreferences(BaseModel):
+    min_profit: float = 0.005
+    categories: list[str] = []  # empty = every category
+    platforms: list[str] = []  # empty = every platform
+
+
+class NotificationPreferencesUpdate(BaseModel):
+    min_profit: float | None = Field(None, ge=0.0, le=1.0)
+    categories: list[str] | None = Field(None, max_length=50)
+    platforms: list[str] | None = Field(None, max_length=50)
@@ -0,0 +1,93 @@
+"""CPU offload for heavy response building — keeps the API event loop responsive.
+
+Grouping tens of thousands of live hashes into the market list is pure
+Python work.  Running it inline blocks every other request and WebSocket on
+the same worker, so it is submitted to a small process pool instead.
+"""
+import asyncio
+import multiprocessing
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, TypeVar
+
+import structlog
+
+from src.core.config import settings
+from src.core.exceptions import ServiceUnavailableError
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key onto one in-flight task."""
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._inflight
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[T]]) -> T:
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._inflight[key] = future
+
+            def _forget(done: asyncio.Future, key: str = key) -> None:
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+
+            future.add_done_callback(_forget)
+        # Shield so one cancelled caller doesn't cancel the work for the rest
+        return await asyncio.shield(future)
+
+
+class ProcessOffloader:
+    """Process-pool runner with a bounded queue.
+
+    Every submit runs its own job; callers that want concurrent requests to
+    share one result coalesce before submitting (see ``SingleFlight``).
+    With ``max_workers=0`` jobs run inline on the event loop (development).
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool: ProcessPoolExecutor | None = None
+        self._pending = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: never fork a process that has a running event loop
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info("CPU offload pool started", workers=self.max_workers)
+        return self._pool
+
+    async def submit(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run ``fn(*args)`` in the pool."""
+        if self.max_workers <= 0:
+            return fn(*args)
+        if self._pending >= self.max_pending:
+            raise ServiceUnavailableError("Server busy building market data, retry shortly")
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_pool(), fn, *args)
+        finally:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+offloader = ProcessOffloader(
+    max_workers=settings.offload_workers,
+    max_pending=settings.offload_max_pending,
+)
@@ -0,0 +1,323 @@
+"""Layout of live odds in Redis — per-market hashes plus secondary indexes.
+
+Every live market lives in ``odds:live:{platform}:{market_id}``.  Rather than
+walking the keyspace with SCAN, the publisher maintains sorted-set indexes
+scored by last-update time:
+
+  odds:idx:updated               every live key
+  odds:idx:platform:{platform}   live keys for one platform
+  odds:idx:category:{category}   live keys for one category
+  odds:idx:market:{market_id}    live keys sharing an external market id
+
+Fuzzy-cluster siblings (the same event listed on other platforms under other
+ids) are written to ``odds:idx:siblings:{market_id}`` whenever the grouped
+market list is rebuilt, so a single-market lookup can return every platform's
+price without re-clustering.
+
+Expiry is driven by those scores: readers only look at members updated within
+``LIVE_CACHE_TTL`` and ``prune_expired`` deletes anything older.  Only
+publishers run the prune, so each hash also carries a key TTL of
+``LIVE_CACHE_TTL``, renewed whenever it is indexed: if publishing stops, the
+hashes still expire.
+
+Each market hash uses one of two encodings (``settings.live_odds_encoding``):
+
+  hash      one field per outcome attribute (outcome_{i}_name, outcome_{i}_price,
+            ...) next to the market metadata fields
+  compact   two fields: ``v`` (format version) and ``d``, one JSON blob holding
+            the metadata and the outcomes as parallel typed arrays
+
+Readers always go through ``decode_live_market``, which accepts both, so the
+encoding can be switched while keys written in the old one are still live.
+"""
+import time
+
+import orjson
+import structlog
+
+logger = structlog.get_logger()
+
+LIVE_KEY_PREFIX = "odds:live:"
+LIVE_CACHE_TTL = 660  # 11 minutes — must exceed slowest worker poll (TheOddsAPI 5 min)
+
+UPDATED_INDEX = "odds:idx:updated"
+PLATFORMS_SET = "odds:idx:platforms"
+CATEGORIES_SET = "odds:idx:categories"
+
+PRUNE_BATCH = 1000  # Max stale keys removed per prune call
+
+COMPACT_VERSION = "1"
+
+
+def live_key(platform: str, market_id: str) -> str:
+    return f"{LIVE_KEY_PREFIX}{platform}:{market_id}"
+
+
+def parse_live_key(key: str) -> tuple[str, str]:
+    """Split ``odds:live:{platform}:{market_id}`` into (platform, market_id)."""
+    parts = key.split(":", 3)
+    platform = parts[2] if len(parts) > 2 else ""
+    market_id = parts[3] if len(parts) > 3 else ""
+    return platform, market_id
+
+
+def platform_index_key(platform: str) -> str:
+    return f"odds:idx:platform:{platform}"
+
+
+def category_index_key(category: str) -> str:
+    return f"odds:idx:category:{category.lower()}"
+
+
+def market_index_key(market_id: str) -> str:
+    return f"odds:idx:market:{market_id}"
+
+
+def siblings_index_key(market_id: str) -> str:
+    return f"odds:idx:siblings:{market_id}"
+
+
+def index_live_key(
+    pipe,
+    key: str,
+    platform: str,
+    category: str,
+    market_id: str,
+    updated_at: float,
+) -> None:
+    """Queue the index updates and TTL renewal for one live key on an existing pipeline."""
+    member = {key: updated_at}
+    pipe.expire(key, LIVE_CACHE_TTL)
+    pipe.zadd(UPDATED_INDEX, member)
+    pipe.zadd(platform_index_key(platform), member)
+    pipe.zadd(market_index_key(market_id), member)
+    pipe.sadd(PLATFORMS_SET, platform)
+    if category:
+        pipe.zadd(category_index_key(category), member)
+        pipe.sadd(CATEGORIES_SET, category.lower())
+
+
+def index_live_keys(
+    pipe,
+    entries: list[tuple[str, str, str, str]],
+    updated_at: float,
+) -> None:
+    """Queue index updates for many (key, platform, category, market_id) at once.
+
+    Same effect as ``index_live_key`` per entry, but one ZADD per index.
+    """
+    members: dict[str, dict[str, float]] = {}
+    platforms: set[str] = set()
+    categories: set[str] = set()
+    for key, platform, category, market_id in entries:
+        members.setdefault(UPDATED_INDEX, {})[key] = updated_at
+        members.setdefault(platform_index_key(platform), {})[key] = updated_at
+        members.setdefault(market_index_key(market_id), {})[key] = updated_at
+        platforms.add(platform)
+        if category:
+            members.setdefault(category_index_key(category), {})[key] = updated_at
+            categories.add(category.lower())
+    for index, mapping in members.items():
+        pipe.zadd(index, mapping)
+    for key, _, _, _ in entries:
+        pipe.expire(key, LIVE_CACHE_TTL)
+    if platforms:
+        pipe.sadd(PLATFORMS_SET, *platforms)
+    if categories:
+        pipe.sadd(CATEGORIES_SET, *categories)
+
+
+def index_siblings(pipe, group_keys: list[str]) -> None:
+    """Queue the sibling set for every market in one fuzzy-matched group."""
+    if len(group_keys) < 2:
+        return
+    for key in group_keys:
+        _, market_id = parse_live_key(key)
+        index = siblings_index_key(market_id)
+        pipe.delete(index)
+        pipe.sadd(index, *group_keys)
+        pipe.expire(index, LIVE_CACHE_TTL)
+
+
+def _to_float(value, default: float | None = 0.0) -> float | None:
+    if value in (None, ""):
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def encode_compact(market: dict) -> dict[str, str]:
+    """Hash mapping for a decoded market record in the compact encoding."""
+    outcomes = market["outcomes"]
+    blob = {
+        "platform": market["platform"],
+        "market_title": market["market_title"],
+        "category": market["category"],
+        "market_url": market["market_url"],
+        "updated_at": market["updated_at"],
+        "volume_24h": market["volume_24h"],
+        "volume_usd": market["volume_usd"],
+        "liquidity_usd": market["liquidity_usd"],
+        "index": [o["outcome_index"] for o in outcomes],
+        "name": [o["outcome_name"] for o in outcomes],
+        "type": [o["outcome_type"] for o in outcomes],
+        "price": [o["price"] for o in outcomes],
+        "implied": [o["implied_prob"] for o in outcomes],
+        "bid": [o["bid"] for o in outcomes],
+        "ask": [o["ask"] for o in outcomes],
+    }
+    return {"v": COMPACT_VERSION, "d": orjson.dumps(blob).decode()}
+
+
+def decode_live_market(data: dict[str, str]) -> dict | None:
+    """Decode a live market hash (either encoding) into a market record.
+
+    The record holds the market metadata plus ``outcomes``, a list of
+    {outcome_index, outcome_name, price, implied_prob, bid, ask, outcome_type}
+    ordered by outcome index.  Returns None for an empty or unreadable hash.
+    """
+    if not data:
+        return None
+    if "v" in data:
+        if data["v"] != COMPACT_VERSION:
+            return None
+        return _decode_compact(data.get("d", ""))
+    return _decode_fields(data)
+
+
+def _decode_compact(blob: str) -> dict | None:
+    try:
+        d = orjson.loads(blob)
+    except orjson.JSONDecodeError:
+        return None
+    outcomes = [
+        {
+            "outcome_index": index,
+            "outcome_name": name,
+            "price": price,
+            "implied_prob": implied,
+            "bid": bid,
+            "ask": ask,
+            "outcome_type": outcome_type,
+        }
+        for index, name, price, implied, bid, ask, outcome_type in zip(
+            d["index"], d["name"], d["price"], d["implied"], d["bid"], d["ask"], d["type"]
+        )
+    ]
+    return {
+        "platform": d["platform"],
+        "market_title": d["market_title"],
+        "category": d["category"],
+        "market_url": d["market_url"],
+        "updated_at": d["updated_at"],
+        "volume_24h": d["volume_24h"],
+        "volume_usd": d["volume_usd"],
+        "liquidity_usd": d["liquidity_usd"],
+        "outcomes": outcomes,
+    }
+
+
+def _decode_fields(data: dict[str, str]) -> dict:
+    outcomes = []
+    i = 0
+    while f"outcome_{i}_name" in data:
+        outcomes.append({
+            "outcome_index": i,
+            "outcome_name": data.get(f"outcome_{i}_name", ""),
+            "price": _to_float(data.get(f"outcome_{i}_price")),
+            "implied_prob": _to_float(data.get(f"outcome_{i}_implied")),
+            "bid": _to_float(data.get(f"outcome_{i}_bid"), None) or None,
+            "ask": _to_float(data.get(f"outcome_{i}_ask"), None) or None,
+            "outcome_type": data.get(f"outcome_{i}_type", "binary"),
+        })
+        i += 1
+    return {
+        "platform": data.get("platform", ""),
+        "market_title": data.get("market_title", ""),
+        "category": data.get("category", ""),
+        "market_url": data.get("market_url", ""),
+        "updated_at": data.get("updated_at"),
+        "volume_24h": _to_float(data.get("volume_24h"), None) or None,
+        "volume_usd": _to_float(data.get("volume_usd"), None) or None,
+        "liquidity_usd": _to_float(data.get("liquidity_usd"), None) or None,
+        "outcomes": outcomes,
+    }
+
+
+def _cutoff() -> float:
+    return time.time() - LIVE_CACHE_TTL
+
+
+async def live_keys(
+    redis,
+    platform: str | None = None,
+    category: str | None = None,
+) -> list[str]:
+    """Return live keys, optionally narrowed to one platform or category."""
+    if platform:
+        index = platform_index_key(platform)
+    elif category:
+        index = category_index_key(category)
+    else:
+        index = UPDATED_INDEX
+    return await redis.zrangebyscore(index, _cutoff(), "+inf")
+
+
+async def live_keys_for_market(redis, market_id: str) -> list[str]:
+    """Return every live key for a market id, including fuzzy-cluster siblings.
+
+    One round-trip: the market index and the sibling set are read together.
+    """
+    pipe = redis.pipeline()
+    pipe.zrangebyscore(market_index_key(market_id), _cutoff(), "+inf")
+    pipe.smembers(siblings_index_key(market_id))
+    direct, siblings = await pipe.execute()
+    keys = list(direct)
+    seen = set(keys)
+    for key in sorted(siblings):
+        if key not in seen:
+            seen.add(key)
+            keys.append(key)
+    return keys
+
+
+async def live_count(redis) -> int:
+    """Number of live market keys."""
+    return await redis.zcount(UPDATED_INDEX, _cutoff(), "+inf") or 0
+
+
+async def live_counts_by_platform(redis) -> dict[str, int]:
+    """Number of live market keys per platform."""
+    platforms = sorted(await redis.smembers(PLATFORMS_SET))
+    if not platforms:
+        return {}
+    cutoff = _cutoff()
+    pipe = redis.pipeline()
+    for platform in platforms:
+        pipe.zcount(platform_index_key(platform), cutoff, "+inf")
+    counts = await pipe.execute()
+    return {p: c for p, c in zip(platforms, counts) if c}
+
+
+async def prune_expired(redis, limit: int = PRUNE_BATCH) -> int:
+    """Delete live keys (and their index entries) not updated within the TTL."""
+    stale = await redis.zrangebyscore(UPDATED_INDEX, "-inf", f"({_cutoff()}", start=0, num=limit)
+    if not stale:
+        return 0
+
+    categories = await redis.smembers(CATEGORIES_SET)
+    pipe = redis.pipeline()
+    for key in stale:
+        platform, market_id = parse_live_key(key)
+        pipe.delete(key)
+        pipe.zrem(platform_index_key(platform), key)
+        pipe.zrem(market_index_key(market_id), key)
+        for category in categories:
+            pipe.zrem(category_index_key(category), key)
+    pipe.zrem(UPDATED_INDEX, *stale)
+    await pipe.execute()
+
+    logger.debug("Pruned expired live odds", count=len(stale))
+    return len(stale)
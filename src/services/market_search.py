@@ -0,0 +1,120 @@
+"""In-process search index over the materialised live market list.
+
+Each API process keeps a token inverted index over the "all" view and
+rebuilds it only when the materialised views change generation (see
+``odds_service.materialize_live_odds``), so a search costs one Redis
+round-trip plus a few set intersections however many markets are live.
+
+Queries are AND-ed word prefixes: "fed rat" matches "Fed rate cut in March?".
+"""
+import asyncio
+import bisect
+import re
+from dataclasses import dataclass, field
+
+import redis.asyncio as aioredis
+import structlog
+
+from src.services.odds_service import get_live_view, live_odds_generation
+
+logger = structlog.get_logger()
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_BUILD_IN_THREAD = 5000  # markets — index larger lists off the event loop
+
+
+@dataclass(slots=True)
+class _Snapshot:
+    """Immutable index over one generation of the market list."""
+
+    markets: list[dict] = field(default_factory=list)
+    terms: list[str] = field(default_factory=list)  # sorted vocabulary
+    postings: dict[str, list[int]] = field(default_factory=dict)  # term -> positions
+    by_category: dict[str, list[int]] = field(default_factory=dict)
+
+    def prefix_matches(self, prefix: str) -> set[int]:
+        """Positions of markets with any title word starting with ``prefix``."""
+        matches: set[int] = set()
+        i = bisect.bisect_left(self.terms, prefix)
+        while i < len(self.terms) and self.terms[i].startswith(prefix):
+            matches.update(self.postings[self.terms[i]])
+            i += 1
+        return matches
+
+
+def _build_snapshot(markets: list[dict]) -> _Snapshot:
+    postings: dict[str, list[int]] = {}
+    by_category: dict[str, list[int]] = {}
+    for pos, market in enumerate(markets):
+        for term in set(_TOKEN_RE.findall(market.get("market_title", "").lower())):
+            postings.setdefault(term, []).append(pos)
+        by_category.setdefault(market.get("category", "").lower(), []).append(pos)
+    return _Snapshot(markets, sorted(postings), postings, by_category)
+
+
+class MarketSearchIndex:
+    """Term/prefix search with category filter and pagination over live markets."""
+
+    def __init__(self):
+        self.generation: str | None = None
+        self._snapshot = _Snapshot()
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, redis: aioredis.Redis) -> None:
+        """Rebuild the index if the materialised views have changed."""
+        if await live_odds_generation(redis) == self.generation:
+            return
+        async with self._lock:
+            generation, markets = await get_live_view(redis)
+            if generation == self.generation:
+                return  # another request rebuilt it while we waited
+            if len(markets) >= _BUILD_IN_THREAD:
+                snapshot = await asyncio.to_thread(_build_snapshot, markets)
+            else:
+                snapshot = _build_snapshot(markets)
+            self._snapshot = snapshot
+            self.generation = generation
+            logger.debug(
+                "Market search index rebuilt",
+                markets=len(markets),
+                terms=len(snapshot.terms),
+                generation=generation,
+            )
+
+    def search(
+        self,
+        query: str | None = None,
+        category: str | None = None,
+        page: int = 1,
+        per_page: int = 50,
+    ) -> dict:
+        """Markets matching every query word prefix, in market-list order."""
+        snapshot = self._snapshot
+        positions: set[int] | None = None
+        if category:
+            positions = set(snapshot.by_category.get(category.lower(), ()))
+
+        # Intersect smallest sets first so a selective word prunes early
+        words = set(_TOKEN_RE.findall((query or "").lower()))
+        candidates = [snapshot.prefix_matches(word) for word in words]
+        for matches in sorted(candidates, key=len):
+            positions = matches if positions is None else positions & matches
+            if not positions:
+                break
+
+        hits = range(len(snapshot.markets)) if positions is None else sorted(positions)
+        total = len(hits)
+        start = (page - 1) * per_page
+        end = start + per_page
+        return {
+            "data": [snapshot.markets[i] for i in hits[start:end]],
+            "meta": {
+                "page": page,
+                "per_page": per_page,
+                "total": total,
+                "total_pages": (total + per_page - 1) // per_page if per_page else 1,
+            },
+        }
+
+
+market_index = MarketSearchIndex()
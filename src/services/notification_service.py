@@ -0,0 +1,365 @@
+"""Arb alert notifications — one shared alert log, read per user.
+
+One elected producer per deployment turns ``arb:alerts`` into
+notifications and writes each alert once to a shared stream.  Users keep
+only cursors into that log, and their timeline is computed from it when
+they read (fan-out on read), so cost grows with alerts rather than with
+alerts x users x replicas.
+
+  notifications:leader             producer lease (SET NX PX, renewed)
+  notifications:recipients:version bumped whenever who gets alerts may have changed
+  notifications:log                stream of alerts, capped at LOG_MAXLEN
+  notifications:user:{user_id}     hash: read / cleared cursors and preferences
+                                   (min_profit, categories, platforms)
+
+Per-user filters are applied when the timeline is read; the producer only
+keeps the lowest min_profit among recipients, to skip alerts nobody would
+see, and recomputes it when the version moves.
+"""
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass
+
+import orjson
+import redis.asyncio as aioredis
+import structlog
+from sqlalchemy import text
+
+from src.core.database import async_session_factory
+from src.core.redis import get_redis
+from src.schemas.notification import NotificationPreferences, NotificationPreferencesUpdate
+from src.services.user_service import UserPrincipal
+
+logger = structlog.get_logger()
+
+ALERT_CHANNEL = "arb:alerts"
+LEADER_KEY = "notifications:leader"
+RECIPIENTS_VERSION_KEY = "notifications:recipients:version"
+LOG_KEY = "notifications:log"
+
+LEADER_TTL_MS = 15_000
+LEADER_RENEW_INTERVAL = 5.0
+LEADER_RETRY_INTERVAL = 10.0
+# The recipient floor is rebuilt when invalidated, and at least this often
+RECIPIENTS_MAX_AGE = 300
+LOG_MAXLEN = 1000
+TIMELINE_MAX = 50  # most recent alerts a user's timeline shows
+DEFAULT_MIN_PROFIT = 0.005  # only notify for >0.5% arbs unless the user says otherwise
+
+_RENEW_LEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_LEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def _user_key(user_id) -> str:
+    return f"notifications:user:{user_id}"
+
+
+def _stream_id(entry_id: str) -> tuple[int, int]:
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+async def invalidate_recipients() -> None:
+    """Make the producer rebuild its recipients before the next alert.
+
+    Call after committing anything that changes who gets alerts: tier,
+    active flag, ``market_alerts`` or notification preferences.
+    """
+    try:
+        redis = await get_redis()
+        await redis.incr(RECIPIENTS_VERSION_KEY)
+    except Exception as e:
+        logger.warning("Could not invalidate notification recipients", error=str(e))
+
+
+class NotificationService:
+    """Leader-elected producer that appends arb alerts to the shared log."""
+
+    def __init__(self, redis: aioredis.Redis):
+        self.redis = redis
+        self._token = uuid.uuid4().hex
+        self._floor: float | None = None  # lowest recipient min_profit; None = no recipients
+        self._version: str | None = None  # RECIPIENTS_VERSION_KEY the floor was built at
+        self._built_at = 0.0
+
+    async def run(self) -> None:
+        """Contend for the producer lease forever; produce while holding it."""
+        while True:
+            try:
+                if await self.redis.set(LEADER_KEY, self._token, nx=True, px=LEADER_TTL_MS):
+                    logger.info("Notification producer elected")
+                    await self._lead()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Notification producer error", error=str(e))
+            await asyncio.sleep(LEADER_RETRY_INTERVAL)
+
+    async def _lead(self) -> None:
+        producer = asyncio.create_task(self._produce())
+        try:
+            while not producer.done():
+                await asyncio.sleep(LEADER_RENEW_INTERVAL)
+                renewed = await self.redis.eval(
+                    _RENEW_LEASE, 1, LEADER_KEY, self._token, LEADER_TTL_MS
+                )
+                if not renewed:
+                    logger.warning("Notification producer lease lost")
+                    break
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+            try:
+                await self.redis.eval(_RELEASE_LEASE, 1, LEADER_KEY, self._token)
+            except Exception:
+                pass
+
+    async def _produce(self) -> None:
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(ALERT_CHANNEL)
+        logger.info("Notification producer subscribed", channel=ALERT_CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                try:
+                    await self.handle_alert(orjson.loads(message["data"]))
+                except Exception as e:
+                    logger.warning("Notification producer error", error=str(e))
+        finally:
+            await pubsub.aclose()
+
+    async def handle_alert(self, alert: dict) -> None:
+        """Append one arb alert to the log if any recipient wants it."""
+        if alert.get("type") != "arb_alert":
+            return  # e.g. arb_closed
+        arb_data = alert.get("data", {})
+        profit = arb_data.get("expected_profit", 0)
+        floor = await self._recipient_floor()
+        if floor is None or profit < floor:
+            return
+
+        title = arb_data.get("market_title", "Unknown market")
+        legs = arb_data.get("legs", [])
+        leg_summary = " vs ".join(
+            f"{leg['platform']} ({leg['outcome_name']})"
+            for leg in legs[:2]
+        )
+        notification = orjson.dumps({
+            "type": "arb_alert",
+            "title": f"Arb: {profit:.2%} profit",
+            "body": f"{title[:80]} — {leg_summary}",
+            "data": arb_data,
+            "created_at": arb_data.get("detected_at"),
+        })
+        await self.redis.xadd(
+            LOG_KEY, {"n": notification}, maxlen=LOG_MAXLEN, approximate=True
+        )
+        logger.info("Arb notification logged", profit=f"{profit:.2%}")
+
+    async def _recipient_floor(self) -> float | None:
+        """Lowest min_profit among recipients, rebuilt if invalidated or old."""
+        version = await self.redis.get(RECIPIENTS_VERSION_KEY) or "0"
+        if version != self._version or time.monotonic() - self._built_at > RECIPIENTS_MAX_AGE:
+            # Read the version first: an invalidation during the rebuild
+            # leaves it stale, so the next alert rebuilds again
+            await self._rebuild_recipients()
+            self._version = version
+        return self._floor
+
+    async def _rebuild_recipients(self) -> None:
+        async with async_session_factory() as session:
+            result = await session.execute(
+                text(
+                    "SELECT id FROM users "
+                    "WHERE tier = 'pro' AND is_active = true AND market_alerts = true"
+                )
+            )
+            user_ids = [str(row[0]) for row in result.fetchall()]
+
+        pipe = self.redis.pipeline()
+        for uid in user_ids:
+            pipe.hget(_user_key(uid), "min_profit")
+        thresholds = await pipe.execute() if user_ids else []
+        floors = [float(threshold) if threshold else DEFAULT_MIN_PROFIT for threshold in thresholds]
+        self._floor = min(floors) if floors else None
+        self._built_at = time.monotonic()
+        logger.info("Notification recipients rebuilt", recipients=len(floors))
+
+
+@dataclass(slots=True)
+class _Alert:
+    """One logged alert, with the fields user filters look at."""
+
+    entry_id: str
+    key: tuple[int, int]  # parsed entry_id, for ordering
+    profit: float
+    category: str  # lowercased
+    platforms: frozenset[str]
+    notification: dict
+
+
+class _AlertLog:
+    """In-process copy of the shared alert log, synced incrementally."""
+
+    def __init__(self):
+        self.entries: list[_Alert] = []  # oldest first
+        self._lock = asyncio.Lock()
+
+    @property
+    def last_id(self) -> str:
+        return self.entries[-1].entry_id if self.entries else "0-0"
+
+    async def sync(self, redis: aioredis.Redis) -> None:
+        async with self._lock:
+            newest = await redis.xrevrange(LOG_KEY, count=1)
+            if not newest:
+                self.entries = []
+                return
+            newest_id = newest[0][0]
+            if newest_id == self.last_id:
+                return
+            if _stream_id(newest_id) < _stream_id(self.last_id):
+                self.entries = []  # the log was reset
+            start = f"({self.last_id}" if self.entries else "-"
+            for entry_id, fields in await redis.xrange(LOG_KEY, min=start):
+                try:
+                    notification = orjson.loads(fields["n"])
+                except (KeyError, orjson.JSONDecodeError):
+                    continue
+                data = notification.get("data", {})
+                self.entries.append(_Alert(
+                    entry_id=entry_id,
+                    key=_stream_id(entry_id),
+                    profit=data.get("expected_profit", 0),
+                    category=data.get("category", "").lower(),
+                    platforms=frozenset(
+                        leg.get("platform", "").lower() for leg in data.get("legs", ())
+                    ),
+                    notification=notification,
+                ))
+            del self.entries[:-LOG_MAXLEN]
+
+
+_log = _AlertLog()
+
+
+def _receives_alerts(user: UserPrincipal) -> bool:
+    return user.tier == "pro" and user.is_active and bool(user.market_alerts)
+
+
+def _preferences(state: dict) -> NotificationPreferences:
+    """A user's notification preferences from their state hash."""
+    return NotificationPreferences(
+        min_profit=float(state.get("min_profit") or DEFAULT_MIN_PROFIT),
+        categories=orjson.loads(state.get("categories") or "[]"),
+        platforms=orjson.loads(state.get("platforms") or "[]"),
+    )
+
+
+async def _load_state(redis: aioredis.Redis, user: UserPrincipal) -> dict:
+    """Read a user's state hash, dropping their pre-log notification list once.
+
+    A timeline starts when the user starts receiving alerts: until then
+    (and on first load) both cursors follow the log tail.  Call after
+    ``_log.sync``.
+    """
+    key = _user_key(user.id)
+    state = await redis.hgetall(key)
+    updates: dict[str, str] = {}
+    if not state.get("legacy_cleared"):
+        await redis.delete(f"notifications:{user.id}", f"notifications:{user.id}:unread")
+        updates["legacy_cleared"] = "1"
+    if "cleared" not in state or (
+        not _receives_alerts(user) and state["cleared"] != _log.last_id
+    ):
+        updates["read"] = updates["cleared"] = _log.last_id
+    if updates:
+        await redis.hset(key, mapping=updates)
+        state.update(updates)
+    return state
+
+
+async def get_user_notifications(
+    redis: aioredis.Redis,
+    user: UserPrincipal,
+    page: int = 1,
+    per_page: int = 20,
+) -> dict:
+    """A user's page of notifications (newest first) and unread count."""
+    await _log.sync(redis)
+    state = await _load_state(redis, user)
+
+    visible: list[_Alert] = []
+    if _receives_alerts(user):
+        prefs = _preferences(state)
+        categories = {c.lower() for c in prefs.categories}
+        platforms = {p.lower() for p in prefs.platforms}
+        cleared = _stream_id(state.get("cleared", "0-0"))
+        for alert in reversed(_log.entries):
+            if alert.key <= cleared or len(visible) == TIMELINE_MAX:
+                break
+            if (
+                alert.profit >= prefs.min_profit
+                and (not categories or alert.category in categories)
+                and (not platforms or not platforms.isdisjoint(alert.platforms))
+            ):
+                visible.append(alert)
+
+    read = _stream_id(state.get("read", "0-0"))
+    start = (page - 1) * per_page
+    return {
+        "data": [
+            {"id": alert.entry_id, **alert.notification}
+            for alert in visible[start:start + per_page]
+        ],
+        "meta": {"page": page, "per_page": per_page, "total": len(visible)},
+        "unread_count": sum(1 for alert in visible if alert.key > read),
+    }
+
+
+async def mark_notifications_read(redis: aioredis.Redis, user: UserPrincipal) -> None:
+    """Move the user's read cursor to the newest alert."""
+    await _log.sync(redis)
+    await redis.hset(_user_key(user.id), "read", _log.last_id)
+
+
+async def clear_notifications(redis: aioredis.Redis, user: UserPrincipal) -> None:
+    """Hide every alert logged so far from the user's timeline."""
+    await _log.sync(redis)
+    await redis.hset(_user_key(user.id), mapping={"read": _log.last_id, "cleared": _log.last_id})
+
+
+async def get_preferences(redis: aioredis.Redis, user: UserPrincipal) -> NotificationPreferences:
+    return _preferences(await redis.hgetall(_user_key(user.id)))
+
+
+async def update_preferences(
+    redis: aioredis.Redis,
+    user: UserPrincipal,
+    update: NotificationPreferencesUpdate,
+) -> NotificationPreferences:
+    """Apply the fields set in ``update`` and return the resulting preferences."""
+    mapping: dict[str, str] = {}
+    if update.min_profit is not None:
+        mapping["min_profit"] = str(update.min_profit)
+    if update.categories is not None:
+        mapping["categories"] = orjson.dumps(update.categories).decode()
+    if update.platforms is not None:
+        mapping["platforms"] = orjson.dumps(update.platforms).decode()
+    if mapping:
+        await redis.hset(_user_key(user.id), mapping=mapping)
+    if update.min_profit is not None:
+        await invalidate_recipients()
+    return await get_preferences(redis, user)
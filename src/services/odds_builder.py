@@ -0,0 +1,121 @@
+"""Group raw live-odds hashes into the cross-platform market list.
+
+Pure functions with no I/O so they can run in the CPU offload process pool
+(see ``src.services.compute``) — arguments and results must stay picklable.
+"""
+from src.services.live_store import parse_live_key
+
+ALL_VIEW = "all"
+
+
+def _fix_kalshi_url(url: str) -> str:
+    """Ensure Kalshi URLs use lowercase series_ticker (no date/outcome suffixes).
+
+    Kalshi's website only resolves series-level URLs like /markets/kxfed.
+    Market-level tickers like KXFED-26DEC-T4.25 return 404.
+    """
+    if not url or "kalshi.com/markets/" not in url:
+        return url
+    path = url.split("kalshi.com/markets/", 1)[1]
+    # Already a clean lowercase series ticker
+    if path == path.lower() and "-" not in path:
+        return url
+    # Extract series ticker: first segment before any dash
+    parts = path.split("-")
+    if len(parts) > 1:
+        return f"https://kalshi.com/markets/{parts[0].lower()}"
+    return f"https://kalshi.com/markets/{path.lower()}"
+
+
+def build_market_list(
+    raw_entries: list[tuple[str, str, dict]],
+    canonical_map: dict[str, str],
+) -> list[dict]:
+    """Group (redis_key, title, market record) entries by canonical title.
+
+    Records are decoded with ``live_store.decode_live_market``.
+
+    Returns markets sorted by platform coverage, multi-platform first.
+    """
+    markets: dict[str, dict] = {}
+    for key, title, market in raw_entries:
+        canonical = canonical_map.get(title, title)
+
+        _, market_id = parse_live_key(key)
+        platform = market["platform"] or "unknown"
+        platform_url = market["market_url"]
+        if platform == "kalshi":
+            platform_url = _fix_kalshi_url(platform_url)
+        mkt_category = market["category"]
+
+        if canonical not in markets:
+            markets[canonical] = {
+                "market_id": market_id,
+                "market_title": canonical,
+                "category": mkt_category,
+                "market_url": platform_url,
+                "platforms": [],
+            }
+        elif not markets[canonical]["market_url"] and platform_url:
+            markets[canonical]["market_url"] = platform_url
+        outcomes = [
+            {
+                "outcome_index": o["outcome_index"],
+                "outcome_name": o["outcome_name"],
+                "price": o["price"],
+                "implied_prob": o["implied_prob"],
+                "outcome_type": o["outcome_type"],
+            }
+            for o in market["outcomes"]
+        ]
+
+        entry = {
+            "platform_slug": platform,
+            "market_id": market_id,
+            "market_title": title,  # original per-platform title for reference
+            "outcomes": outcomes,
+            "market_url": platform_url,
+            "volume_24h": market["volume_24h"],
+            "liquidity_usd": market["liquidity_usd"],
+            "updated_at": market["updated_at"],
+        }
+
+        # Deduplicate: if this platform already has an entry in the group,
+        # keep the one with the most recent updated_at (same market listed
+        # in multiple Kalshi events, for example).
+        existing_idx = None
+        for idx, existing in enumerate(markets[canonical]["platforms"]):
+            if existing["platform_slug"] == platform:
+                existing_idx = idx
+                break
+        if existing_idx is not None:
+            old_ts = markets[canonical]["platforms"][existing_idx].get("updated_at", "")
+            new_ts = entry.get("updated_at", "")
+            if new_ts > old_ts:
+                markets[canonical]["platforms"][existing_idx] = entry
+        else:
+            markets[canonical]["platforms"].append(entry)
+
+    # Sort: multi-platform markets first, then by number of platforms desc
+    return sorted(markets.values(), key=lambda m: len(m["platforms"]), reverse=True)
+
+
+def build_market_views(
+    raw_entries: list[tuple[str, str, dict]],
+    canonical_map: dict[str, str],
+) -> dict[str, list[dict]]:
+    """Build the "all" market list plus one list per category in a single job.
+
+    Each category list groups only that category's entries, exactly as a
+    category-filtered build would.
+    """
+    by_category: dict[str, list[tuple[str, str, dict]]] = {}
+    for entry in raw_entries:
+        category = entry[2]["category"].lower()
+        if category:
+            by_category.setdefault(category, []).append(entry)
+
+    views = {ALL_VIEW: build_market_list(raw_entries, canonical_map)}
+    for category, entries in by_category.items():
+        views[category] = build_market_list(entries, canonical_map)
+    return views
@@ -1,111 +1,136 @@
 """Odds data service — reads from Redis (live) and PostgreSQL (historical)."""
+import asyncio
+import uuid
+from collections import Counter
+
 import orjson
 import redis.asyncio as aioredis
 import structlog
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.arbengine.matcher import cluster_titles
+from src.arbengine.cluster_store import ClusterStore
 from src.models.odds import OddsSnapshot
+from src.services.compute import SingleFlight, offloader
+from src.services.live_store import (
+    decode_live_market,
+    index_siblings,
+    live_key,
+    live_keys,
+    live_keys_for_market,
+    parse_live_key,
+)
+from src.services.odds_builder import ALL_VIEW, build_market_views
 
 logger = structlog.get_logger()
 
 
-def _fix_kalshi_url(url: str) -> str:
-    """Ensure Kalshi URLs use lowercase series_ticker (no date/outcome suffixes).
-
-    Kalshi's website only resolves series-level URLs like /markets/kxfed.
-    Market-level tickers like KXFED-26DEC-T4.25 return 404.
-    """
-    if not url or "kalshi.com/markets/" not in url:
-        return url
-    path = url.split("kalshi.com/markets/", 1)[1]
-    # Already a clean lowercase series ticker
-    if path == path.lower() and "-" not in path:
-        return url
-    # Extract series ticker: first segment before any dash
-    parts = path.split("-")
-    if len(parts) > 1:
-        return f"https://kalshi.com/markets/{parts[0].lower()}"
-    return f"https://kalshi.com/markets/{path.lower()}"
-
-# Cache key for the canonical title map (rebuilt every 60s)
-_CANONICAL_MAP_KEY = "odds:canonical_map"
-_CANONICAL_MAP_TTL = 60
-
-
-async def _get_or_build_canonical_map(
-    redis: aioredis.Redis,
-    titles: list[str],
-    categories: dict[str, str],
-    title_platforms: dict[str, str],
-) -> dict[str, str]:
-    """Load canonical map from Redis cache, or build + cache it."""
-    raw = await redis.get(_CANONICAL_MAP_KEY)
-    if raw:
-        try:
-            return orjson.loads(raw)
-        except Exception:
-            pass
+# Title clusters shared with the arb engine and other API replicas via Redis;
+# the WebSocket hub reads them to tag odds deltas with canonical titles
+title_clusters = ClusterStore()
 
-    # Build from scratch (platform-aware: same-platform=exact, cross-platform=fuzzy)
-    cmap = cluster_titles(titles, categories, platforms=title_platforms)
 
-    # Cache for next call
-    try:
-        await redis.set(_CANONICAL_MAP_KEY, orjson.dumps(cmap), ex=_CANONICAL_MAP_TTL)
-    except Exception:
-        pass
-
-    # Log clustering stats
-    from collections import Counter
-    counts = Counter(cmap.values())
-    multi = sum(1 for c in counts.values() if c > 1)
-    if multi:
-        logger.info("Market clustering", total=len(titles), clusters=len(counts), multi_platform=multi)
+async def get_live_odds_for_market(redis: aioredis.Redis, market_id: str) -> list[dict]:
+    """Get live odds for a market (and its fuzzy-matched siblings) from all platforms.
 
-    return cmap
+    Costs two Redis round-trips regardless of keyspace size: one for the
+    market + sibling indexes, one pipelined HGETALL for the matching keys.
+    """
+    keys = await live_keys_for_market(redis, market_id)
+    if not keys:
+        return []
 
+    pipe = redis.pipeline()
+    for key in keys:
+        pipe.hgetall(key)
+    all_data = await pipe.execute()
 
-async def get_live_odds_for_market(redis: aioredis.Redis, market_id: str) -> list[dict]:
-    """Get live odds for a specific market from all platforms in Redis."""
     results = []
-
-    # Scan for all platform keys for this market
-    pattern = f"odds:live:*:{market_id}"
-    async for key in redis.scan_iter(match=pattern):
-        data = await redis.hgetall(key)
-        if not data:
+    for key, data in zip(keys, all_data):
+        market = decode_live_market(data)
+        if market is None:
             continue
 
-        platform = data.get("platform", "unknown")
-        outcomes = []
-
-        # Collect all outcomes from the hash
-        i = 0
-        while f"outcome_{i}_name" in data:
-            outcomes.append({
-                "outcome_index": i,
-                "outcome_name": data.get(f"outcome_{i}_name", ""),
-                "price": float(data.get(f"outcome_{i}_price", 0)),
-                "implied_prob": float(data.get(f"outcome_{i}_implied", 0)),
-                "bid": float(data[f"outcome_{i}_bid"]) if data.get(f"outcome_{i}_bid") else None,
-                "ask": float(data[f"outcome_{i}_ask"]) if data.get(f"outcome_{i}_ask") else None,
-                "outcome_type": data.get(f"outcome_{i}_type", "binary"),
-            })
-            i += 1
-
         results.append({
-            "platform_slug": platform,
-            "outcomes": outcomes,
-            "volume_24h": float(data["volume_24h"]) if data.get("volume_24h") else None,
-            "updated_at": data.get("updated_at"),
+            "platform_slug": market["platform"] or "unknown",
+            "market_id": parse_live_key(key)[1],
+            "market_title": market["market_title"],
+            "outcomes": market["outcomes"],
+            "volume_24h": market["volume_24h"],
+            "updated_at": market["updated_at"],
         })
 
     return results
 
 
-_RESPONSE_CACHE_TTL = 120  # seconds — workers publish every ~30s, but scan is expensive
+_RESPONSE_FRESH_TTL = 120  # seconds — workers publish every ~30s, but a rebuild is expensive
+_RESPONSE_STALE_TTL = 900  # seconds a stale view may still be served while it is rebuilt
+_REBUILD_LOCK_TTL_MS = 30_000
+_REBUILD_WAIT = 10.0  # seconds to wait on another replica's rebuild before building locally
+_REBUILD_POLL = 0.2
+
+PAGE_SIZE = 50  # /odds/live default page size, served pre-serialised
+
+# odds:response:{view} holds one grouped list per view ("all" or a category),
+# odds:response:{view}:p{n} each PAGE_SIZE page as ready-to-send JSON and
+# odds:response:{view}:total the market count.  The marker keys below cover
+# every view at once since they are built together.
+_RESPONSE_PREFIX = "odds:response:"
+_VIEWS_KEY = "odds:response:views"  # JSON {view: page count} written by the last build
+_FRESH_KEY = "odds:response:fresh"
+_GENERATION_KEY = "odds:response:gen"  # bumped on every build
+_CATEGORIES_KEY = "odds:response:categories"  # market counts per category
+_LOCK_KEY = "odds:response:lock"
+
+# Compare-and-delete so a rebuild never releases a lock another replica now holds
+_RELEASE_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Concurrent rebuilds in this process share one task.  Cold-cache rebuilds
+# and stale refreshes use separate flights: a refresh may defer to another
+# replica, while a cold caller needs the result.
+_REBUILD_FLIGHT = "rebuild"
+_REFRESH_FLIGHT = "refresh"
+_rebuilds = SingleFlight()
+_background_refreshes: set[asyncio.Task] = set()
+
+
+def _view_name(category: str | None) -> str:
+    return (category or ALL_VIEW).lower()
+
+
+def _response_key(view: str) -> str:
+    return f"{_RESPONSE_PREFIX}{view}"
+
+
+def _page_key(view: str, page: int) -> str:
+    return f"{_RESPONSE_PREFIX}{view}:p{page}"
+
+
+def _total_key(view: str) -> str:
+    return f"{_RESPONSE_PREFIX}{view}:total"
+
+
+def _paginate(all_markets: list[dict], page: int, per_page: int) -> dict:
+    start = (page - 1) * per_page
+    end = start + per_page
+    return _page_response(all_markets[start:end], page, per_page, len(all_markets))
+
+
+def _page_response(data: list[dict], page: int, per_page: int, total: int) -> dict:
+    return {
+        "data": data,
+        "meta": {
+            "page": page,
+            "per_page": per_page,
+            "total": total,
+            "total_pages": (total + per_page - 1) // per_page,
+        },
+    }
 
 
 async def get_all_live_odds(
@@ -118,153 +143,263 @@ async def get_all_live_odds(
 
     Uses fuzzy event-key clustering so that the same market on different
     platforms (e.g. Polymarket + PredictIt) appears as a single entry
-    with multiple platform rows.  Results are cached for 30s.
+    with multiple platform rows.
+
+    Every view is materialised together (see ``materialize_live_odds``) and
+    cached with stale-while-revalidate: views count as fresh for
+    ``_RESPONSE_FRESH_TTL`` seconds, after which callers keep getting the
+    stale copy while a single background rebuild runs.  Only a cold cache
+    makes callers wait, and then one rebuild runs across all replicas
+    (Redis lock) and all requests in a process (single flight).
     """
-    # Check response cache first
-    cache_key = f"odds:response:{category or 'all'}"
-    cached = await redis.get(cache_key)
-    if cached:
+    view = _view_name(category)
+    cached = await _read_cached(redis, _response_key(view))
+    if cached is not None:
+        # A missing view means the category has no live markets
+        all_markets = orjson.loads(cached[0]) if cached[0] else []
+        return _paginate(all_markets, page, per_page)
+
+    views = await _rebuilds.run(
+        _REBUILD_FLIGHT, lambda: _rebuild_live_odds(redis, wait=True)
+    )
+    if views is None:
+        # Built by another replica — read the view it cached
+        cached = await redis.get(_response_key(view))
+        all_markets = orjson.loads(cached) if cached else []
+    else:
+        all_markets = views.get(view, [])
+    return _paginate(all_markets, page, per_page)
+
+
+async def get_live_odds_page(
+    redis: aioredis.Redis,
+    page: int = 1,
+    category: str | None = None,
+) -> bytes:
+    """One ``PAGE_SIZE`` page of ``get_all_live_odds`` as ready-to-send JSON.
+
+    A warm cache costs one round-trip and no parsing or serialisation.
+    """
+    view = _view_name(category)
+    cached = await _read_cached(redis, _page_key(view, page), _total_key(view))
+    if cached is None:
+        return orjson.dumps(await get_all_live_odds(redis, page, PAGE_SIZE, category))
+    body, total = cached
+    if body:
+        return body
+    # Past the last page, or a category with no live markets
+    return orjson.dumps(_page_response([], page, PAGE_SIZE, int(total or 0)))
+
+
+async def live_odds_generation(redis: aioredis.Redis) -> str | None:
+    """Generation of the materialised views; changes whenever they are rebuilt."""
+    (generation,) = await _read_or_build(redis, _GENERATION_KEY)
+    return generation
+
+
+async def get_live_view(
+    redis: aioredis.Redis,
+    category: str | None = None,
+) -> tuple[str | None, list[dict]]:
+    """The full grouped market list for a view, with its generation."""
+    generation, cached = await _read_or_build(
+        redis, _GENERATION_KEY, _response_key(_view_name(category))
+    )
+    return generation, orjson.loads(cached) if cached else []
+
+
+async def get_category_counts(redis: aioredis.Redis) -> list[dict]:
+    """Live market counts per category, largest first."""
+    (cached,) = await _read_or_build(redis, _CATEGORIES_KEY)
+    return orjson.loads(cached) if cached else []
+
+
+async def _read_or_build(redis: aioredis.Redis, *keys: str) -> list:
+    """Cached response keys, materialising the views first on a cold cache."""
+    cached = await _read_cached(redis, *keys)
+    if cached is None:
+        await _rebuilds.run(_REBUILD_FLIGHT, lambda: _rebuild_live_odds(redis, wait=True))
+        cached = await _read_cached(redis, *keys)
+    return cached or [None] * len(keys)
+
+
+async def _read_cached(redis: aioredis.Redis, *keys: str) -> list | None:
+    """GET cached response keys; None while the cache is cold.
+
+    Schedules a background rebuild when the cached views are stale.
+    """
+    pipe = redis.pipeline()
+    for key in keys:
+        pipe.get(key)
+    pipe.exists(_VIEWS_KEY)
+    pipe.exists(_FRESH_KEY)
+    *values, built, fresh = await pipe.execute()
+    if not built:
+        return None
+    if not fresh:
+        _refresh_in_background(redis)
+    return values
+
+
+async def warm_live_odds(redis: aioredis.Redis) -> None:
+    """Rebuild every view unless the cached ones are still fresh."""
+    if await redis.exists(_FRESH_KEY):
+        return
+    await _rebuilds.run(_REFRESH_FLIGHT, lambda: _rebuild_live_odds(redis, wait=False))
+
+
+def _refresh_in_background(redis: aioredis.Redis) -> None:
+    """Start a rebuild of the stale views unless one is already running here."""
+    if _REFRESH_FLIGHT in _rebuilds:
+        return
+    task = asyncio.create_task(
+        _rebuilds.run(_REFRESH_FLIGHT, lambda: _rebuild_live_odds(redis, wait=False))
+    )
+    _background_refreshes.add(task)
+    task.add_done_callback(_refresh_done)
+
+
+def _refresh_done(task: asyncio.Task) -> None:
+    _background_refreshes.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Odds cache refresh failed", error=str(task.exception()))
+
+
+async def _rebuild_live_odds(
+    redis: aioredis.Redis,
+    wait: bool,
+) -> dict[str, list[dict]] | None:
+    """Materialise every view under the cross-replica lock.
+
+    Returns None when another replica holds the lock: after waiting for its
+    result (``wait=True``) or straight away, leaving the rebuild to it.
+    """
+    token = uuid.uuid4().hex
+
+    if not await redis.set(_LOCK_KEY, token, nx=True, px=_REBUILD_LOCK_TTL_MS):
+        if not wait:
+            return None
+        if await _wait_for_rebuild(redis):
+            return None
+        logger.warning("Odds cache rebuild by another replica timed out")
+        return await materialize_live_odds(redis)
+
+    try:
+        return await materialize_live_odds(redis)
+    finally:
         try:
-            all_markets = orjson.loads(cached)
-            total = len(all_markets)
-            start = (page - 1) * per_page
-            end = start + per_page
-            return {
-                "data": all_markets[start:end],
-                "meta": {
-                    "page": page,
-                    "per_page": per_page,
-                    "total": total,
-                    "total_pages": (total + per_page - 1) // per_page,
-                },
-            }
+            await redis.eval(_RELEASE_LOCK, 1, _LOCK_KEY, token)
         except Exception:
             pass
 
-    # Step 1: Collect all matching keys with SCAN
-    keys: list[str] = []
-    async for key in redis.scan_iter(match="odds:live:*", count=500):
-        keys.append(key if isinstance(key, str) else key.decode())
 
-    if not keys:
-        return {"data": [], "meta": {"page": page, "per_page": per_page, "total": 0, "total_pages": 0}}
+async def _wait_for_rebuild(redis: aioredis.Redis) -> bool:
+    """Poll until another replica's rebuild lands; False if it failed or took too long."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + _REBUILD_WAIT
+    while loop.time() < deadline:
+        await asyncio.sleep(_REBUILD_POLL)
+        pipe = redis.pipeline()
+        pipe.exists(_FRESH_KEY)
+        pipe.exists(_LOCK_KEY)
+        fresh, locked = await pipe.execute()
+        if fresh:
+            return True
+        if not locked:
+            return False
+    return False
+
+
+async def materialize_live_odds(redis: aioredis.Redis) -> dict[str, list[dict]]:
+    """Build and cache the "all" view and every per-category view in one pass.
+
+    Live data is read once and clustered once; all views are written in a
+    single pipeline.
+    """
+    # Step 1: Collect every live key from the index
+    keys = await live_keys(redis)
 
-    # Step 2: Pipeline all HGETALL calls (single round-trip)
+    # Step 2: Pipeline all HGETALL calls (single round-trip), plus the views
+    # written last time so categories that emptied out can be dropped
     pipe = redis.pipeline()
+    pipe.get(_VIEWS_KEY)
     for key in keys:
         pipe.hgetall(key)
-    all_data = await pipe.execute()
+    previous_views, *all_data = await pipe.execute()
 
-    # Step 3: Collect raw entries, filtering by category
-    raw_entries: list[tuple[str, str, dict]] = []  # (redis_key, title, data)
+    # Step 3: Decode and collect raw entries
+    raw_entries: list[tuple[str, str, dict]] = []  # (redis_key, title, market record)
     title_categories: dict[str, str] = {}
     title_platforms: dict[str, str] = {}  # {title: platform_slug} for first occurrence
 
     for key, data in zip(keys, all_data):
-        if not data:
+        market = decode_live_market(data)
+        if market is None:
             continue
-        title = data.get("market_title", "")
+        title = market["market_title"]
         if not title:
             continue
-        mkt_category = data.get("category", "")
-        if category and mkt_category.lower() != category.lower():
-            continue
-        raw_entries.append((key, title, data))
+        raw_entries.append((key, title, market))
         if title not in title_categories:
-            title_categories[title] = mkt_category
-            title_platforms[title] = data.get("platform", "")
+            title_categories[title] = market["category"]
+            title_platforms[title] = market["platform"]
 
-    if not raw_entries:
-        return {"data": [], "meta": {"page": page, "per_page": per_page, "total": 0, "total_pages": 0}}
+    views: dict[str, list[dict]] = {ALL_VIEW: []}
+    if raw_entries:
+        # Step 4: Resolve canonical titles (incremental, platform-aware fuzzy clustering)
+        all_titles = list(title_categories.keys())
+        canonical_map = await title_clusters.resolve(redis, all_titles, title_categories, title_platforms)
 
-    # Step 4: Build or load canonical title map (platform-aware fuzzy clustering)
-    all_titles = list(title_categories.keys())
-    canonical_map = await _get_or_build_canonical_map(
-        redis, all_titles, title_categories, title_platforms
-    )
+        # Step 5: Group by canonical title for every view in the CPU offload pool
+        # (rebuilds are already single-flighted, see _rebuilds and _LOCK_KEY)
+        views = await offloader.submit(build_market_views, raw_entries, canonical_map)
 
-    # Step 5: Group by canonical title
-    markets: dict[str, dict] = {}
-    for key, title, data in raw_entries:
-        canonical = canonical_map.get(title, title)
-
-        parts = key.split(":", 3)
-        market_id = parts[3] if len(parts) > 3 else ""
-        platform = data.get("platform", "unknown")
-        platform_url = data.get("market_url", "")
-        if platform == "kalshi":
-            platform_url = _fix_kalshi_url(platform_url)
-        mkt_category = data.get("category", "")
-
-        if canonical not in markets:
-            markets[canonical] = {
-                "market_id": market_id,
-                "market_title": canonical,
-                "category": mkt_category,
-                "market_url": platform_url,
-                "platforms": [],
-            }
-        elif not markets[canonical]["market_url"] and platform_url:
-            markets[canonical]["market_url"] = platform_url
-        outcomes = []
-        i = 0
-        while f"outcome_{i}_name" in data:
-            outcomes.append({
-                "outcome_index": i,
-                "outcome_name": data.get(f"outcome_{i}_name", ""),
-                "price": float(data.get(f"outcome_{i}_price", 0)),
-                "implied_prob": float(data.get(f"outcome_{i}_implied", 0)),
-                "outcome_type": data.get(f"outcome_{i}_type", "binary"),
-            })
-            i += 1
-
-        entry = {
-            "platform_slug": platform,
-            "market_title": title,  # original per-platform title for reference
-            "outcomes": outcomes,
-            "market_url": platform_url,
-            "volume_24h": float(data["volume_24h"]) if data.get("volume_24h") else None,
-            "liquidity_usd": float(data["liquidity_usd"]) if data.get("liquidity_usd") else None,
-            "updated_at": data.get("updated_at"),
-        }
-
-        # Deduplicate: if this platform already has an entry in the group,
-        # keep the one with the most recent updated_at (same market listed
-        # in multiple Kalshi events, for example).
-        existing_idx = None
-        for idx, existing in enumerate(markets[canonical]["platforms"]):
-            if existing["platform_slug"] == platform:
-                existing_idx = idx
-                break
-        if existing_idx is not None:
-            old_ts = markets[canonical]["platforms"][existing_idx].get("updated_at", "")
-            new_ts = entry.get("updated_at", "")
-            if new_ts > old_ts:
-                markets[canonical]["platforms"][existing_idx] = entry
-        else:
-            markets[canonical]["platforms"].append(entry)
-
-    # Sort: multi-platform markets first, then by number of platforms desc
-    all_markets = sorted(markets.values(), key=lambda m: len(m["platforms"]), reverse=True)
-
-    # Cache the full sorted list for 30s
+    # Cache every view with its pre-serialised pages, drop pages and views
+    # that no longer exist, and refresh the sibling index for each group
     try:
-        await redis.set(cache_key, orjson.dumps(all_markets), ex=_RESPONSE_CACHE_TTL)
-    except Exception:
-        pass
-
-    total = len(all_markets)
-    start = (page - 1) * per_page
-    end = start + per_page
-    return {
-        "data": all_markets[start:end],
-        "meta": {
-            "page": page,
-            "per_page": per_page,
-            "total": total,
-            "total_pages": (total + per_page - 1) // per_page,
-        },
-    }
+        page_counts: dict[str, int] = {}
+        pipe = redis.pipeline()
+        for view, markets in views.items():
+            total = len(markets)
+            page_counts[view] = (total + PAGE_SIZE - 1) // PAGE_SIZE
+            pipe.set(_response_key(view), orjson.dumps(markets), ex=_RESPONSE_STALE_TTL)
+            pipe.set(_total_key(view), total, ex=_RESPONSE_STALE_TTL)
+            for page in range(1, page_counts[view] + 1):
+                start = (page - 1) * PAGE_SIZE
+                body = _page_response(markets[start:start + PAGE_SIZE], page, PAGE_SIZE, total)
+                pipe.set(_page_key(view, page), orjson.dumps(body), ex=_RESPONSE_STALE_TTL)
+        previous = orjson.loads(previous_views) if previous_views else {}
+        if not isinstance(previous, dict):  # list of view names written by older builds
+            previous = dict.fromkeys(previous, 0)
+        for view, old_pages in previous.items():
+            if view not in views:
+                pipe.delete(_response_key(view), _total_key(view))
+            for page in range(page_counts.get(view, 0) + 1, old_pages + 1):
+                pipe.delete(_page_key(view, page))
+        pipe.set(_VIEWS_KEY, orjson.dumps(page_counts), ex=_RESPONSE_STALE_TTL)
+        category_counts = _count_categories(views[ALL_VIEW])
+        pipe.set(_CATEGORIES_KEY, orjson.dumps(category_counts), ex=_RESPONSE_STALE_TTL)
+        pipe.incr(_GENERATION_KEY)
+        pipe.set(_FRESH_KEY, 1, ex=_RESPONSE_FRESH_TTL)
+        for market in views[ALL_VIEW]:
+            index_siblings(
+                pipe,
+                [live_key(p["platform_slug"], p["market_id"]) for p in market["platforms"]],
+            )
+        await pipe.execute()
+    except Exception as e:
+        logger.warning("Odds response cache write failed", error=str(e))
+
+    return views
+
+
+def _count_categories(markets: list[dict]) -> list[dict]:
+    counts = Counter(m.get("category", "unknown") for m in markets)
+    return sorted(
+        [{"category": cat, "count": cnt} for cat, cnt in counts.items()],
+        key=lambda x: x["count"],
+        reverse=True,
+    )
 
 
 async def get_odds_history(
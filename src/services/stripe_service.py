@@ -8,6 +8,8 @@ from src.core.config import settings
 from src.models.affiliate import Affiliate, AffiliateConversion
 from src.models.subscription import Subscription, SubscriptionTier
 from src.models.user import User
+from src.services.notification_service import invalidate_recipients
+from src.services.user_service import invalidate_principal
 
 logger = structlog.get_logger()
 
@@ -76,18 +78,28 @@ async def handle_webhook_event(db: AsyncSession, event: dict) -> None:
 
     logger.info("Stripe webhook received", event_type=event_type)
 
+    retiered: User | None = None  # user whose tier the event changed
     if event_type == "checkout.session.completed":
-        await _handle_checkout_completed(db, data)
+        retiered = await _handle_checkout_completed(db, data)
     elif event_type == "customer.subscription.updated":
-        await _handle_subscription_updated(db, data)
+        retiered = await _handle_subscription_updated(db, data)
     elif event_type == "customer.subscription.deleted":
-        await _handle_subscription_deleted(db, data)
+        retiered = await _handle_subscription_deleted(db, data)
     elif event_type == "invoice.payment_failed":
         await _handle_payment_failed(db, data)
 
+    if retiered is not None:
+        # Commit before invalidating, or a concurrent rebuild could re-cache the old tier
+        await db.commit()
+        await invalidate_principal(retiered.firebase_uid)
+        await invalidate_recipients()
 
-async def _handle_checkout_completed(db: AsyncSession, session_data: dict) -> None:
-    """Handle successful checkout — create/update subscription record."""
+
+async def _handle_checkout_completed(db: AsyncSession, session_data: dict) -> User | None:
+    """Handle successful checkout — create/update subscription record.
+
+    Returns the upgraded user.
+    """
     user_id = session_data.get("metadata", {}).get("user_id")
     tier_slug = session_data.get("metadata", {}).get("tier_slug", "pro")
     customer_id = session_data.get("customer")
@@ -95,7 +107,7 @@ async def _handle_checkout_completed(db: AsyncSession, session_data: dict) -> No
 
     if not user_id:
         logger.warning("Checkout completed without user_id in metadata")
-        return
+        return None
 
     # Look up tier
     tier_result = await db.execute(
@@ -104,14 +116,14 @@ async def _handle_checkout_completed(db: AsyncSession, session_data: dict) -> No
     tier = tier_result.scalar_one_or_none()
     if not tier:
         logger.error("Unknown tier slug in checkout", tier_slug=tier_slug)
-        return
+        return None
 
     # Look up user
     user_result = await db.execute(select(User).where(User.id == user_id))
     user = user_result.scalar_one_or_none()
     if not user:
         logger.error("User not found for checkout", user_id=user_id)
-        return
+        return None
 
     # Create or update subscription
     existing = await db.execute(select(Subscription).where(Subscription.user_id == user_id))
@@ -174,9 +186,11 @@ async def _handle_checkout_completed(db: AsyncSession, session_data: dict) -> No
         except Exception as e:
             logger.error("Failed to record affiliate conversion", error=str(e))
 
+    return user
+
 
-async def _handle_subscription_updated(db: AsyncSession, sub_data: dict) -> None:
-    """Handle subscription status changes."""
+async def _handle_subscription_updated(db: AsyncSession, sub_data: dict) -> User | None:
+    """Handle subscription status changes; returns the user if moved to free."""
     stripe_sub_id = sub_data.get("id")
     status = sub_data.get("status", "")
 
@@ -185,7 +199,7 @@ async def _handle_subscription_updated(db: AsyncSession, sub_data: dict) -> None
     )
     sub = result.scalar_one_or_none()
     if not sub:
-        return
+        return None
 
     sub.status = status
     sub.cancel_at_period_end = sub_data.get("cancel_at_period_end", False)
@@ -197,11 +211,13 @@ async def _handle_subscription_updated(db: AsyncSession, sub_data: dict) -> None
         user = user_result.scalar_one_or_none()
         if user:
             user.tier = "free"
+            return user
+    return None
 
 
-async def _handle_subscription_deleted(db: AsyncSession, sub_data: dict) -> None:
+async def _handle_subscription_deleted(db: AsyncSession, sub_data: dict) -> User | None:
     """Handle subscription cancellation."""
-    await _handle_subscription_updated(db, {**sub_data, "status": "canceled"})
+    return await _handle_subscription_updated(db, {**sub_data, "status": "canceled"})
 
 
 async def _handle_payment_failed(db: AsyncSession, invoice_data: dict) -> None:
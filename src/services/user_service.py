@@ -1,15 +1,181 @@
 """User creation, sync, and management."""
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
 
+import orjson
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 import structlog
 
+from src.core.database import async_session_factory
+from src.core.redis import get_redis
 from src.models.user import User
 from src.services.hubspot_service import create_hubspot_contact
 
 logger = structlog.get_logger()
 
+# Principals are cached in Redis (shared by every replica) and, briefly, in
+# process.  Invalidation clears Redis and this process, and is published on
+# PRINCIPAL_CHANNEL so every other process drops its local copy too.  If that
+# message is lost, a local copy is still stale for at most PRINCIPAL_LOCAL_TTL.
+PRINCIPAL_TTL = 60
+PRINCIPAL_LOCAL_TTL = 5
+PRINCIPAL_CACHE_SIZE = 10_000
+PRINCIPAL_CHANNEL = "auth:principal:invalidate"
+RESUBSCRIBE_DELAY = 1.0
+_PRINCIPAL_FIELDS = (
+    "id", "firebase_uid", "tier", "is_active", "is_admin",
+    "market_alerts", "live_data_stream", "hide_onboarding_tip",
+)
+_PREFERENCE_FIELDS = {"market_alerts", "live_data_stream", "hide_onboarding_tip"}
+
+# firebase_uid -> (principal, monotonic expiry)
+_principals: OrderedDict[str, tuple["UserPrincipal", float]] = OrderedDict()
+
+
+def _principal_key(firebase_uid: str) -> str:
+    return f"auth:principal:{firebase_uid}"
+
+
+@dataclass(frozen=True, slots=True)
+class UserPrincipal:
+    """The parts of a user that auth, tier gating and notifications read.
+
+    Cheap to cache and rebuild; endpoints that need the full profile or its
+    subscription still load ``User`` via ``get_current_user``.
+    """
+
+    id: uuid.UUID
+    firebase_uid: str
+    tier: str
+    is_active: bool
+    is_admin: bool
+    market_alerts: bool
+    live_data_stream: bool
+    hide_onboarding_tip: bool
+
+    @classmethod
+    def from_row(cls, row) -> "UserPrincipal":
+        return cls(
+            id=row.id,
+            firebase_uid=row.firebase_uid,
+            tier=row.tier,
+            is_active=row.is_active,
+            is_admin=row.is_admin,
+            market_alerts=bool(row.market_alerts),
+            live_data_stream=bool(row.live_data_stream),
+            hide_onboarding_tip=bool(row.hide_onboarding_tip),
+        )
+
+    def dumps(self) -> bytes:
+        return orjson.dumps({**asdict(self), "id": str(self.id)})
+
+    @classmethod
+    def loads(cls, raw: str | bytes) -> "UserPrincipal":
+        data = orjson.loads(raw)
+        data["id"] = uuid.UUID(data["id"])
+        return cls(**data)
+
+
+def _remember(principal: "UserPrincipal") -> None:
+    _principals[principal.firebase_uid] = (principal, time.monotonic() + PRINCIPAL_LOCAL_TTL)
+    _principals.move_to_end(principal.firebase_uid)
+    while len(_principals) > PRINCIPAL_CACHE_SIZE:
+        _principals.popitem(last=False)
+
+
+async def get_principal(firebase_uid: str) -> UserPrincipal | None:
+    """The principal for a Firebase user, or None if they have not synced yet.
+
+    Served from process memory, then Redis; a miss costs one column-only
+    query (no subscription / affiliate loads).  Unknown users are not cached
+    so a first ``/auth/sync`` takes effect immediately.
+    """
+    entry = _principals.get(firebase_uid)
+    if entry is not None and entry[1] > time.monotonic():
+        return entry[0]
+
+    redis = await get_redis()
+    key = _principal_key(firebase_uid)
+    try:
+        raw = await redis.get(key)
+    except Exception as e:
+        logger.warning("Principal cache read failed", error=str(e))
+        raw = None
+    if raw:
+        principal = UserPrincipal.loads(raw)
+        _remember(principal)
+        return principal
+
+    async with async_session_factory() as session:
+        result = await session.execute(
+            select(*(getattr(User, f) for f in _PRINCIPAL_FIELDS))
+            .where(User.firebase_uid == firebase_uid)
+        )
+        row = result.one_or_none()
+    if row is None:
+        _principals.pop(firebase_uid, None)
+        return None
+
+    principal = UserPrincipal.from_row(row)
+    try:
+        await redis.set(key, principal.dumps(), ex=PRINCIPAL_TTL)
+    except Exception as e:
+        logger.warning("Principal cache write failed", error=str(e))
+    _remember(principal)
+    return principal
+
+
+async def invalidate_principal(firebase_uid: str) -> None:
+    """Drop a user's cached principal after changing their tier, flags or preferences.
+
+    Call after committing the change, or a concurrent miss can re-cache the
+    old row.
+    """
+    _principals.pop(firebase_uid, None)
+    try:
+        redis = await get_redis()
+        pipe = redis.pipeline(transaction=False)
+        pipe.delete(_principal_key(firebase_uid))
+        pipe.publish(PRINCIPAL_CHANNEL, firebase_uid)
+        await pipe.execute()
+    except Exception as e:
+        logger.warning("Could not invalidate user principal", error=str(e))
+
+
+async def listen_principal_invalidations(redis) -> None:
+    """Drop local principals that another process invalidated; run once per process.
+
+    While the subscription is down, messages are lost, so the whole local
+    cache is cleared whenever it is (re)established.
+    """
+    while True:
+        pubsub = redis.pubsub()
+        try:
+            await pubsub.subscribe(PRINCIPAL_CHANNEL)
+            _principals.clear()
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                uid = message.get("data", "")
+                if isinstance(uid, bytes):
+                    uid = uid.decode()
+                _principals.pop(uid, None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Principal invalidation listener error", error=str(e))
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+        await asyncio.sleep(RESUBSCRIBE_DELAY)
+
 
 async def sync_user(
     db: AsyncSession,
@@ -80,6 +246,14 @@ async def update_user(
         if field in allowed_fields and value is not None:
             setattr(user, field, value)
 
+    if any(kwargs.get(field) is not None for field in _PREFERENCE_FIELDS):
+        # Commit first so nothing re-caches the old row after invalidation
+        await db.commit()
+        await invalidate_principal(user.firebase_uid)
+        if kwargs.get("market_alerts") is not None:
+            from src.services.notification_service import invalidate_recipients
+            await invalidate_recipients()
+
     # Update HubSpot with new profile data if we have a contact ID
     if user.hubspot_contact_id and any(
         k in kwargs for k in ("last_name", "phone", "zip")
@@ -1,32 +1,118 @@
 """Periodic cleanup tasks — prune old odds snapshots, expire stale data."""
 import structlog
-from datetime import datetime, timedelta, timezone
-from sqlalchemy import delete, select, func
+from datetime import date, datetime, time, timedelta, timezone
+from sqlalchemy import select, func, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.database import async_session_factory
-from src.models.odds import OddsSnapshot
 from src.models.market import Market
 
 logger = structlog.get_logger()
 
 # Keep 7 days of odds history for pro users
 ODDS_RETENTION_DAYS = 7
+# Daily odds_snapshots partitions are created this many days ahead
+ODDS_PARTITION_DAYS_AHEAD = 3
+ODDS_PARTITION_PREFIX = "odds_snapshots_p"
+ODDS_DEFAULT_PARTITION = "odds_snapshots_default"
+# Partition DDL waits at most this long for locks; it is retried next run
+PARTITION_LOCK_TIMEOUT = "5s"
 # Markets with no updates in 30 days get marked inactive
 MARKET_STALE_DAYS = 30
 
 
+def _partition_bound(day: date) -> str:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc).isoformat(sep=" ")
+
+
+async def _odds_partitions(session: AsyncSession) -> dict[date, str]:
+    """Existing daily odds_snapshots partitions, by day."""
+    result = await session.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'odds_snapshots'::regclass"
+    ))
+    partitions = {}
+    for (name,) in result.all():
+        if name.startswith(ODDS_PARTITION_PREFIX):
+            day = datetime.strptime(name.removeprefix(ODDS_PARTITION_PREFIX), "%Y%m%d").date()
+            partitions[day] = name
+    return partitions
+
+
+async def ensure_odds_partitions(days_ahead: int = ODDS_PARTITION_DAYS_AHEAD) -> int:
+    """Create the daily odds_snapshots partitions for today and the next few days.
+
+    Rows already sitting in the default partition for a new day (the
+    scheduler was down) are moved into it, since Postgres refuses to create
+    a partition whose range the default partition still holds.
+    """
+    today = datetime.now(timezone.utc).date()
+    created = 0
+    async with async_session_factory() as session:
+        existing = await _odds_partitions(session)
+        for offset in range(days_ahead + 1):
+            day = today + timedelta(days=offset)
+            if day in existing:
+                continue
+            lower = datetime.combine(day, time.min, tzinfo=timezone.utc)
+            await session.execute(text(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'"))
+            await session.execute(text(
+                "CREATE TEMP TABLE moved_odds (LIKE odds_snapshots) ON COMMIT DROP"
+            ))
+            await session.execute(
+                text(
+                    f"WITH moved AS (DELETE FROM {ODDS_DEFAULT_PARTITION} "
+                    "WHERE captured_at >= :lower AND captured_at < :upper RETURNING *) "
+                    "INSERT INTO moved_odds SELECT * FROM moved"
+                ),
+                {"lower": lower, "upper": lower + timedelta(days=1)},
+            )
+            await session.execute(text(
+                f"CREATE TABLE {ODDS_PARTITION_PREFIX}{day:%Y%m%d} PARTITION OF odds_snapshots "
+                f"FOR VALUES FROM ('{_partition_bound(day)}') "
+                f"TO ('{_partition_bound(day + timedelta(days=1))}')"
+            ))
+            await session.execute(text("INSERT INTO odds_snapshots SELECT * FROM moved_odds"))
+            await session.commit()
+            created += 1
+    if created:
+        logger.info("Created odds snapshot partitions", created=created)
+    return created
+
+
 async def prune_old_odds():
-    """Delete odds snapshots older than retention period."""
+    """Drop odds snapshot partitions older than retention period.
+
+    A whole day goes at once as a catalog change, so there is no bulk DELETE
+    to bloat the table or vacuum afterwards.  Only stragglers in the default
+    partition are deleted row by row.
+    """
     cutoff = datetime.now(timezone.utc) - timedelta(days=ODDS_RETENTION_DAYS)
+    dropped = 0
     async with async_session_factory() as session:
+        partitions = await _odds_partitions(session)
+        for day, name in sorted(partitions.items()):
+            # Drop only days that ended before the cutoff
+            if datetime.combine(day + timedelta(days=1), time.min, tzinfo=timezone.utc) > cutoff:
+                break
+            await session.execute(text(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'"))
+            await session.execute(text(f"DROP TABLE {name}"))
+            await session.commit()
+            dropped += 1
+
         result = await session.execute(
-            delete(OddsSnapshot).where(OddsSnapshot.captured_at < cutoff)
+            text(f"DELETE FROM {ODDS_DEFAULT_PARTITION} WHERE captured_at < :cutoff"),
+            {"cutoff": cutoff},
         )
         deleted = result.rowcount
         await session.commit()
-        if deleted:
-            logger.info("Pruned old odds snapshots", deleted=deleted, cutoff=cutoff.isoformat())
+    if dropped or deleted:
+        logger.info(
+            "Pruned old odds snapshots",
+            partitions_dropped=dropped,
+            deleted=deleted,
+            cutoff=cutoff.isoformat(),
+        )
 
 
 async def mark_stale_markets():
@@ -47,9 +133,29 @@ async def mark_stale_markets():
             logger.info("Marked stale markets inactive", count=len(stale))
 
 
+async def purge_legacy_notifications(redis) -> int:
+    """Delete the per-user notification lists and unread counters.
+
+    Notifications now live in one shared log (see notification_service);
+    users who read theirs drop these keys themselves, this catches the rest.
+    """
+    deleted = 0
+    stale: list[str] = []
+    async for key in redis.scan_iter(match="notifications:*", _type="list", count=1000):
+        stale.append(key)
+    async for key in redis.scan_iter(match="notifications:*:unread", count=1000):
+        stale.append(key)
+    for start in range(0, len(stale), 500):
+        deleted += await redis.delete(*stale[start:start + 500])
+    if deleted:
+        logger.info("Purged legacy notification keys", deleted=deleted)
+    return deleted
+
+
 async def run_all_cleanup():
     """Run all cleanup tasks."""
     logger.info("Running scheduled cleanup")
+    await ensure_odds_partitions()
     await prune_old_odds()
     await mark_stale_markets()
     logger.info("Cleanup complete")
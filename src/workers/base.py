@@ -1,16 +1,35 @@
 """Abstract base class for all ingestion workers."""
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
-from datetime import datetime, timezone
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING
 
 import structlog
 
+if TYPE_CHECKING:
+    from src.workers.batch import OddsBatch
+
 logger = structlog.get_logger()
 
 
-@dataclass
+# Outcome list shared by every Yes/No market instead of one list per outcome
+BINARY_OUTCOMES: tuple[dict, ...] = (
+    {"name": "Yes", "index": 0},
+    {"name": "No", "index": 1},
+)
+
+
+@dataclass(slots=True)
 class RawOddsData:
-    """Raw odds data from a single platform for one market outcome."""
+    """Odds from a single platform for one market outcome.
+
+    Workers fill the raw fields; ``normalize_batch`` then sets
+    ``implied_prob`` and ``captured_at`` in place, so the same object is
+    published as ``NormalizedOdds``.  Per-market values (title, URL,
+    description, outcomes_json) should be shared across a market's outcomes
+    rather than rebuilt per outcome.
+    """
     external_market_id: str
     market_title: str
     category: str
@@ -28,32 +47,14 @@ class RawOddsData:
     market_url: str | None = None
     market_description: str | None = None
     end_date: datetime | None = None
-    outcomes_json: list[dict] = field(default_factory=list)
-    captured_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    outcomes_json: Sequence[dict] = ()
+    implied_prob: float = 0.0  # Normalized 0.0-1.0, set by normalize_batch
+    captured_at: datetime | None = None  # Stamped once per batch by normalize_batch
 
 
-@dataclass
-class NormalizedOdds:
-    """Odds normalized to implied probability (0.0 to 1.0)."""
-    external_market_id: str
-    market_title: str
-    category: str
-    platform_slug: str
-    outcome_index: int
-    outcome_name: str
-    price: float  # Original price
-    implied_prob: float  # Normalized 0.0-1.0
-    outcome_type: str = "binary"  # 'binary', 'moneyline', or 'implied'
-    bid: float | None = None
-    ask: float | None = None
-    volume_24h: float | None = None
-    volume_usd: float | None = None
-    liquidity_usd: float | None = None
-    market_url: str | None = None
-    market_description: str | None = None
-    end_date: datetime | None = None
-    outcomes_json: list[dict] = field(default_factory=list)
-    captured_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+# Odds normalized to implied probability (0.0 to 1.0): a RawOddsData that has
+# been through normalize_batch
+NormalizedOdds = RawOddsData
 
 
 class BaseIngestionWorker(ABC):
@@ -73,8 +74,12 @@ class BaseIngestionWorker(ABC):
         """Establish connection to the data source."""
 
     @abstractmethod
-    async def fetch_markets(self) -> list[RawOddsData]:
-        """Fetch current markets and their odds from the platform."""
+    async def fetch_markets(self) -> "list[RawOddsData] | OddsBatch":
+        """Fetch current markets and their odds from the platform.
+
+        High-volume workers should build an ``OddsBatch`` with
+        ``OddsBatchBuilder`` rather than a list of per-row records.
+        """
 
     async def run(self) -> None:
         """Main loop: connect, fetch, normalize, publish, repeat."""
@@ -82,15 +87,23 @@ class BaseIngestionWorker(ABC):
         await self.connect()
         self._running = True
 
+        from src.workers.publisher import PublishCache
+
+        # What this worker last published, so unchanged outcomes are skipped
+        published = PublishCache()
+
         while self._running:
             try:
                 raw_odds = await self.fetch_markets()
                 if raw_odds:
+                    from src.workers.batch import OddsBatch
                     from src.workers.normalizer import normalize_batch
                     from src.workers.publisher import publish_odds
 
+                    if not isinstance(raw_odds, OddsBatch):
+                        raw_odds = OddsBatch.from_records(raw_odds)
                     normalized = normalize_batch(raw_odds)
-                    await publish_odds(self.redis, normalized)
+                    await publish_odds(self.redis, normalized, cache=published)
                     self.logger.info(
                         "Published odds",
                         count=len(normalized),
@@ -0,0 +1,213 @@
+"""Columnar odds batches — one poll of a platform as parallel arrays.
+
+A worker poll can carry tens of thousands of outcome rows.  Holding them as
+one ``RawOddsData`` object per row means one Python object, one normaliser
+call and one stream entry per row; ``OddsBatch`` keeps the numeric fields in
+NumPy arrays (normalised in one vectorised pass, see
+``normalizer.normalize_batch``) and the string fields in lists of shared,
+interned strings.
+
+Missing optional numbers (bid, ask, volumes, liquidity) are NaN.
+"""
+import sys
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from typing import NamedTuple
+
+import numpy as np
+
+from src.workers.base import RawOddsData
+
+# price_format codes; formats not listed here are treated as probabilities,
+# exactly as normalize_price does
+PROBABILITY = 0
+CENTS = 1
+AMERICAN_POSITIVE = 2
+AMERICAN_NEGATIVE = 3
+DECIMAL = 4
+PRICE_FORMAT_CODES = {
+    "probability": PROBABILITY,
+    "cents": CENTS,
+    "american_positive": AMERICAN_POSITIVE,
+    "american_negative": AMERICAN_NEGATIVE,
+    "decimal": DECIMAL,
+}
+
+_STRING_COLUMNS = (
+    "external_market_id",
+    "market_title",
+    "category",
+    "platform_slug",
+    "outcome_name",
+    "outcome_type",
+    "market_url",
+)
+_OPTIONAL_COLUMNS = ("bid", "ask", "volume_24h", "volume_usd", "liquidity_usd")
+
+
+class OddsRow(NamedTuple):
+    """One outcome of a batch as Python scalars; optional numbers are None."""
+
+    external_market_id: str
+    market_title: str
+    category: str
+    platform_slug: str
+    outcome_index: int
+    outcome_name: str
+    outcome_type: str
+    market_url: str
+    price: float
+    implied_prob: float
+    bid: float | None
+    ask: float | None
+    volume_24h: float | None
+    volume_usd: float | None
+    liquidity_usd: float | None
+
+
+def _or_nan(value: float | None) -> float:
+    return np.nan if value is None else value
+
+
+@dataclass(slots=True)
+class OddsBatch:
+    """One platform poll as columns; row ``i`` is one market outcome."""
+
+    external_market_id: list[str]
+    market_title: list[str]
+    category: list[str]
+    platform_slug: list[str]
+    outcome_name: list[str]
+    outcome_type: list[str]
+    market_url: list[str]  # "" when the platform has no link
+    outcome_index: np.ndarray  # int32
+    price: np.ndarray  # float64, platform's native format
+    price_format: np.ndarray  # int8 PRICE_FORMAT_CODES
+    bid: np.ndarray
+    ask: np.ndarray
+    volume_24h: np.ndarray
+    volume_usd: np.ndarray
+    liquidity_usd: np.ndarray
+    implied_prob: np.ndarray  # float64, filled by normalize_batch
+    captured_at: datetime | None = None  # one timestamp for the whole poll
+
+    def __len__(self) -> int:
+        return len(self.external_market_id)
+
+    def optional(self, name: str) -> list[float | None]:
+        """An optional numeric column as Python floats, None where missing."""
+        column = getattr(self, name)
+        return [None if v != v else v for v in column.tolist()]  # NaN != NaN
+
+    def rows(self) -> Iterator[OddsRow]:
+        """Iterate the batch row by row, for publishing."""
+        return map(OddsRow._make, zip(
+            self.external_market_id,
+            self.market_title,
+            self.category,
+            self.platform_slug,
+            self.outcome_index.tolist(),
+            self.outcome_name,
+            self.outcome_type,
+            self.market_url,
+            self.price.tolist(),
+            self.implied_prob.tolist(),
+            *(self.optional(name) for name in _OPTIONAL_COLUMNS),
+        ))
+
+    @classmethod
+    def from_records(cls, records: list[RawOddsData]) -> "OddsBatch":
+        """Columnise per-row records, keeping any implied_prob already set."""
+        builder = OddsBatchBuilder()
+        for r in records:
+            builder.add(
+                r.external_market_id,
+                r.market_title,
+                r.category,
+                r.platform_slug,
+                r.outcome_index,
+                r.outcome_name,
+                r.price,
+                r.price_format,
+                outcome_type=r.outcome_type,
+                bid=r.bid,
+                ask=r.ask,
+                volume_24h=r.volume_24h,
+                volume_usd=r.volume_usd,
+                liquidity_usd=r.liquidity_usd,
+                market_url=r.market_url,
+            )
+        batch = builder.build()
+        if records:
+            batch.implied_prob[:] = [r.implied_prob for r in records]
+            batch.captured_at = records[0].captured_at
+        return batch
+
+
+class OddsBatchBuilder:
+    """Append outcome rows one at a time, then ``build()`` the columns.
+
+    ``add`` takes the same fields as ``RawOddsData`` (minus the descriptive
+    ones nothing downstream reads).  Low-cardinality strings are interned so
+    a batch holds one copy of each platform, category and outcome name.
+    """
+
+    def __init__(self):
+        self._strings: dict[str, list[str]] = {name: [] for name in _STRING_COLUMNS}
+        self._outcome_index: list[int] = []
+        self._price: list[float] = []
+        self._price_format: list[int] = []
+        self._optional: dict[str, list[float]] = {name: [] for name in _OPTIONAL_COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self._price)
+
+    def add(
+        self,
+        external_market_id: str,
+        market_title: str,
+        category: str,
+        platform_slug: str,
+        outcome_index: int,
+        outcome_name: str,
+        price: float,
+        price_format: str,
+        outcome_type: str = "binary",
+        bid: float | None = None,
+        ask: float | None = None,
+        volume_24h: float | None = None,
+        volume_usd: float | None = None,
+        liquidity_usd: float | None = None,
+        market_url: str | None = None,
+    ) -> None:
+        strings = self._strings
+        strings["external_market_id"].append(external_market_id)
+        strings["market_title"].append(market_title)
+        strings["category"].append(sys.intern(category))
+        strings["platform_slug"].append(sys.intern(platform_slug))
+        strings["outcome_name"].append(sys.intern(outcome_name))
+        strings["outcome_type"].append(sys.intern(outcome_type))
+        strings["market_url"].append(market_url or "")
+        self._outcome_index.append(outcome_index)
+        self._price.append(price)
+        self._price_format.append(PRICE_FORMAT_CODES.get(price_format, PROBABILITY))
+        optional = self._optional
+        optional["bid"].append(_or_nan(bid))
+        optional["ask"].append(_or_nan(ask))
+        optional["volume_24h"].append(_or_nan(volume_24h))
+        optional["volume_usd"].append(_or_nan(volume_usd))
+        optional["liquidity_usd"].append(_or_nan(liquidity_usd))
+
+    def build(self) -> OddsBatch:
+        return OddsBatch(
+            **self._strings,
+            outcome_index=np.array(self._outcome_index, dtype=np.int32),
+            price=np.array(self._price, dtype=np.float64),
+            price_format=np.array(self._price_format, dtype=np.int8),
+            **{
+                name: np.array(values, dtype=np.float64)
+                for name, values in self._optional.items()
+            },
+            implied_prob=np.zeros(len(self._price), dtype=np.float64),
+        )
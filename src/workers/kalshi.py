@@ -14,7 +14,8 @@ from collections import Counter
 import httpx
 import structlog
 
-from src.workers.base import BaseIngestionWorker, RawOddsData
+from src.workers.base import BaseIngestionWorker
+from src.workers.batch import OddsBatch, OddsBatchBuilder
 
 logger = structlog.get_logger()
 
@@ -109,17 +110,17 @@ class KalshiWorker(BaseIngestionWorker):
         )
         self.logger.info("Connected to Kalshi API", authenticated=bool(self.api_key))
 
-    async def fetch_markets(self) -> list[RawOddsData]:
+    async def fetch_markets(self) -> OddsBatch:
         """Fetch active markets via /events endpoint with nested markets.
 
         The events endpoint provides structured access to all Kalshi markets
         with proper categories, bypassing the 3000+ sports parlays that
         dominate the flat /markets endpoint.
         """
+        results = OddsBatchBuilder()
         if not self.client:
-            return []
+            return results.build()
 
-        results: list[RawOddsData] = []
         event_count = 0
 
         try:
@@ -191,46 +192,39 @@ class KalshiWorker(BaseIngestionWorker):
                         if not title:
                             continue
 
-                        outcomes_json = [
-                            {"name": "Yes", "index": 0},
-                            {"name": "No", "index": 1},
-                        ]
+                        # Shared by both outcomes of the market
+                        market_url = f"https://kalshi.com/markets/{series_ticker or ticker.lower()}"
+                        volume_24h = _safe_float(market.get("volume_24h"))
+
+                        results.add(
+                            external_market_id=ticker,
+                            market_title=title,
+                            category=category,
+                            platform_slug=self.platform_slug,
+                            outcome_index=0,
+                            outcome_name="Yes",
+                            price=float(yes_price),
+                            price_format="cents",
+                            bid=_safe_float(market.get("yes_bid")),
+                            ask=_safe_float(market.get("yes_ask")),
+                            volume_24h=volume_24h,
+                            market_url=market_url,
+                        )
 
-                        results.append(
-                            RawOddsData(
+                        if no_price is not None:
+                            results.add(
                                 external_market_id=ticker,
                                 market_title=title,
                                 category=category,
                                 platform_slug=self.platform_slug,
-                                outcome_index=0,
-                                outcome_name="Yes",
-                                price=float(yes_price),
+                                outcome_index=1,
+                                outcome_name="No",
+                                price=float(no_price),
                                 price_format="cents",
-                                bid=_safe_float(market.get("yes_bid")),
-                                ask=_safe_float(market.get("yes_ask")),
-                                volume_24h=_safe_float(market.get("volume_24h")),
-                                market_url=f"https://kalshi.com/markets/{series_ticker or ticker.lower()}",
-                                outcomes_json=outcomes_json,
-                            )
-                        )
-
-                        if no_price is not None:
-                            results.append(
-                                RawOddsData(
-                                    external_market_id=ticker,
-                                    market_title=title,
-                                    category=category,
-                                    platform_slug=self.platform_slug,
-                                    outcome_index=1,
-                                    outcome_name="No",
-                                    price=float(no_price),
-                                    price_format="cents",
-                                    bid=_safe_float(market.get("no_bid")),
-                                    ask=_safe_float(market.get("no_ask")),
-                                    volume_24h=_safe_float(market.get("volume_24h")),
-                                    market_url=f"https://kalshi.com/markets/{series_ticker or ticker.lower()}",
-                                    outcomes_json=outcomes_json,
-                                )
+                                bid=_safe_float(market.get("no_bid")),
+                                ask=_safe_float(market.get("no_ask")),
+                                volume_24h=volume_24h,
+                                market_url=market_url,
                             )
 
                 cursor = data.get("cursor")
@@ -249,7 +243,7 @@ class KalshiWorker(BaseIngestionWorker):
             events=event_count,
             markets=len(results) // 2,
         )
-        return results
+        return results.build()
 
     def stop(self) -> None:
         super().stop()
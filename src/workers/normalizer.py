@@ -1,5 +1,16 @@
 """Normalize raw odds from any platform format to implied probability (0.0-1.0)."""
+from datetime import datetime, timezone
+
+import numpy as np
+
 from src.workers.base import NormalizedOdds, RawOddsData
+from src.workers.batch import (
+    AMERICAN_NEGATIVE,
+    AMERICAN_POSITIVE,
+    CENTS,
+    DECIMAL,
+    OddsBatch,
+)
 
 
 def normalize_price(price: float, price_format: str) -> float:
@@ -32,32 +43,50 @@ def normalize_price(price: float, price_format: str) -> float:
             return max(0.0, min(1.0, price))
 
 
-def normalize_batch(raw_odds: list[RawOddsData]) -> list[NormalizedOdds]:
-    """Normalize a batch of raw odds to implied probability."""
-    results = []
+def normalize_prices(prices: np.ndarray, formats: np.ndarray) -> np.ndarray:
+    """Vectorised ``normalize_price`` over a price column and its format codes.
+
+    Gives the same result as calling ``normalize_price`` per row, including
+    its clamping and fallbacks (fmin/fmax treat NaN the way min/max do).
+    """
+    implied = np.fmax(0.0, np.fmin(1.0, prices))  # probability and unknown formats
+
+    mask = formats == CENTS
+    implied[mask] = np.fmax(0.0, np.fmin(1.0, prices[mask] / 100.0))
+
+    # Fallback rows divide by zero before np.where discards them
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mask = formats == AMERICAN_POSITIVE
+        p = prices[mask]
+        implied[mask] = np.where(p <= 0, 0.5, 100.0 / (p + 100.0))
+
+        mask = formats == AMERICAN_NEGATIVE
+        p = np.abs(prices[mask])
+        implied[mask] = np.where(p <= 0, 0.5, p / (p + 100.0))
+
+        mask = formats == DECIMAL
+        p = prices[mask]
+        implied[mask] = np.where(p <= 0, 0.0, 1.0 / p)
+    return implied
+
+
+def normalize_batch(
+    raw_odds: list[RawOddsData] | OddsBatch,
+) -> list[NormalizedOdds] | OddsBatch:
+    """Normalize a batch of raw odds to implied probability.
+
+    Fills ``implied_prob`` in place and stamps the whole batch with one
+    ``captured_at``; returns the same batch.  An ``OddsBatch`` is converted
+    in one vectorised pass.
+    """
+    captured_at = datetime.now(timezone.utc)
+    if isinstance(raw_odds, OddsBatch):
+        raw_odds.implied_prob = normalize_prices(raw_odds.price, raw_odds.price_format)
+        if raw_odds.captured_at is None:
+            raw_odds.captured_at = captured_at
+        return raw_odds
     for raw in raw_odds:
-        implied = normalize_price(raw.price, raw.price_format)
-        results.append(
-            NormalizedOdds(
-                external_market_id=raw.external_market_id,
-                market_title=raw.market_title,
-                category=raw.category,
-                platform_slug=raw.platform_slug,
-                outcome_index=raw.outcome_index,
-                outcome_name=raw.outcome_name,
-                price=raw.price,
-                implied_prob=implied,
-                outcome_type=raw.outcome_type,
-                bid=raw.bid,
-                ask=raw.ask,
-                volume_24h=raw.volume_24h,
-                volume_usd=raw.volume_usd,
-                liquidity_usd=raw.liquidity_usd,
-                market_url=raw.market_url,
-                market_description=raw.market_description,
-                end_date=raw.end_date,
-                outcomes_json=raw.outcomes_json,
-                captured_at=raw.captured_at,
-            )
-        )
-    return results
+        raw.implied_prob = normalize_price(raw.price, raw.price_format)
+        if raw.captured_at is None:
+            raw.captured_at = captured_at
+    return raw_odds
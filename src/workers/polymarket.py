@@ -2,7 +2,8 @@
 import httpx
 import structlog
 
-from src.workers.base import BaseIngestionWorker, RawOddsData
+from src.workers.base import BaseIngestionWorker
+from src.workers.batch import OddsBatch, OddsBatchBuilder
 
 logger = structlog.get_logger()
 
@@ -68,12 +69,11 @@ class PolymarketWorker(BaseIngestionWorker):
         self.client = httpx.AsyncClient(timeout=30)
         self.logger.info("Connected to Polymarket Gamma API")
 
-    async def fetch_markets(self) -> list[RawOddsData]:
+    async def fetch_markets(self) -> OddsBatch:
         """Fetch active events and their markets from Gamma API."""
+        results = OddsBatchBuilder()
         if not self.client:
-            return []
-
-        results: list[RawOddsData] = []
+            return results.build()
 
         try:
             # Fetch active events with their markets
@@ -89,6 +89,7 @@ class PolymarketWorker(BaseIngestionWorker):
                 event_title = event.get("title", "")
                 tags = event.get("tags", [])
                 category = classify_category(event_title, tags)
+                market_url = f"https://polymarket.com/event/{event.get('slug', '')}"
 
                 for market in markets:
                     market_id = market.get("conditionId") or market.get("id", "")
@@ -119,10 +120,9 @@ class PolymarketWorker(BaseIngestionWorker):
                     else:
                         outcome_names = ["Yes", "No"]
 
-                    outcomes_json = [
-                        {"name": name, "index": i}
-                        for i, name in enumerate(outcome_names)
-                    ]
+                    # Shared by every outcome of the market
+                    volume_usd = _safe_float(market.get("volume"))
+                    liquidity_usd = _safe_float(market.get("liquidity"))
 
                     for i, (name, price_str) in enumerate(zip(outcome_names, prices)):
                         try:
@@ -130,23 +130,18 @@ class PolymarketWorker(BaseIngestionWorker):
                         except (ValueError, TypeError):
                             continue
 
-                        results.append(
-                            RawOddsData(
-                                external_market_id=str(market_id),
-                                market_title=question,
-                                category=category,
-                                platform_slug=self.platform_slug,
-                                outcome_index=i,
-                                outcome_name=str(name),
-                                price=price,
-                                price_format="probability",
-                                volume_usd=_safe_float(market.get("volume")),
-                                liquidity_usd=_safe_float(market.get("liquidity")),
-                                market_url=f"https://polymarket.com/event/{event.get('slug', '')}",
-                                market_description=market.get("description"),
-                                end_date=None,
-                                outcomes_json=outcomes_json,
-                            )
+                        results.add(
+                            external_market_id=str(market_id),
+                            market_title=question,
+                            category=category,
+                            platform_slug=self.platform_slug,
+                            outcome_index=i,
+                            outcome_name=str(name),
+                            price=price,
+                            price_format="probability",
+                            volume_usd=volume_usd,
+                            liquidity_usd=liquidity_usd,
+                            market_url=market_url,
                         )
 
         except httpx.HTTPError as e:
@@ -154,7 +149,7 @@ class PolymarketWorker(BaseIngestionWorker):
         except Exception as e:
             self.logger.error("Polymarket parse error", error=str(e), exc_info=True)
 
-        return results
+        return results.build()
 
     def stop(self) -> None:
         super().stop()
@@ -2,7 +2,7 @@
 import httpx
 import structlog
 
-from src.workers.base import BaseIngestionWorker, RawOddsData
+from src.workers.base import BINARY_OUTCOMES, BaseIngestionWorker, RawOddsData
 
 logger = structlog.get_logger()
 
@@ -125,10 +125,6 @@ class PredictItWorker(BaseIngestionWorker):
                         # Polymarket/Kalshi single-candidate markets.
                         title = _build_candidate_title(market_name, name)
                         ext_id = f"{market_id}_c{i}"
-                        out_json = [
-                            {"name": "Yes", "index": 0},
-                            {"name": "No", "index": 1},
-                        ]
                         no_price = float(best_buy_no) if best_buy_no else 1.0 - float(last_trade)
 
                         results.append(
@@ -145,7 +141,7 @@ class PredictItWorker(BaseIngestionWorker):
                                 ask=None,
                                 volume_24h=None,
                                 market_url=market_url,
-                                outcomes_json=out_json,
+                                outcomes_json=BINARY_OUTCOMES,
                             )
                         )
                         results.append(
@@ -162,7 +158,7 @@ class PredictItWorker(BaseIngestionWorker):
                                 ask=float(best_buy_no) if best_buy_no else None,
                                 volume_24h=None,
                                 market_url=market_url,
-                                outcomes_json=out_json,
+                                outcomes_json=BINARY_OUTCOMES,
                             )
                         )
                     else:
@@ -1,16 +1,100 @@
 """Publish normalized odds to Redis — both live cache and stream for arb engine."""
 import re
+import time
 
 import orjson
 import structlog
 
+from src.arbengine.cluster_store import ClusterStore
+from src.arbengine.sharding import shard_of, shard_stream
+from src.core.config import settings
+from src.services.live_store import (
+    decode_live_market,
+    encode_compact,
+    index_live_keys,
+    live_key,
+    prune_expired,
+)
 from src.workers.base import NormalizedOdds
+from src.workers.batch import OddsBatch, OddsRow
 
 logger = structlog.get_logger()
 
-LIVE_CACHE_TTL = 660  # 11 minutes — must exceed slowest worker poll (TheOddsAPI 5 min)
-STREAM_KEY = "odds:normalized"
-STREAM_MAXLEN = 50000  # Cap stream length to prevent unbounded growth
+# Stream entries carry up to STREAM_CHUNK_ROWS outcomes each; cap the stream
+# (per shard) at roughly the 50k outcomes it held as one entry per outcome
+STREAM_CHUNK_ROWS = 500
+STREAM_MAXLEN = 100
+
+# Unchanged markets are still rewritten in full this often, which repairs
+# records lost to eviction or a flush
+FINGERPRINT_MAX_AGE = 300.0
+
+# WebSocket clients get odds moves as sequenced odds_delta messages (see
+# src/api/v1/ws.py); a gap in ``seq`` means a client missed some and must resync
+UPDATES_CHANNEL = "odds:updates"
+UPDATES_SEQ_KEY = "odds:updates:seq"
+DELTA_CHUNK_ROWS = 1000
+
+# Takes the next seq and publishes the message with it in one atomic step, so
+# messages go out in seq order across workers and a failed publish leaves no
+# gap.  ARGV[1] is the message JSON without seq.
+_PUBLISH_SEQUENCED = """
+local seq = redis.call('incr', KEYS[1])
+redis.call('publish', KEYS[2], '{"seq":' .. seq .. ',' .. string.sub(ARGV[1], 2))
+return seq
+"""
+
+# Canonical titles for routing updates to arb engine shards (only used when sharded)
+_clusters = ClusterStore()
+
+
+class PublishCache:
+    """What one worker last published per market, to skip unchanged outcomes.
+
+    Holds each market's metadata and per-outcome (price, implied, bid, ask)
+    fingerprints.  A full rewrite falls due ``max_age`` after the market was
+    last written in full.
+    """
+
+    def __init__(self, max_age: float = FINGERPRINT_MAX_AGE):
+        self.max_age = max_age
+        # cache_key -> (full write time, market fields, {outcome_index: fingerprint})
+        self._markets: dict[str, tuple[float, tuple, dict[int, tuple]]] = {}
+        self._pruned_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._markets)
+
+    def get(self, cache_key: str, now: float) -> tuple[tuple, dict[int, tuple], bool] | None:
+        """Last published (fields, outcome fingerprints, full rewrite due), if known."""
+        entry = self._markets.get(cache_key)
+        if entry is None:
+            return None
+        return entry[1], entry[2], now - entry[0] > self.max_age
+
+    def put(
+        self,
+        cache_key: str,
+        now: float,
+        fields: tuple,
+        fingerprints: dict[int, tuple],
+        full: bool,
+    ) -> None:
+        entry = self._markets.get(cache_key)
+        written_at = now if full or entry is None else entry[0]
+        if entry is not None and not full:
+            fingerprints = {**entry[2], **fingerprints}
+        self._markets[cache_key] = (written_at, fields, fingerprints)
+
+    def prune(self, now: float) -> None:
+        """Forget markets the worker has stopped publishing."""
+        if now - self._pruned_at < self.max_age:
+            return
+        self._pruned_at = now
+        self._markets = {
+            key: entry for key, entry in self._markets.items()
+            if now - entry[0] <= 2 * self.max_age
+        }
 
 
 def _fix_kalshi_url(url: str) -> str:
@@ -47,63 +131,246 @@ def _fix_kalshi_url(url: str) -> str:
     return url.lower()
 
 
-async def publish_odds(redis, odds: list[NormalizedOdds]) -> None:
-    """Write normalized odds to Redis live cache + stream."""
+async def _queue_compact(redis, pipe, records: dict[str, dict]) -> None:
+    """Queue compact-encoded writes for the markets in a batch.
+
+    A blob replaces the whole market.  Workers publish a full poll per batch,
+    so outcomes numbered 0..n-1 are taken as the complete market; markets
+    with gaps in their outcome indexes are merged with the stored record.
+    """
+    partial = [
+        key for key, record in records.items()
+        if sorted(record["outcomes"]) != list(range(len(record["outcomes"])))
+    ]
+    if partial:
+        read = redis.pipeline()
+        for key in partial:
+            read.hgetall(key)
+        for key, data in zip(partial, await read.execute()):
+            stored = decode_live_market(data)
+            if stored:
+                outcomes = records[key]["outcomes"]
+                for outcome in stored["outcomes"]:
+                    outcomes.setdefault(outcome["outcome_index"], outcome)
+
+    for key, record in records.items():
+        outcomes = record.pop("outcomes")
+        record["outcomes"] = [outcomes[i] for i in sorted(outcomes)]
+        # Drop fields left by the per-field encoding before writing the blob
+        pipe.delete(key)
+        pipe.hset(key, mapping=encode_compact(record))
+
+
+def _fingerprint(row: OddsRow) -> tuple:
+    """The published values of one outcome."""
+    return row.price, row.implied_prob, row.bid, row.ask
+
+
+def _outcome_record(row: OddsRow) -> dict:
+    """One outcome of a compact-encoded market record."""
+    return {
+        "outcome_index": row.outcome_index,
+        "outcome_name": row.outcome_name,
+        "price": row.price,
+        "implied_prob": row.implied_prob,
+        "bid": row.bid or None,
+        "ask": row.ask or None,
+        "outcome_type": row.outcome_type,
+    }
+
+
+def _stream_chunks(rows: list[OddsRow], captured_at: str):
+    """Columnar stream payloads for batch rows, STREAM_CHUNK_ROWS at a time."""
+    for start in range(0, len(rows), STREAM_CHUNK_ROWS):
+        chunk = rows[start:start + STREAM_CHUNK_ROWS]
+        yield orjson.dumps({
+            "platform": [row.platform_slug for row in chunk],
+            "market_id": [row.external_market_id for row in chunk],
+            "market_title": [row.market_title for row in chunk],
+            "category": [row.category for row in chunk],
+            "outcome_index": [row.outcome_index for row in chunk],
+            "outcome_name": [row.outcome_name for row in chunk],
+            "outcome_type": [row.outcome_type for row in chunk],
+            "price": [row.price for row in chunk],
+            "implied_prob": [row.implied_prob for row in chunk],
+            "captured_at": captured_at,
+        })
+
+
+async def publish_odds(
+    redis,
+    odds: OddsBatch | list[NormalizedOdds],
+    cache: PublishCache | None = None,
+) -> None:
+    """Write normalized odds to Redis live cache + indexes + stream.
+
+    With a ``cache`` only outcomes that changed since the worker last
+    published them are written, streamed and sent to WebSocket clients;
+    unchanged markets just have their index scores refreshed, so
+    ``updated_at`` is the last change.  An arb engine taking over a shard
+    reads quiet markets from the live cache rather than waiting for their
+    next full rewrite.
+    """
     if not odds:
         return
+    batch = odds if isinstance(odds, OddsBatch) else OddsBatch.from_records(odds)
+
+    compact = settings.live_odds_encoding == "compact"
+    shard_count = settings.arb_shard_count
+    updated_at = batch.captured_at.isoformat()
+    now = time.monotonic()
+
+    # Group the batch by market: cache_key -> {outcome_index: row}
+    markets: dict[str, dict[int, OddsRow]] = {}
+    for row in batch.rows():
+        cache_key = live_key(row.platform_slug, row.external_market_id)
+        markets.setdefault(cache_key, {})[row.outcome_index] = row
 
     pipe = redis.pipeline()
+    records: dict[str, dict] = {}  # compact encoding: cache_key -> market record
+    changed_rows: list[OddsRow] = []  # written to the arb stream
+    moved_rows: list[OddsRow] = []  # odds that differ from the last publish
+    written: list[tuple[str, tuple, dict[int, tuple], bool]] = []
 
-    for o in odds:
+    index_entries: list[tuple[str, str, str, str]] = []
+    for cache_key, rows in markets.items():
+        # Market fields as of the market's last row in the batch
+        last = next(reversed(rows.values()))
+        platform = last.platform_slug
+        index_entries.append((cache_key, platform, last.category, last.external_market_id))
         # Fix Kalshi URLs to use series_ticker format
-        market_url = o.market_url or ""
-        if o.platform_slug == "kalshi" and market_url:
+        market_url = last.market_url
+        if platform == "kalshi" and market_url:
             market_url = _fix_kalshi_url(market_url)
+        fields = (
+            last.market_title,
+            last.category,
+            market_url,
+            last.volume_24h,
+            last.volume_usd,
+            last.liquidity_usd,
+        )
+
+        fingerprints = {i: _fingerprint(row) for i, row in rows.items()}
+        previous = cache.get(cache_key, now) if cache is not None else None
+        if previous is None:
+            moved = list(rows.values())
+            full = True
+        else:
+            previous_fields, previous_outcomes, full = previous
+            moved = [
+                row for i, row in rows.items() if previous_outcomes.get(i) != fingerprints[i]
+            ]
+            if not full and not moved and previous_fields == fields:
+                continue
+        # A full rewrite re-streams every outcome; clients only hear of real moves
+        changed = list(rows.values()) if full else moved
+        written.append((cache_key, fields, fingerprints, full))
+        changed_rows.extend(changed)
+        moved_rows.extend(moved)
 
+        title, category, market_url, volume_24h, volume_usd, liquidity_usd = fields
         # 1) Update live cache hash: odds:live:{platform}:{market_id}
-        cache_key = f"odds:live:{o.platform_slug}:{o.external_market_id}"
-        pipe.hset(
-            cache_key,
-            mapping={
-                f"outcome_{o.outcome_index}_name": o.outcome_name,
-                f"outcome_{o.outcome_index}_price": str(o.price),
-                f"outcome_{o.outcome_index}_implied": str(o.implied_prob),
-                f"outcome_{o.outcome_index}_bid": str(o.bid or ""),
-                f"outcome_{o.outcome_index}_ask": str(o.ask or ""),
-                f"outcome_{o.outcome_index}_type": o.outcome_type,
-                "volume_24h": str(o.volume_24h or ""),
-                "volume_usd": str(o.volume_usd or ""),
-                "liquidity_usd": str(o.liquidity_usd or ""),
-                "market_title": o.market_title,
-                "category": o.category,
-                "platform": o.platform_slug,
+        if compact:
+            # A blob is rewritten whole, so it carries every outcome in the batch
+            records[cache_key] = {
+                "platform": platform,
+                "market_title": title,
+                "category": category,
                 "market_url": market_url,
-                "updated_at": o.captured_at.isoformat(),
-            },
-        )
-        pipe.expire(cache_key, LIVE_CACHE_TTL)
-
-        # 2) Push to Redis Stream for arb engine consumption
-        stream_data = {
-            "platform": o.platform_slug,
-            "market_id": o.external_market_id,
-            "market_title": o.market_title,
-            "category": o.category,
-            "outcome_index": str(o.outcome_index),
-            "outcome_name": o.outcome_name,
-            "outcome_type": o.outcome_type,
-            "price": str(o.price),
-            "implied_prob": str(o.implied_prob),
-            "captured_at": o.captured_at.isoformat(),
+                "updated_at": updated_at,
+                "volume_24h": volume_24h or None,
+                "volume_usd": volume_usd or None,
+                "liquidity_usd": liquidity_usd or None,
+                "outcomes": {i: _outcome_record(row) for i, row in rows.items()},
+            }
+            continue
+
+        mapping = {
+            "volume_24h": str(volume_24h or ""),
+            "volume_usd": str(volume_usd or ""),
+            "liquidity_usd": str(liquidity_usd or ""),
+            "market_title": title,
+            "category": category,
+            "platform": platform,
+            "market_url": market_url,
+            "updated_at": updated_at,
         }
-        pipe.xadd(STREAM_KEY, stream_data, maxlen=STREAM_MAXLEN, approximate=True)
+        for row in changed:
+            i = row.outcome_index
+            mapping.update({
+                f"outcome_{i}_name": row.outcome_name,
+                f"outcome_{i}_price": str(row.price),
+                f"outcome_{i}_implied": str(row.implied_prob),
+                f"outcome_{i}_bid": str(row.bid or ""),
+                f"outcome_{i}_ask": str(row.ask or ""),
+                f"outcome_{i}_type": row.outcome_type,
+            })
+        # Drop a blob left by the compact encoding, which readers would prefer
+        pipe.hdel(cache_key, "v", "d")
+        pipe.hset(cache_key, mapping=mapping)
+
+    # Queued before the index update: a blob rewrite deletes the key and its TTL
+    if records:
+        await _queue_compact(redis, pipe, records)
+
+    # Every market in the poll is still live: refresh its index scores and key
+    # TTL, which drive expiry, whether or not its odds moved
+    index_live_keys(pipe, index_entries, batch.captured_at.timestamp())
+
+    # 2) Push changed outcomes to each owning shard's Redis Stream for arb
+    # engine consumption, as columnar chunks
+    if changed_rows:
+        by_shard: dict[int, list[OddsRow]] = {0: changed_rows}
+        if shard_count > 1:
+            # Route by canonical title so one engine sees every platform's prices
+            categories = {row.market_title: row.category for row in changed_rows}
+            platforms = {row.market_title: row.platform_slug for row in changed_rows}
+            canonical = await _clusters.resolve(redis, list(categories), categories, platforms)
+            by_shard = {}
+            for row in changed_rows:
+                shard = shard_of(canonical.get(row.market_title, row.market_title), shard_count)
+                by_shard.setdefault(shard, []).append(row)
+        for shard, rows in by_shard.items():
+            for payload in _stream_chunks(rows, updated_at):
+                pipe.xadd(
+                    shard_stream(shard, shard_count),
+                    {"columns": payload},
+                    maxlen=STREAM_MAXLEN,
+                    approximate=True,
+                )
 
     await pipe.execute()
+    if cache is not None:
+        for cache_key, fields, fingerprints, full in written:
+            cache.put(cache_key, now, fields, fingerprints, full)
+        cache.prune(now)
+
+    # 3) Publish the odds that moved for WebSocket clients to patch in place
+    if moved_rows:
+        publish_sequenced = redis.register_script(_PUBLISH_SEQUENCED)
+        pipe = redis.pipeline(transaction=False)
+        for start in range(0, len(moved_rows), DELTA_CHUNK_ROWS):
+            chunk = moved_rows[start:start + DELTA_CHUNK_ROWS]
+            message = orjson.dumps({
+                "type": "odds_delta",
+                "ts": updated_at,
+                "deltas": [
+                    [
+                        row.platform_slug,
+                        row.external_market_id,
+                        row.outcome_index,
+                        row.price,
+                        row.implied_prob,
+                        row.category,
+                        row.market_title,  # the API's PubSubHub swaps in the canonical title
+                    ]
+                    for row in chunk
+                ],
+            })
+            await publish_sequenced(
+                keys=[UPDATES_SEQ_KEY, UPDATES_CHANNEL], args=[message], client=pipe
+            )
+        await pipe.execute()
 
-    # 3) Publish update notification for WebSocket clients
-    update_msg = orjson.dumps({
-        "type": "odds_batch",
-        "platform": odds[0].platform_slug,
-        "count": len(odds),
-    }).decode()
-    await redis.publish("odds:updates", update_msg)
+    await prune_expired(redis)
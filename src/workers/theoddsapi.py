@@ -4,7 +4,8 @@ import asyncio
 import httpx
 import structlog
 
-from src.workers.base import BaseIngestionWorker, RawOddsData
+from src.workers.base import BaseIngestionWorker
+from src.workers.batch import OddsBatch, OddsBatchBuilder
 
 logger = structlog.get_logger()
 
@@ -63,11 +64,10 @@ class TheOddsAPIWorker(BaseIngestionWorker):
         self.client = httpx.AsyncClient(timeout=30)
         self.logger.info("Connected to The Odds API", has_key=bool(self.api_key))
 
-    async def fetch_markets(self) -> list[RawOddsData]:
+    async def fetch_markets(self) -> OddsBatch:
+        results = OddsBatchBuilder()
         if not self.client or not self.api_key:
-            return []
-
-        results: list[RawOddsData] = []
+            return results.build()
 
         for sport_key in SPORTS_TO_FETCH:
             try:
@@ -84,7 +84,7 @@ class TheOddsAPIWorker(BaseIngestionWorker):
 
                 if resp.status_code == 401:
                     self.logger.error("The Odds API: invalid API key")
-                    return results
+                    return results.build()
                 if resp.status_code == 429:
                     self.logger.warning("The Odds API: rate limited")
                     break
@@ -105,10 +105,9 @@ class TheOddsAPIWorker(BaseIngestionWorker):
                             if market.get("key") != "h2h":
                                 continue
 
-                            outcomes_json = [
-                                {"name": o.get("name", ""), "index": i}
-                                for i, o in enumerate(market.get("outcomes", []))
-                            ]
+                            # Shared by every outcome of this bookmaker's market
+                            external_id = f"{event_id}_{bk_key}"
+                            market_url = SPORTSBOOK_URLS.get(bk_key)
 
                             for i, outcome in enumerate(market.get("outcomes", [])):
                                 name = outcome.get("name", "")
@@ -121,20 +120,17 @@ class TheOddsAPIWorker(BaseIngestionWorker):
                                     "american_negative" if price < 0 else "american_positive"
                                 )
 
-                                results.append(
-                                    RawOddsData(
-                                        external_market_id=f"{event_id}_{bk_key}",
-                                        market_title=title,
-                                        category=category,
-                                        platform_slug=bk_key,  # draftkings, fanduel, betmgm, bovada, betrivers
-                                        outcome_index=i,
-                                        outcome_name=name,
-                                        price=float(price),
-                                        price_format=price_format,
-                                        outcome_type="moneyline",
-                                        market_url=SPORTSBOOK_URLS.get(bk_key),
-                                        outcomes_json=outcomes_json,
-                                    )
+                                results.add(
+                                    external_market_id=external_id,
+                                    market_title=title,
+                                    category=category,
+                                    platform_slug=bk_key,  # draftkings, fanduel, betmgm, bovada, betrivers
+                                    outcome_index=i,
+                                    outcome_name=name,
+                                    price=float(price),
+                                    price_format=price_format,
+                                    outcome_type="moneyline",
+                                    market_url=market_url,
                                 )
 
                 # Log remaining quota from response headers
@@ -148,7 +144,7 @@ class TheOddsAPIWorker(BaseIngestionWorker):
             except httpx.HTTPError as e:
                 self.logger.error("The Odds API error", sport=sport_key, error=str(e))
 
-        return results
+        return results.build()
 
     def stop(self) -> None:
         super().stop()
@@ -0,0 +1,178 @@
+"""ConnectionManager topic indexing and the hub's canonical-title rewrite."""
+import asyncio
+
+import orjson
+import pytest
+
+from src.api.v1 import ws as ws_module
+from src.api.v1.ws import (
+    ARB_CHANNEL,
+    CLIENT_QUEUE_SIZE,
+    ODDS_CHANNEL,
+    ConnectionManager,
+    PubSubHub,
+)
+from src.arbengine.cluster_store import ClusterStore
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent: list[dict] = []
+        self.closed_with: int | None = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        self.sent.append(orjson.loads(message))
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+def _delta(*rows) -> str:
+    return orjson.dumps({"type": "odds_delta", "seq": 1, "deltas": list(rows)}).decode()
+
+
+def _row(platform="kalshi", category="politics", market="Who wins in 2028?"):
+    return [platform, "m1", 0, 0.4, 0.4, category, market]
+
+
+def _arb(profit, market="Who wins in 2028?", category="politics"):
+    return orjson.dumps({
+        "type": "arb_alert",
+        "data": {
+            "market_title": market,
+            "category": category,
+            "expected_profit": profit,
+            "legs": [{"platform": "kalshi"}, {"platform": "polymarket"}],
+        },
+    }).decode()
+
+
+async def _drain():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+async def manager():
+    manager = ConnectionManager()
+    yield manager
+    for ws in list(manager.connections):
+        manager.disconnect(ws)
+
+
+async def _connect(manager: ConnectionManager, **subscribe):
+    ws = FakeSocket()
+    client = await manager.connect(ws)
+    if subscribe:
+        manager.update(client, {"action": "subscribe", **subscribe})
+    return ws, client
+
+
+async def test_topic_filters_are_indexed(manager):
+    _, plain = await _connect(manager)
+    _, filtered = await _connect(manager, categories=["Politics"], platforms=["KALSHI"])
+
+    assert plain in manager._unfiltered[ODDS_CHANNEL]
+    assert filtered not in manager._unfiltered[ODDS_CHANNEL]
+    assert manager._topics == {
+        ("category", "politics"): {filtered},
+        ("platform", "kalshi"): {filtered},
+    }
+    assert manager._filtered == 1
+
+
+async def test_removing_every_topic_makes_client_unfiltered(manager):
+    _, client = await _connect(manager, markets=["Who wins in 2028?"])
+
+    manager.update(client, {"action": "unsubscribe", "markets": ["Who wins in 2028?"]})
+
+    assert manager._topics == {}
+    assert manager._filtered == 0
+    assert client in manager._unfiltered[ODDS_CHANNEL]
+
+
+async def test_disconnect_removes_client_from_every_index(manager):
+    ws, _ = await _connect(manager, categories=["politics"], markets=["Who wins in 2028?"])
+    plain_ws, _ = await _connect(manager, min_profit=0.02)
+
+    manager.disconnect(ws)
+    manager.disconnect(plain_ws)
+
+    assert manager._topics == {}
+    assert manager._filtered == 0
+    assert manager._profit_floor == set()
+    assert not any(manager._unfiltered.values())
+
+
+async def test_topic_cap_per_client(manager):
+    _, client = await _connect(
+        manager, markets=[f"m{i}" for i in range(ws_module.MAX_TOPICS_PER_CLIENT + 10)]
+    )
+
+    assert len(client.topics["market"]) == ws_module.MAX_TOPICS_PER_CLIENT
+    assert len(manager._topics) == ws_module.MAX_TOPICS_PER_CLIENT
+
+
+async def test_deltas_reach_only_matching_clients(manager):
+    plain, _ = await _connect(manager)
+    politics, _ = await _connect(manager, categories=["politics"])
+    sports_kalshi, _ = await _connect(manager, categories=["sports"], platforms=["kalshi"])
+    arbs_only, _ = await _connect(manager, categories=["politics"])
+    manager.update(
+        manager.connections[arbs_only], {"action": "unsubscribe", "channels": [ODDS_CHANNEL]}
+    )
+
+    manager.broadcast(ODDS_CHANNEL, _delta(_row(), _row(category="sports", platform="polymarket")))
+    await _drain()
+
+    assert len(plain.sent[0]["deltas"]) == 2
+    assert politics.sent[0]["deltas"] == [_row()]
+    assert sports_kalshi.sent == []  # needs both its category and its platform
+    assert arbs_only.sent == []
+
+
+async def test_arbs_respect_min_profit(manager):
+    plain, _ = await _connect(manager)
+    floor, _ = await _connect(manager, min_profit=0.05)
+    market, _ = await _connect(manager, markets=["Who wins in 2028?"], min_profit=0.02)
+
+    manager.broadcast(ARB_CHANNEL, _arb(0.03))
+    manager.broadcast(ARB_CHANNEL, _arb(0.06))
+    await _drain()
+
+    assert [m["data"]["expected_profit"] for m in plain.sent] == [0.03, 0.06]
+    assert [m["data"]["expected_profit"] for m in floor.sent] == [0.06]
+    assert [m["data"]["expected_profit"] for m in market.sent] == [0.03, 0.06]
+
+
+async def test_slow_client_is_dropped_and_closed(manager):
+    ws, client = await _connect(manager)
+    client.sender.cancel()  # stop draining its queue
+
+    for _ in range(CLIENT_QUEUE_SIZE + 1):
+        manager.broadcast(ODDS_CHANNEL, _delta(_row()))
+    assert ws not in manager.connections
+    assert ws_module._closing
+    await _drain()
+
+    assert ws.closed_with == ws_module.WS_CLOSE_TOO_SLOW
+    assert not ws_module._closing
+
+
+async def test_hub_rewrites_delta_titles_to_canonical(manager):
+    canonical, variant = "Who will win the 2028 election?", "Who will win the 2028 election"
+    clusters = ClusterStore()
+    clusters.clusterer.assign_many(
+        [canonical, variant], {}, {canonical: "kalshi", variant: "polymarket"}
+    )
+    hub = PubSubHub(manager)
+    hub._clusters = clusters
+    watcher, _ = await _connect(manager, markets=[canonical])
+
+    hub._broadcast_canonical(_delta(_row(platform="polymarket", market=variant)))
+    await _drain()
+
+    assert watcher.sent[0]["deltas"][0][6] == canonical
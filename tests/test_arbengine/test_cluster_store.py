@@ -0,0 +1,59 @@
+"""ClusterStore keeps every process's clusters in line with the shared map."""
+import fakeredis
+import pytest
+
+from src.arbengine.cluster_store import CLUSTER_LOG_KEY, CLUSTER_MAP_KEY, ClusterStore
+
+T1 = "Will Gavin Newsom win the 2028 presidential election?"
+T2 = "Will Gavin Newsom win the 2028 presidential election"
+T3 = "Will Gavin Newsom win the 2028 presidential election (official)?"
+OTHER = "Gavin Newsom to win the 2028 presidential election"
+PLATFORMS = {T1: "kalshi", T2: "polymarket", T3: "predictit", OTHER: "gemini"}
+
+
+@pytest.fixture
+async def redis():
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    yield redis
+    await redis.aclose()
+
+
+async def test_first_writer_wins_across_stores(redis):
+    a, b = ClusterStore(), ClusterStore()
+
+    first = await a.resolve(redis, [T1], platforms=PLATFORMS)
+    second = await b.resolve(redis, [T2], platforms=PLATFORMS)
+
+    assert first == {T1: T1}
+    assert second == {T2: T1}
+
+
+async def test_lost_race_moves_the_local_cluster_to_the_winner(redis):
+    # Another process's HSETNX for T1 landed after our sync, before its log entry
+    await redis.hset(CLUSTER_MAP_KEY, T1, OTHER)
+    a = ClusterStore()
+
+    resolved = await a.resolve(redis, [T1, T2], platforms=PLATFORMS)
+
+    # T2 joined T1's local cluster and won its own HSETNX; both follow the winner
+    assert resolved == {T1: OTHER, T2: OTHER}
+    assert await redis.hget(CLUSTER_MAP_KEY, T2) == OTHER
+    logged = {f["title"]: f["canonical"] for _, f in await redis.xrange(CLUSTER_LOG_KEY)}
+    assert logged == {T2: OTHER}
+    # No phantom cluster under T1 is left for later titles to join
+    assert (await a.resolve(redis, [T3], platforms=PLATFORMS))[T3] == OTHER
+    assert a.clusterer.get(T1) == OTHER
+
+
+async def test_stores_agree_after_a_lost_race(redis):
+    await redis.hset(CLUSTER_MAP_KEY, T1, OTHER)
+    a = ClusterStore()
+    await a.resolve(redis, [T1, T2], platforms=PLATFORMS)
+    # The other process's log entry arrives late
+    await redis.xadd(CLUSTER_LOG_KEY, {"title": T1, "canonical": OTHER, "platform": "kalshi"})
+
+    b = ClusterStore()
+    from_b = await b.resolve(redis, [T1, T2, T3], platforms=PLATFORMS)
+    from_a = await a.resolve(redis, [T1, T2, T3], platforms=PLATFORMS)
+
+    assert from_a == from_b == {T1: OTHER, T2: OTHER, T3: OTHER}
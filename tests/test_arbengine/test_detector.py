@@ -0,0 +1,83 @@
+"""OutcomeBook keeps the cheapest leg without rescanning on every update."""
+import random
+
+from src.arbengine.detector import ArbLegData, OutcomeBook
+
+
+def _leg(platform: str, implied_prob: float) -> ArbLegData:
+    return ArbLegData(
+        platform=platform,
+        market_id=f"{platform}-1",
+        outcome_name="Yes",
+        price=implied_prob,
+        implied_prob=implied_prob,
+    )
+
+
+def _scan(book: OutcomeBook) -> ArbLegData:
+    return min(book, key=lambda x: x.implied_prob)
+
+
+def test_cheaper_leg_replaces_cached_best():
+    book = OutcomeBook()
+    book.update(_leg("kalshi", 0.5))
+    book.update(_leg("polymarket", 0.45))
+
+    assert book.best().platform == "polymarket"
+    assert book._best is not None
+
+
+def test_other_platform_getting_worse_keeps_cache():
+    book = OutcomeBook()
+    book.update(_leg("kalshi", 0.5))
+    book.update(_leg("polymarket", 0.45))
+    best = book.best()
+
+    book.update(_leg("kalshi", 0.6))
+
+    assert book._best is best
+
+
+def test_best_platform_getting_worse_invalidates():
+    book = OutcomeBook()
+    book.update(_leg("kalshi", 0.5))
+    book.update(_leg("polymarket", 0.45))
+    book.best()
+
+    book.update(_leg("polymarket", 0.55))
+
+    assert book._best is None
+    assert book.best().platform == "kalshi"
+    assert book.best().implied_prob == 0.5
+
+
+def test_best_platform_improving_keeps_it_best():
+    book = OutcomeBook()
+    book.update(_leg("kalshi", 0.5))
+    book.update(_leg("polymarket", 0.45))
+
+    book.update(_leg("polymarket", 0.4))
+
+    assert book.best().implied_prob == 0.4
+
+
+def test_ties_resolve_like_min_over_update_order():
+    book = OutcomeBook()
+    book.update(_leg("kalshi", 0.5))
+    book.update(_leg("polymarket", 0.5))
+
+    assert book.best().platform == "kalshi"
+    book.update(_leg("kalshi", 0.5))  # re-quoted: now the most recent
+    assert book.best() == _scan(book)
+
+
+def test_best_matches_full_scan_under_random_updates():
+    rng = random.Random(1)
+    platforms = ["polymarket", "kalshi", "predictit", "draftkings"]
+    book = OutcomeBook()
+    for _ in range(2000):
+        book.update(_leg(rng.choice(platforms), rng.choice([0.3, 0.4, 0.5, 0.6])))
+        if rng.random() < 0.3:
+            assert book.best() == _scan(book)
+    assert book.best() == _scan(book)
+    assert len(book) == len(platforms)
@@ -0,0 +1,196 @@
+"""Stream consumption: batched acks, the adaptive XREADGROUP count and shard leases."""
+from types import SimpleNamespace
+
+import fakeredis
+import orjson
+import pytest
+
+from src.arbengine.engine import CONSUMER_GROUP, READ_COUNT_MAX, READ_COUNT_MIN, ArbEngine
+from src.arbengine.sharding import BASE_STREAM_KEY, lease_key, shard_of, shard_stream
+from src.workers.batch import OddsBatchBuilder
+from src.workers.normalizer import normalize_batch
+from src.workers.publisher import publish_odds
+
+
+def _chunk(title: str, n: int) -> dict[str, bytes]:
+    columns = {
+        "market_title": [title] * n,
+        "outcome_name": [f"Outcome {i}" for i in range(n)],
+        "platform": ["kalshi"] * n,
+        "market_id": ["m1"] * n,
+        "category": ["politics"] * n,
+        "price": [0.4] * n,
+        "implied_prob": [0.4] * n,
+    }
+    return {"columns": orjson.dumps(columns)}
+
+
+@pytest.fixture
+async def engine():
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    engine = ArbEngine(redis, SimpleNamespace(arb_shard_count=1, arb_shards=""))
+    await redis.xgroup_create(BASE_STREAM_KEY, CONSUMER_GROUP, id="0", mkstream=True)
+    yield engine
+    await redis.aclose()
+
+
+async def test_batch_is_acked_with_one_multi_id_xack(engine, monkeypatch):
+    redis = engine.redis
+    for i in range(5):
+        await redis.xadd(BASE_STREAM_KEY, _chunk(f"Will team {i} win?", 2))
+    messages = await redis.xreadgroup(CONSUMER_GROUP, "c1", {BASE_STREAM_KEY: ">"}, count=10)
+
+    acks = []
+    pipeline = redis.pipeline
+
+    def spy_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        xack = pipe.xack
+
+        def spy_xack(stream, group, *ids):
+            acks.append(ids)
+            return xack(stream, group, *ids)
+
+        pipe.xack = spy_xack
+        return pipe
+
+    monkeypatch.setattr(redis, "pipeline", spy_pipeline)
+    received = await engine._handle_batch(messages)
+
+    assert received == 5
+    assert len(acks) == 1 and len(acks[0]) == 5
+    assert (await redis.xpending(BASE_STREAM_KEY, CONSUMER_GROUP))["pending"] == 0
+    assert set(engine._odds_buffer) == {f"Will team {i} win?" for i in range(5)}
+
+
+async def test_empty_batch_sends_nothing(engine):
+    assert await engine._handle_batch([(BASE_STREAM_KEY, [])]) == 0
+
+
+def test_read_count_grows_while_reads_come_back_full(engine):
+    counts = []
+    for _ in range(10):
+        engine._adapt_read_count(engine._read_count)
+        counts.append(engine._read_count)
+
+    assert counts[:3] == [READ_COUNT_MIN * 2, READ_COUNT_MIN * 4, READ_COUNT_MIN * 8]
+    assert counts[-1] == READ_COUNT_MAX
+
+
+def test_read_count_shrinks_once_reads_drain(engine):
+    engine._read_count = 800
+
+    engine._adapt_read_count(300)  # partly full: unchanged
+    assert engine._read_count == 800
+    engine._adapt_read_count(10)
+    assert engine._read_count == 400
+    for _ in range(10):
+        engine._adapt_read_count(0)
+    assert engine._read_count == READ_COUNT_MIN
+
+
+def _replica(server, name: str, shards: str = "") -> ArbEngine:
+    redis = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    engine = ArbEngine(redis, SimpleNamespace(arb_shard_count=2, arb_shards=shards))
+    engine._consumer = name
+    return engine
+
+
+def _title_on(shard: int) -> str:
+    return next(
+        title for title in (f"Will team {i} win?" for i in range(100))
+        if shard_of(title, 2) == shard
+    )
+
+
+async def test_each_shard_has_one_owner():
+    server = fakeredis.FakeServer()
+    a, b = _replica(server, "arb-a"), _replica(server, "arb-b")
+
+    await a._renew_leases()
+    await b._renew_leases()
+    await a._renew_leases()
+
+    assert sorted(a._owned) == [0, 1]
+    assert b._owned == {}
+    assert await a.redis.pttl(lease_key(0)) > 0
+
+
+async def test_replica_only_leases_its_eligible_shards():
+    server = fakeredis.FakeServer()
+    a, b = _replica(server, "arb-a", shards="1"), _replica(server, "arb-b")
+
+    await a._renew_leases()
+    await b._renew_leases()
+
+    assert list(a._owned) == [1]
+    assert list(b._owned) == [0]
+
+
+async def test_expired_lease_is_taken_over_with_pending_entries():
+    server = fakeredis.FakeServer()
+    a, b = _replica(server, "arb-a"), _replica(server, "arb-b")
+    await a._renew_leases()
+    await b._renew_leases()
+    titles = {shard: _title_on(shard) for shard in (0, 1)}
+    for shard, title in titles.items():
+        await a.redis.xadd(shard_stream(shard, 2), _chunk(title, 2))
+    # Owner reads the entries and dies before acking them
+    await a.redis.xreadgroup(CONSUMER_GROUP, "arb-a", {a._streams[0]: ">", a._streams[1]: ">"})
+    await a.redis.delete(lease_key(0), lease_key(1))  # leases lapse
+
+    await b._renew_leases()
+
+    assert sorted(b._owned) == [0, 1]
+    assert set(b._odds_buffer) == set(titles.values())
+    for shard in (0, 1):
+        pending = await b.redis.xpending(shard_stream(shard, 2), CONSUMER_GROUP)
+        assert pending["pending"] == 0
+
+
+async def test_owner_that_lost_its_lease_drops_the_shard():
+    a = _replica(fakeredis.FakeServer(), "arb-a")
+    await a._renew_leases()
+    for shard in (0, 1):
+        await a.redis.xadd(shard_stream(shard, 2), _chunk(_title_on(shard), 2))
+    await a._handle_batch(
+        await a.redis.xreadgroup(CONSUMER_GROUP, "arb-a", {s: ">" for s in a._streams})
+    )
+    await a.redis.set(lease_key(0), "arb-b")  # expired and taken while a was stalled
+
+    await a._renew_leases()
+
+    assert list(a._owned) == [1]
+    assert set(a._odds_buffer) == {_title_on(1)}
+
+
+async def test_shutdown_releases_leases_for_immediate_takeover():
+    server = fakeredis.FakeServer()
+    a, b = _replica(server, "arb-a"), _replica(server, "arb-b")
+    await a._renew_leases()
+
+    await a._release_leases()
+    await b._renew_leases()
+
+    assert a._owned == {}
+    assert sorted(b._owned) == [0, 1]
+
+
+async def test_taken_shard_is_seeded_from_the_live_cache():
+    server = fakeredis.FakeServer()
+    a = _replica(server, "arb-a", shards="0")
+    builder = OddsBatchBuilder()
+    for title in (_title_on(0), _title_on(1)):
+        for platform, yes in (("kalshi", 0.45), ("polymarket", 0.5)):
+            for i, (name, price) in enumerate((("Yes", yes), ("No", 1 - yes))):
+                builder.add(title, title, "sports", platform, i, name, price, "probability")
+    # Published earlier: quiet markets are not streamed again until a full rewrite
+    await publish_odds(a.redis, normalize_batch(builder.build()))
+
+    await a._renew_leases()
+
+    assert set(a._odds_buffer) == {_title_on(0)}
+    books = a._odds_buffer[_title_on(0)]
+    assert {name: len(book) for name, book in books.items()} == {"Yes": 2, "No": 2}
+    assert books["Yes"].best().platform == "kalshi"
+    assert _title_on(0) in a._dirty
@@ -0,0 +1,201 @@
+"""TitleClusterer must assign what the original clustering loop did, on either path."""
+import random
+
+import pytest
+from rapidfuzz import fuzz
+
+from src.arbengine.matcher import (
+    CROSS_PLATFORM_THRESHOLD,
+    VECTORIZE_MIN_BATCH,
+    TitleClusterer,
+    _has_semantic_conflict,
+    _normalize_title,
+    _years_in,
+    cluster_titles,
+)
+
+PLATFORMS = ["polymarket", "kalshi", "predictit", "draftkings"]
+CATEGORIES = ["politics", "sports", "crypto"]
+SUBJECTS = ["Gavin Newsom", "Kamala Harris", "Bitcoin", "Ethereum", "Lakers", "Celtics"]
+TEMPLATES = [
+    "Will {s} win the {y} election?",
+    "Will {s} win the {y} Democratic nomination?",
+    "Will {s} run for president in {y}?",
+    "Which party will win the {y} race for {s}?",
+    "{s} above target by {y}",
+    "Will {s} win the {y} championship (finals)?",
+    "Will {s} become champion in {y}",
+]
+
+
+def _reference_cluster_titles(titles, categories=None, platforms=None):
+    """The arrival-order loop ``cluster_titles`` used before TitleClusterer."""
+    canonical_map = {}
+    clusters = []
+    for title in titles:
+        norm = _normalize_title(title)
+        cat = (categories or {}).get(title, "")
+        plat = (platforms or {}).get(title, "")
+        years = _years_in(norm)
+        if not norm:
+            canonical_map[title] = title
+            continue
+
+        matched = False
+        for canon_title, canon_norm, canon_cat, canon_years, canon_plats in clusters:
+            if categories and cat and canon_cat and cat != canon_cat:
+                continue
+            if years and canon_years and not years & canon_years:
+                continue
+            if plat and plat in canon_plats:
+                if norm == canon_norm:
+                    canonical_map[title] = canon_title
+                    canon_plats.add(plat)
+                    matched = True
+                    break
+            else:
+                if _has_semantic_conflict(norm, canon_norm):
+                    continue
+                if fuzz.token_sort_ratio(norm, canon_norm) >= CROSS_PLATFORM_THRESHOLD:
+                    canonical_map[title] = canon_title
+                    if plat:
+                        canon_plats.add(plat)
+                    matched = True
+                    break
+
+        if not matched:
+            clusters.append((title, norm, cat, years, {plat} if plat else set()))
+            canonical_map[title] = title
+    return canonical_map
+
+
+def _random_batch(rng: random.Random, n: int, uncategorised: float):
+    titles, categories, platforms = [], {}, {}
+    while len(titles) < n:
+        title = rng.choice(TEMPLATES).format(
+            s=rng.choice(SUBJECTS), y=rng.choice(["2026", "2027", "2028"])
+        )
+        if rng.random() < 0.5:
+            title += f" {rng.choice(['?', '!', 'now', 'yes', 'market'])}"
+        if title in categories:
+            continue
+        titles.append(title)
+        categories[title] = "" if rng.random() < uncategorised else rng.choice(CATEGORIES)
+        platforms[title] = rng.choice(PLATFORMS)
+    return titles, categories, platforms
+
+
+@pytest.mark.parametrize("uncategorised", [0.0, 0.1])
+@pytest.mark.parametrize("seed", range(10))
+def test_cluster_titles_matches_reference(seed, uncategorised):
+    rng = random.Random(seed)
+    titles, categories, platforms = _random_batch(rng, VECTORIZE_MIN_BATCH + 100, uncategorised)
+
+    assert cluster_titles(titles, categories, platforms) == _reference_cluster_titles(
+        titles, categories, platforms
+    )
+
+
+# Titles that also trip the verb gate against themselves
+BOTH_VERBS = ["Will {s} run for and win the {y} election?", "Will {s} announce and win in {y}?"]
+
+
+def _batch_with_duplicates(rng: random.Random, n: int):
+    """Categorised titles, some repeated on one platform with only noise changed."""
+    titles, categories, platforms = [], {}, {}
+    while len(titles) < n:
+        template = rng.choice(TEMPLATES + BOTH_VERBS)
+        title = template.format(s=rng.choice(SUBJECTS), y=rng.choice(["2026", "2027", "2028"]))
+        if rng.random() < 0.5:
+            title = title.replace(" ", f" {rng.choice(['now', 'really', 'still', 'ever'])} ", 1)
+        if title in categories:
+            continue
+        category, platform = rng.choice(CATEGORIES), rng.choice(PLATFORMS)
+        variants = [title]
+        if rng.random() < 0.4:
+            # Normalise to the same string as the title
+            bare = title.rstrip("?")
+            variants += [bare, f"{bare} (official)", f"[{platform}] {title}"]
+        for variant in variants:
+            if variant not in categories:
+                titles.append(variant)
+                categories[variant] = category
+                platforms[variant] = platform
+    return titles, categories, platforms
+
+
+def _one_by_one(titles, categories, platforms):
+    """The per-title (blocked) path, never vectorised."""
+    clusterer = TitleClusterer()
+    return {t: clusterer.assign(t, categories.get(t, ""), platforms.get(t, "")) for t in titles}
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_vectorised_path_matches_per_title_path(seed):
+    rng = random.Random(seed)
+    titles, categories, platforms = _batch_with_duplicates(rng, VECTORIZE_MIN_BATCH + 200)
+    rng.shuffle(titles)
+
+    assert TitleClusterer().assign_many(titles, categories, platforms) == _one_by_one(
+        titles, categories, platforms
+    )
+
+
+def test_same_platform_duplicates_cluster_on_both_paths():
+    base = "Will Gavin Newsom run for and win the 2028 election?"
+    dupes = [base, base.rstrip("?"), f"{base.rstrip('?')} (official)"]
+    filler, categories, platforms = _batch_with_duplicates(random.Random(5), VECTORIZE_MIN_BATCH)
+    titles = dupes + [t for t in filler if t not in dupes]
+    categories.update({t: "politics" for t in dupes})
+    platforms.update({t: "kalshi" for t in dupes})
+
+    vectorised = TitleClusterer().assign_many(titles, categories, platforms)
+
+    assert {vectorised[t] for t in dupes} == {base}
+    assert vectorised == _one_by_one(titles, categories, platforms)
+
+
+def test_small_batches_match_reference():
+    rng = random.Random(99)
+    titles, categories, platforms = _random_batch(rng, 60, 0.2)
+
+    assert cluster_titles(titles, categories, platforms) == _reference_cluster_titles(
+        titles, categories, platforms
+    )
+
+
+def test_incremental_batches_keep_earlier_assignments():
+    rng = random.Random(7)
+    titles, categories, platforms = _random_batch(rng, VECTORIZE_MIN_BATCH * 2, 0.0)
+    clusterer = TitleClusterer()
+
+    first = clusterer.assign_many(titles[:VECTORIZE_MIN_BATCH], categories, platforms)
+    both = clusterer.assign_many(titles, categories, platforms)
+
+    assert {t: both[t] for t in first} == first
+    assert both == _reference_cluster_titles(titles, categories, platforms)
+
+
+def test_same_platform_requires_exact_match():
+    titles = ["Will Bitcoin hit 100k in 2026?", "Will Bitcoin hit 100k in 2026"]
+    platforms = {t: "kalshi" for t in titles}
+    near = ["Will Bitcoin hit 100k in 2026?", "Will Bitcoin reach 100k in 2026?"]
+
+    assert len(set(cluster_titles(titles, platforms=platforms).values())) == 1
+    assert len(set(cluster_titles(near, platforms={t: "kalshi" for t in near}).values())) == 2
+
+
+def test_copy_is_independent():
+    rng = random.Random(3)
+    titles, categories, platforms = _random_batch(rng, 80, 0.0)
+    clusterer = TitleClusterer()
+    clusterer.assign_many(titles[:40], categories, platforms)
+
+    working = clusterer.copy()
+    working.assign_many(titles, categories, platforms)
+
+    assert len(clusterer) == 40
+    assert all(t not in clusterer for t in titles[40:])
+    assert working.assign_many(titles, categories, platforms) == _reference_cluster_titles(
+        titles, categories, platforms
+    )
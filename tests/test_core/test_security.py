@@ -0,0 +1,234 @@
+"""Firebase token verification: the async cert refresh and the verified-token LRU."""
+import asyncio
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import httpx
+import jwt
+import orjson
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+from src.core import security
+from src.core.security import (
+    CERTS_REFRESH_MARGIN,
+    FIREBASE_ISSUER_PREFIX,
+    UNKNOWN_KID_REFRESH_INTERVAL,
+    verify_firebase_token,
+)
+
+PROJECT_ID = "oddsaxiom-test"
+MAX_AGE = 3600
+
+
+def _signing_key():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "securetoken")])
+    now = datetime.now(timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    return key, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+# Generating RSA keys is slow; share a few across the module
+KEYS = {kid: _signing_key() for kid in ("kid-a", "kid-b")}
+
+
+class Clock:
+    def __init__(self):
+        self.now = datetime.now(timezone.utc).timestamp()
+
+    def time(self) -> float:
+        return self.now
+
+
+class Google:
+    """The certificate endpoint: publishes ``kids`` and counts fetches."""
+
+    def __init__(self, kids: list[str]):
+        self.kids = kids
+        self.fetches = 0
+        self.failing = False
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.fetches += 1
+        if self.failing:
+            return httpx.Response(503)
+        body = {kid: KEYS[kid][1] for kid in self.kids}
+        return httpx.Response(
+            200,
+            content=orjson.dumps(body),
+            headers={"cache-control": f"public, max-age={MAX_AGE}"},
+        )
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(security, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def google(monkeypatch, clock):
+    google = Google(["kid-a"])
+    client = httpx.AsyncClient
+
+    def mock_client(**kwargs):
+        return client(transport=httpx.MockTransport(google.handler), **kwargs)
+
+    monkeypatch.setattr(security.httpx, "AsyncClient", mock_client)
+    monkeypatch.setattr(security, "settings", SimpleNamespace(firebase_project_id=PROJECT_ID))
+    monkeypatch.setattr(security, "_public_keys", {})
+    monkeypatch.setattr(security, "_keys_expiry", 0)
+    monkeypatch.setattr(security, "_keys_fetched_at", 0)
+    monkeypatch.setattr(security, "_refresh_task", None)
+    monkeypatch.setattr(security, "_verified_tokens", OrderedDict())
+    return google
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    """Records the thread each RS256 check ran on."""
+    threads = []
+    decode = jwt.decode
+
+    def spy(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(security.jwt, "decode", spy)
+    return threads
+
+
+def _token(kid: str = "kid-a", uid: str = "user-1", lifetime: int = 3600, signer: str = "") -> str:
+    now = int(datetime.now(timezone.utc).timestamp())
+    claims = {
+        "iss": FIREBASE_ISSUER_PREFIX + PROJECT_ID,
+        "aud": PROJECT_ID,
+        "sub": uid,
+        "iat": now,
+        "exp": now + lifetime,
+    }
+    return jwt.encode(claims, KEYS[signer or kid][0], algorithm="RS256", headers={"kid": kid})
+
+
+async def test_valid_token_is_verified_once_then_served_from_the_lru(google, decodes):
+    token = _token()
+
+    first = await verify_firebase_token(token)
+    second = await verify_firebase_token(token)
+
+    assert first["uid"] == second["uid"] == "user-1"
+    assert len(decodes) == 1
+    assert google.fetches == 1
+
+
+async def test_rsa_check_runs_off_the_event_loop(google, decodes):
+    assert await verify_firebase_token(_token()) is not None
+
+    assert decodes[0] is not threading.main_thread()
+
+
+async def test_concurrent_cold_requests_share_one_fetch(google):
+    results = await asyncio.gather(*(verify_firebase_token(_token(uid=f"u{i}")) for i in range(5)))
+
+    assert [r["uid"] for r in results] == [f"u{i}" for i in range(5)]
+    assert google.fetches == 1
+
+
+async def test_keys_are_refreshed_in_the_background_before_expiry(google, clock):
+    await verify_firebase_token(_token(uid="u1"))
+    google.kids = ["kid-a", "kid-b"]
+    clock.now += MAX_AGE - CERTS_REFRESH_MARGIN
+
+    # Served from the current keys while the refresh runs
+    assert await verify_firebase_token(_token(uid="u2")) is not None
+    await security._refresh_task
+
+    assert google.fetches == 2
+    assert await verify_firebase_token(_token(kid="kid-b")) is not None
+
+
+async def test_failed_refresh_keeps_the_previous_keys(google, clock):
+    await verify_firebase_token(_token(uid="u1"))
+    google.failing = True
+    clock.now += MAX_AGE
+
+    assert await verify_firebase_token(_token(uid="u2")) is not None
+    await security._refresh_task
+    assert await verify_firebase_token(_token(uid="u3")) is not None
+    assert set(security._public_keys) == {"kid-a"}
+
+
+async def test_rotated_kid_forces_a_refresh_at_most_once_a_minute(google, clock):
+    await verify_firebase_token(_token())
+    google.kids = ["kid-a", "kid-b"]
+
+    assert await verify_firebase_token(_token(kid="kid-b")) is None
+    assert google.fetches == 1  # fetched moments ago
+
+    clock.now += UNKNOWN_KID_REFRESH_INTERVAL
+    assert await verify_firebase_token(_token(kid="kid-b")) is not None
+    assert google.fetches == 2
+
+
+async def test_expired_token_is_evicted_from_the_lru(google, clock, decodes):
+    token = _token(lifetime=600)
+    assert await verify_firebase_token(token) is not None
+
+    clock.now += 600
+
+    assert security._cached_claims(security.hashlib.sha256(token.encode()).digest()) is None
+    assert security._verified_tokens == {}
+    # pyjwt checks the real clock, so the token still verifies but only after a new RSA check
+    assert await verify_firebase_token(token) is not None
+    assert len(decodes) == 2
+
+
+async def test_tokens_of_a_retired_kid_are_dropped_on_refresh(google, clock, decodes):
+    old, new = _token(kid="kid-a"), _token(kid="kid-b")
+    google.kids = ["kid-a", "kid-b"]
+    assert await verify_firebase_token(old) is not None
+    assert await verify_firebase_token(new) is not None
+
+    google.kids = ["kid-b"]
+    clock.now += MAX_AGE - CERTS_REFRESH_MARGIN
+    await verify_firebase_token(_token(kid="kid-b", uid="user-2"))  # a miss starts the refresh
+    await security._refresh_task
+
+    assert len(security._verified_tokens) == 2
+    assert await verify_firebase_token(old) is None
+    assert await verify_firebase_token(new) is not None
+    assert len(decodes) == 3
+
+
+async def test_token_under_another_kid_is_rejected(google):
+    google.kids = ["kid-a", "kid-b"]
+
+    assert await verify_firebase_token(_token(kid="kid-b", signer="kid-a")) is None
+    assert security._verified_tokens == {}
+
+
+async def test_lru_is_bounded(google, monkeypatch):
+    monkeypatch.setattr(security, "TOKEN_CACHE_SIZE", 3)
+    tokens = [_token(uid=f"u{i}") for i in range(4)]
+    for token in tokens:
+        await verify_firebase_token(token)
+
+    kept = list(security._verified_tokens)
+    hashes_ = [security.hashlib.sha256(t.encode()).digest() for t in tokens]
+    assert kept == hashes_[1:]
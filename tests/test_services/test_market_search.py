@@ -0,0 +1,82 @@
+"""MarketSearchIndex: word-prefix queries, category filter and rebuilds."""
+import pytest
+
+from src.services import market_search
+from src.services.market_search import MarketSearchIndex
+
+MARKETS = [
+    {"market_title": "Fed rate cut in March?", "category": "Economics"},
+    {"market_title": "Will the Fed raise rates in 2026?", "category": "economics"},
+    {"market_title": "Lakers win the NBA Finals", "category": "sports"},
+    {"market_title": "Federer returns to tennis", "category": "sports"},
+    {"market_title": "Bitcoin above $100k by June", "category": "crypto"},
+]
+
+
+@pytest.fixture
+def views():
+    """What the materialised "all" view holds, by generation."""
+    return {"generation": "1", "markets": MARKETS}
+
+
+@pytest.fixture
+def index(views, monkeypatch):
+    async def live_odds_generation(redis):
+        return views["generation"]
+
+    async def get_live_view(redis):
+        return views["generation"], views["markets"]
+
+    monkeypatch.setattr(market_search, "live_odds_generation", live_odds_generation)
+    monkeypatch.setattr(market_search, "get_live_view", get_live_view)
+    return MarketSearchIndex()
+
+
+def _titles(result: dict) -> list[str]:
+    return [m["market_title"] for m in result["data"]]
+
+
+async def test_words_are_anded_prefixes(index):
+    await index.refresh(None)
+
+    assert _titles(index.search("fed rat")) == [
+        "Fed rate cut in March?", "Will the Fed raise rates in 2026?",
+    ]
+    assert _titles(index.search("fed")) == [
+        "Fed rate cut in March?", "Will the Fed raise rates in 2026?", "Federer returns to tennis",
+    ]
+    assert _titles(index.search("FED  March!")) == ["Fed rate cut in March?"]
+    assert index.search("fed nba")["meta"]["total"] == 0
+    assert index.search("zzz")["data"] == []
+
+
+async def test_category_filter(index):
+    await index.refresh(None)
+
+    assert _titles(index.search(category="ECONOMICS")) == [
+        "Fed rate cut in March?", "Will the Fed raise rates in 2026?",
+    ]
+    assert _titles(index.search("fed", category="sports")) == ["Federer returns to tennis"]
+    assert index.search(category="politics")["meta"]["total"] == 0
+
+
+async def test_no_query_pages_through_everything(index):
+    await index.refresh(None)
+
+    result = index.search(page=2, per_page=2)
+
+    assert _titles(result) == ["Lakers win the NBA Finals", "Federer returns to tennis"]
+    assert result["meta"] == {"page": 2, "per_page": 2, "total": 5, "total_pages": 3}
+
+
+async def test_rebuilds_only_on_new_generation(index, views):
+    await index.refresh(None)
+    views["markets"] = MARKETS[:1]
+
+    await index.refresh(None)
+    assert index.search()["meta"]["total"] == 5
+
+    views["generation"] = "2"
+    await index.refresh(None)
+    assert index.search()["meta"]["total"] == 1
+    assert index.generation == "2"
@@ -0,0 +1,210 @@
+"""The cached user principal and its invalidation across processes."""
+import asyncio
+import uuid
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+
+from src.services import user_service
+from src.services.user_service import (
+    PRINCIPAL_CHANNEL,
+    PRINCIPAL_LOCAL_TTL,
+    get_principal,
+    invalidate_principal,
+    listen_principal_invalidations,
+    update_user,
+)
+
+UID = "firebase-uid-1"
+
+
+class Users:
+    """The users table, as seen by the principal query; counts queries."""
+
+    def __init__(self):
+        self.rows = {
+            UID: SimpleNamespace(
+                id=uuid.uuid4(), firebase_uid=UID, tier="free", is_active=True, is_admin=False,
+                market_alerts=True, live_data_stream=False, hide_onboarding_tip=None,
+            ),
+        }
+        self.queries = 0
+
+    def session(self):
+        users = self
+
+        class Session:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def execute(self, statement):
+                users.queries += 1
+                uid = statement.whereclause.right.value
+                return SimpleNamespace(one_or_none=lambda: users.rows.get(uid))
+
+        return Session()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+async def redis(monkeypatch):
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+    async def get_redis():
+        return redis
+
+    monkeypatch.setattr(user_service, "get_redis", get_redis)
+    yield redis
+    await redis.aclose()
+
+
+@pytest.fixture
+def users(monkeypatch):
+    users = Users()
+    monkeypatch.setattr(user_service, "async_session_factory", users.session)
+    monkeypatch.setattr(user_service, "_principals", OrderedDict())
+    return users
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(user_service, "time", clock)
+    return clock
+
+
+async def test_principal_is_built_once_and_cached(redis, users, clock):
+    first = await get_principal(UID)
+    second = await get_principal(UID)
+
+    assert first == second
+    assert first.tier == "free" and first.hide_onboarding_tip is False
+    assert users.queries == 1
+    assert await redis.ttl(f"auth:principal:{UID}") > 0
+
+
+async def test_expired_local_copy_is_refilled_from_redis(redis, users, clock):
+    await get_principal(UID)
+    users.rows[UID].tier = "pro"  # changed without invalidation
+    clock.now += PRINCIPAL_LOCAL_TTL
+
+    principal = await get_principal(UID)
+
+    assert principal.tier == "free"
+    assert users.queries == 1
+
+
+async def test_unknown_user_is_not_cached(redis, users, clock):
+    assert await get_principal("nobody") is None
+    assert await get_principal("nobody") is None
+
+    assert users.queries == 2
+    assert await redis.keys("auth:principal:*") == []
+
+
+async def test_invalidation_clears_redis_and_is_published(redis, users, clock):
+    await get_principal(UID)
+    pubsub = redis.pubsub()
+    await pubsub.subscribe(PRINCIPAL_CHANNEL)
+    await pubsub.get_message(timeout=1)  # subscribe confirmation
+    users.rows[UID].tier = "pro"
+
+    await invalidate_principal(UID)
+
+    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
+    assert message["data"] == UID
+    assert await redis.exists(f"auth:principal:{UID}") == 0
+    assert (await get_principal(UID)).tier == "pro"
+    await pubsub.aclose()
+
+
+async def _eventually(condition) -> None:
+    for _ in range(100):
+        if await condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not met")
+
+
+@pytest.fixture
+async def listener(redis):
+    task = asyncio.create_task(listen_principal_invalidations(redis))
+
+    async def subscribed():
+        return dict(await redis.pubsub_numsub(PRINCIPAL_CHANNEL))[PRINCIPAL_CHANNEL] == 1
+
+    await _eventually(subscribed)
+    yield task
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+async def test_listener_drops_principals_invalidated_by_another_replica(
+    redis, users, clock, listener
+):
+    users.rows["uid-2"] = SimpleNamespace(**{**vars(users.rows[UID]), "firebase_uid": "uid-2"})
+    await get_principal(UID)
+    await get_principal("uid-2")
+    users.rows[UID].tier = "pro"
+
+    # Another replica commits a tier change and invalidates
+    await redis.delete(f"auth:principal:{UID}")
+    await redis.publish(PRINCIPAL_CHANNEL, UID)
+
+    async def dropped():
+        return UID not in user_service._principals
+
+    await _eventually(dropped)
+    assert "uid-2" in user_service._principals
+    assert (await get_principal(UID)).tier == "pro"
+
+
+async def test_preference_change_invalidates_after_commit(redis, users, clock, monkeypatch):
+    events = []
+    invalidate = user_service.invalidate_principal
+
+    async def spy_invalidate(uid):
+        events.append("invalidate")
+        await invalidate(uid)
+
+    async def commit():
+        events.append("commit")
+        users.rows[UID].live_data_stream = True
+
+    async def invalidate_recipients():
+        events.append("recipients")
+
+    monkeypatch.setattr(user_service, "invalidate_principal", spy_invalidate)
+    monkeypatch.setattr(
+        "src.services.notification_service.invalidate_recipients", invalidate_recipients
+    )
+    await get_principal(UID)
+    user = SimpleNamespace(firebase_uid=UID, hubspot_contact_id=None, live_data_stream=False)
+
+    await update_user(SimpleNamespace(commit=commit), user, live_data_stream=True)
+
+    assert events == ["commit", "invalidate"]
+    assert (await get_principal(UID)).live_data_stream is True
+    assert users.queries == 2
+
+
+async def test_profile_only_change_keeps_the_cache(redis, users, clock):
+    await get_principal(UID)
+    user = SimpleNamespace(firebase_uid=UID, hubspot_contact_id=None, display_name=None)
+
+    await update_user(SimpleNamespace(), user, display_name="Ada")
+
+    assert await redis.exists(f"auth:principal:{UID}") == 1
+    assert UID in user_service._principals
@@ -0,0 +1,138 @@
+"""Partition maintenance for odds_snapshots, against a session that records its SQL."""
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from src.tasks import cleanup
+from src.tasks.cleanup import (
+    ODDS_DEFAULT_PARTITION,
+    ODDS_PARTITION_DAYS_AHEAD,
+    ODDS_PARTITION_PREFIX,
+    ODDS_RETENTION_DAYS,
+    ensure_odds_partitions,
+    prune_old_odds,
+)
+
+
+class _Result:
+    def __init__(self, rows=(), rowcount=0):
+        self._rows = list(rows)
+        self.rowcount = rowcount
+
+    def all(self):
+        return self._rows
+
+
+class FakeSession:
+    """Records statements; answers the partition listing from ``partitions``."""
+
+    def __init__(self, partitions: list[str], default_rows: int = 0):
+        self.partitions = partitions
+        self.default_rows = default_rows
+        self.log: list[tuple[str, dict | None]] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.log.append((sql, params))
+        if "pg_inherits" in sql:
+            return _Result([(name,) for name in self.partitions])
+        if sql.startswith("DELETE FROM"):
+            return _Result(rowcount=self.default_rows)
+        return _Result()
+
+    async def commit(self):
+        self.log.append(("COMMIT", None))
+
+    def statements(self, prefix: str) -> list[str]:
+        return [sql for sql, _ in self.log if sql.startswith(prefix)]
+
+
+def _name(day: date) -> str:
+    return f"{ODDS_PARTITION_PREFIX}{day:%Y%m%d}"
+
+
+@pytest.fixture
+def today():
+    return datetime.now(timezone.utc).date()
+
+
+@pytest.fixture
+def session_with(monkeypatch):
+    def install(partitions: list[str], default_rows: int = 0) -> FakeSession:
+        session = FakeSession(partitions, default_rows)
+        monkeypatch.setattr(cleanup, "async_session_factory", lambda: session)
+        return session
+
+    return install
+
+
+async def test_ensure_creates_only_missing_days(session_with, today):
+    session = session_with([_name(today), _name(today + timedelta(days=1)), ODDS_DEFAULT_PARTITION])
+
+    created = await ensure_odds_partitions()
+
+    assert created == ODDS_PARTITION_DAYS_AHEAD - 1
+    creates = session.statements("CREATE TABLE")
+    assert [sql.split()[2] for sql in creates] == [
+        _name(today + timedelta(days=offset))
+        for offset in range(2, ODDS_PARTITION_DAYS_AHEAD + 1)
+    ]
+    day = today + timedelta(days=2)
+    assert f"FROM ('{day} 00:00:00+00:00') TO ('{day + timedelta(days=1)} 00:00:00+00:00')" in (
+        creates[0]
+    )
+
+
+async def test_ensure_moves_default_rows_into_the_new_partition(session_with, today):
+    session = session_with([ODDS_DEFAULT_PARTITION])
+
+    await ensure_odds_partitions(days_ahead=0)
+
+    steps = [sql for sql, _ in session.log if "pg_inherits" not in sql]
+    assert steps[0].startswith("SET LOCAL lock_timeout")
+    assert steps[1].startswith("CREATE TEMP TABLE moved_odds")
+    assert steps[2].startswith(f"WITH moved AS (DELETE FROM {ODDS_DEFAULT_PARTITION}")
+    assert steps[3].startswith(f"CREATE TABLE {_name(today)} PARTITION OF odds_snapshots")
+    assert steps[4] == "INSERT INTO odds_snapshots SELECT * FROM moved_odds"
+    assert steps[5] == "COMMIT"
+    params = session.log[3][1]
+    assert params["lower"] == datetime.combine(today, datetime.min.time(), tzinfo=timezone.utc)
+    assert params["upper"] - params["lower"] == timedelta(days=1)
+
+
+async def test_ensure_is_a_no_op_when_partitions_exist(session_with, today):
+    days = [today + timedelta(days=offset) for offset in range(ODDS_PARTITION_DAYS_AHEAD + 1)]
+    session = session_with([_name(day) for day in days])
+
+    assert await ensure_odds_partitions() == 0
+    assert session.statements("CREATE") == []
+
+
+async def test_prune_drops_days_past_retention(session_with, today):
+    days = [today - timedelta(days=offset) for offset in range(ODDS_RETENTION_DAYS + 3, -1, -1)]
+    session = session_with([ODDS_DEFAULT_PARTITION, *map(_name, reversed(days))], default_rows=4)
+
+    await prune_old_odds()
+
+    dropped = [sql.split()[2] for sql in session.statements("DROP TABLE")]
+    # A day goes once it ended before now - retention
+    assert dropped == [
+        _name(today - timedelta(days=offset))
+        for offset in range(ODDS_RETENTION_DAYS + 3, ODDS_RETENTION_DAYS, -1)
+    ]
+    deletes = session.statements("DELETE FROM")
+    assert deletes == [f"DELETE FROM {ODDS_DEFAULT_PARTITION} WHERE captured_at < :cutoff"]
+
+
+async def test_prune_never_drops_the_default_partition(session_with, today):
+    session = session_with([ODDS_DEFAULT_PARTITION, _name(today)])
+
+    await prune_old_odds()
+
+    assert session.statements("DROP TABLE") == []
@@ -0,0 +1,84 @@
+"""High-volume workers emit an OddsBatch straight from the API payload."""
+from types import SimpleNamespace
+
+import httpx
+import orjson
+
+from src.workers.batch import CENTS, PROBABILITY, OddsBatch
+from src.workers.kalshi import KALSHI_API_BASE, KalshiWorker
+from src.workers.normalizer import normalize_batch
+from src.workers.polymarket import PolymarketWorker
+
+
+def _client(payload, base_url: str = "") -> httpx.AsyncClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=orjson.dumps(payload))
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url=base_url)
+
+
+async def test_kalshi_builds_a_batch():
+    title = "Who will win the election?"
+    worker = KalshiWorker(None, SimpleNamespace(kalshi_api_key=""))
+    worker.client = _client(
+        {
+            "events": [{
+                "category": "Politics",
+                "title": "2028 election",
+                "series_ticker": "KXPRES",
+                "markets": [
+                    {"ticker": "KXPRES-28-A", "title": title, "yes_sub_title": "Alice",
+                     "status": "active", "yes_ask": 40, "no_ask": 62, "yes_bid": 38,
+                     "volume_24h": 1200},
+                    {"ticker": "KXPRES-28-B", "title": title, "yes_sub_title": "Bob",
+                     "status": "active", "yes_ask": 55},
+                    {"ticker": "KXPRES-28-C", "title": title, "status": "closed", "yes_ask": 5},
+                ],
+            }],
+        },
+        KALSHI_API_BASE,
+    )
+
+    batch = await worker.fetch_markets()
+
+    assert isinstance(batch, OddsBatch)
+    assert batch.external_market_id == ["KXPRES-28-A", "KXPRES-28-A", "KXPRES-28-B"]
+    alice, bob = "Will Alice win the election?", "Will Bob win the election?"
+    assert batch.market_title == [alice, alice, bob]
+    assert batch.outcome_name == ["Yes", "No", "Yes"]
+    assert batch.price_format.tolist() == [CENTS] * 3
+    assert batch.optional("bid") == [38.0, None, None]
+    assert batch.market_url[0] == "https://kalshi.com/markets/kxpres"
+    assert normalize_batch(batch).implied_prob.tolist() == [0.4, 0.62, 0.55]
+
+
+async def test_polymarket_builds_a_batch():
+    worker = PolymarketWorker(None, SimpleNamespace())
+    worker.client = _client([{
+        "title": "Bitcoin price",
+        "slug": "bitcoin-100k",
+        "tags": ["Crypto"],
+        "markets": [
+            {"conditionId": "0xabc", "question": "Bitcoin above $100k?",
+             "outcomePrices": '["0.3", "0.7"]', "outcomes": '["Yes", "No"]',
+             "volume": "1500.5", "liquidity": None},
+            {"conditionId": "0xdef", "question": "Broken", "outcomePrices": "not json"},
+        ],
+    }])
+
+    batch = await worker.fetch_markets()
+
+    assert isinstance(batch, OddsBatch)
+    assert batch.external_market_id == ["0xabc", "0xabc"]
+    assert batch.category == ["crypto", "crypto"]
+    assert batch.outcome_index.tolist() == [0, 1]
+    assert batch.price_format.tolist() == [PROBABILITY] * 2
+    assert batch.optional("volume_usd") == [1500.5, 1500.5]
+    assert batch.optional("liquidity_usd") == [None, None]
+    assert batch.market_url == ["https://polymarket.com/event/bitcoin-100k"] * 2
+
+
+async def test_without_a_client_the_batch_is_empty():
+    worker = PolymarketWorker(None, SimpleNamespace())
+
+    assert len(await worker.fetch_markets()) == 0
@@ -0,0 +1,42 @@
+"""The vectorised normaliser must agree with the per-row one."""
+import math
+
+import numpy as np
+import pytest
+
+from src.workers.batch import PRICE_FORMAT_CODES, PROBABILITY
+from src.workers.normalizer import normalize_price, normalize_prices
+
+EDGE_PRICES = [
+    0.0, -0.0, 0.5, 1.0, 1.5, -0.5, 50.0, 99.0, 100.0, 150.0, -150.0, -200.0,
+    2.5, 1e-12, -1e-12, 1e12, math.inf, -math.inf, math.nan,
+]
+
+
+def _same(a: float, b: float) -> bool:
+    return (math.isnan(a) and math.isnan(b)) or a == b
+
+
+@pytest.mark.parametrize("price_format", [*PRICE_FORMAT_CODES, "fractional"])
+def test_normalize_prices_matches_normalize_price(price_format):
+    code = PRICE_FORMAT_CODES.get(price_format, PROBABILITY)
+    prices = np.array(EDGE_PRICES, dtype=np.float64)
+    formats = np.full(len(prices), code, dtype=np.int8)
+
+    implied = normalize_prices(prices, formats).tolist()
+
+    for price, value in zip(EDGE_PRICES, implied):
+        expected = normalize_price(price, price_format)
+        assert _same(value, expected), (price_format, price, value, expected)
+
+
+def test_mixed_formats_in_one_column():
+    rows = [(p, f) for f in PRICE_FORMAT_CODES for p in EDGE_PRICES]
+    prices = np.array([p for p, _ in rows], dtype=np.float64)
+    formats = np.array([PRICE_FORMAT_CODES[f] for _, f in rows], dtype=np.int8)
+
+    implied = normalize_prices(prices, formats).tolist()
+
+    assert all(
+        _same(value, normalize_price(p, f)) for (p, f), value in zip(rows, implied)
+    )
@@ -0,0 +1,139 @@
+"""publish_odds with a PublishCache only writes what changed."""
+import time
+
+import fakeredis
+import orjson
+import pytest
+
+from src.arbengine.sharding import BASE_STREAM_KEY
+from src.core.config import settings
+from src.services.live_store import LIVE_CACHE_TTL, decode_live_market
+from src.workers.batch import OddsBatchBuilder
+from src.workers.normalizer import normalize_batch
+from src.workers.publisher import UPDATES_SEQ_KEY, PublishCache, publish_odds
+
+
+def _batch(prices: list[float], title: str = "Will it rain in 2026?"):
+    builder = OddsBatchBuilder()
+    for i, price in enumerate(prices):
+        builder.add("m1", title, "weather", "polymarket", i, f"Outcome {i}", price, "probability")
+    return normalize_batch(builder.build())
+
+
+@pytest.fixture
+async def redis():
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    yield redis
+    await redis.aclose()
+
+
+async def _streamed(redis) -> list[int]:
+    """Rows per stream entry, oldest first."""
+    entries = await redis.xrange(BASE_STREAM_KEY)
+    return [len(orjson.loads(data["columns"])["price"]) for _, data in entries]
+
+
+async def test_unchanged_market_is_skipped(redis):
+    cache = PublishCache()
+    await publish_odds(redis, _batch([0.4, 0.6]), cache)
+    await publish_odds(redis, _batch([0.4, 0.6]), cache)
+
+    assert await _streamed(redis) == [2]
+    assert await redis.get(UPDATES_SEQ_KEY) == "1"
+    assert len(cache) == 1
+
+
+async def test_only_moved_outcomes_are_written(redis):
+    cache = PublishCache()
+    await publish_odds(redis, _batch([0.4, 0.6]), cache)
+    await redis.hset("odds:live:polymarket:m1", "outcome_0_price", "stale")
+
+    await publish_odds(redis, _batch([0.4, 0.55]), cache)
+
+    assert await _streamed(redis) == [2, 1]
+    assert await redis.get(UPDATES_SEQ_KEY) == "2"
+    stored = await redis.hgetall("odds:live:polymarket:m1")
+    assert stored["outcome_1_price"] == "0.55"
+    assert stored["outcome_0_price"] == "stale"  # unchanged outcome not rewritten
+
+
+async def test_title_change_rewrites_market(redis):
+    cache = PublishCache()
+    await publish_odds(redis, _batch([0.4, 0.6]), cache)
+    await publish_odds(redis, _batch([0.4, 0.6], title="Will it rain in 2026? (NYC)"), cache)
+
+    stored = await redis.hgetall("odds:live:polymarket:m1")
+    assert stored["market_title"] == "Will it rain in 2026? (NYC)"
+    assert await redis.get(UPDATES_SEQ_KEY) == "1"  # no odds moved
+
+
+async def test_full_rewrite_when_due(redis):
+    cache = PublishCache()
+    await publish_odds(redis, _batch([0.4, 0.6]), cache)
+    await redis.delete("odds:live:polymarket:m1")  # e.g. evicted
+
+    cache.max_age = -1.0  # every market is due
+    await publish_odds(redis, _batch([0.4, 0.6]), cache)
+
+    assert await _streamed(redis) == [2, 2]
+    assert await redis.get(UPDATES_SEQ_KEY) == "1"  # clients only hear of moves
+    stored = await redis.hgetall("odds:live:polymarket:m1")
+    assert stored["outcome_0_price"] == "0.4" and stored["outcome_1_price"] == "0.6"
+
+
+async def test_without_cache_everything_is_written(redis):
+    await publish_odds(redis, _batch([0.4, 0.6]))
+    await publish_odds(redis, _batch([0.4, 0.6]))
+
+    assert await _streamed(redis) == [2, 2]
+    assert await redis.get(UPDATES_SEQ_KEY) == "2"
+
+
+async def test_encoding_can_be_switched_while_keys_are_live(redis, monkeypatch):
+    async def prices() -> list[float]:
+        market = decode_live_market(await redis.hgetall("odds:live:polymarket:m1"))
+        return [o["price"] for o in market["outcomes"]]
+
+    monkeypatch.setattr(settings, "live_odds_encoding", "compact")
+    await publish_odds(redis, _batch([0.4, 0.6]), PublishCache())
+    assert await prices() == [0.4, 0.6]
+
+    monkeypatch.setattr(settings, "live_odds_encoding", "hash")
+    await publish_odds(redis, _batch([0.1, 0.9]), PublishCache())
+    assert await prices() == [0.1, 0.9]
+    assert "v" not in await redis.hgetall("odds:live:polymarket:m1")
+
+    monkeypatch.setattr(settings, "live_odds_encoding", "compact")
+    await publish_odds(redis, _batch([0.3, 0.7]), PublishCache())
+    assert await prices() == [0.3, 0.7]
+    assert set(await redis.hgetall("odds:live:polymarket:m1")) == {"v", "d"}
+
+
+@pytest.mark.parametrize("encoding", ["hash", "compact"])
+async def test_live_hash_carries_a_renewed_ttl(redis, monkeypatch, encoding):
+    monkeypatch.setattr(settings, "live_odds_encoding", encoding)
+    cache = PublishCache()
+    await publish_odds(redis, _batch([0.4, 0.6]), cache)
+    assert 0 < await redis.ttl("odds:live:polymarket:m1") <= LIVE_CACHE_TTL
+
+    await redis.expire("odds:live:polymarket:m1", 5)
+    await publish_odds(redis, _batch([0.4, 0.6]), cache)  # unchanged: not rewritten
+    assert await redis.ttl("odds:live:polymarket:m1") > 5
+
+    cache.max_age = -1.0
+    await publish_odds(redis, _batch([0.4, 0.6]), cache)  # full rewrite
+    assert await redis.ttl("odds:live:polymarket:m1") > 0
+
+
+def test_prune_forgets_markets_not_rewritten():
+    cache = PublishCache(max_age=10.0)
+    start = time.monotonic()
+    cache.put("a", start, (), {}, full=True)
+    cache.put("b", start + 15.0, (), {}, full=True)
+
+    cache.prune(start + 5.0)  # too soon since the last prune
+    assert len(cache) == 2
+    cache.prune(start + 25.0)
+
+    assert cache.get("a", start + 25.0) is None
+    assert cache.get("b", start + 25.0) is not None